@@ -12,8 +12,8 @@ export interface TradeResponse {
 
 export interface TradeHistoryResponse {
   trades: TradeResponse[]
-  total: number
-  page: number
+  next_cursor: string | null
+  total: number | null
   page_size: number
 }
 
@@ -24,6 +24,13 @@ export function executeTrade(symbol: string, side: string, quantity: number): Pr
   })
 }
 
-export function fetchTradeHistory(page = 1, pageSize = 20): Promise<TradeHistoryResponse> {
-  return apiFetch(`/trades?page=${page}&page_size=${pageSize}`)
+export function fetchTradeHistory(
+  cursor: string | null = null,
+  pageSize = 20,
+  includeTotal = false,
+): Promise<TradeHistoryResponse> {
+  const params = new URLSearchParams({ page_size: String(pageSize) })
+  if (cursor) params.set('cursor', cursor)
+  if (includeTotal) params.set('include_total', 'true')
+  return apiFetch(`/trades?${params}`)
 }
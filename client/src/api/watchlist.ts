@@ -1,16 +1,27 @@
 import { apiFetch } from '@/api/client'
+import type { QuoteSnapshot } from '@/api/market'
 
 export interface WatchlistItem {
   symbol: string
   added_at: string
+  quote?: QuoteSnapshot | null
 }
 
 export interface WatchlistResponse {
   items: WatchlistItem[]
 }
 
-export function fetchWatchlist(): Promise<WatchlistResponse> {
-  return apiFetch('/watchlist')
+export interface WatchlistBulkAddResponse {
+  added: WatchlistItem[]
+  existing: string[]
+}
+
+export interface WatchlistBulkRemoveResponse {
+  removed: string[]
+}
+
+export function fetchWatchlist(includeQuotes = false): Promise<WatchlistResponse> {
+  return apiFetch(includeQuotes ? '/watchlist?include=quotes' : '/watchlist')
 }
 
 export function addToWatchlist(symbol: string): Promise<WatchlistItem> {
@@ -25,3 +36,16 @@ export async function removeFromWatchlist(symbol: string): Promise<void> {
     method: 'DELETE',
   })
 }
+
+export function addManyToWatchlist(symbols: string[]): Promise<WatchlistBulkAddResponse> {
+  return apiFetch('/watchlist/bulk', {
+    method: 'POST',
+    body: JSON.stringify({ symbols }),
+  })
+}
+
+export function removeManyFromWatchlist(symbols: string[]): Promise<WatchlistBulkRemoveResponse> {
+  return apiFetch(`/watchlist?symbols=${symbols.map(encodeURIComponent).join(',')}`, {
+    method: 'DELETE',
+  })
+}
@@ -14,23 +14,28 @@ interface TradeHistoryProps {
 
 export default function TradeHistory({ refreshKey }: TradeHistoryProps) {
   const [trades, setTrades] = useState<TradeResponse[]>([])
+  // cursors[i] fetches page i + 1; the first page has no cursor
+  const [cursors, setCursors] = useState<(string | null)[]>([null])
   const [page, setPage] = useState(1)
+  const [nextCursor, setNextCursor] = useState<string | null>(null)
   const [total, setTotal] = useState(0)
   const [loading, setLoading] = useState(true)
   const pageSize = 10
 
-  const load = async (p: number) => {
+  const load = async (p: number, pageCursors: (string | null)[]) => {
     setLoading(true)
     try {
-      const data = await fetchTradeHistory(p, pageSize)
+      const data = await fetchTradeHistory(pageCursors[p - 1], pageSize, p === 1)
       setTrades(data.trades)
-      setTotal(data.total)
+      if (data.total !== null) setTotal(data.total)
+      setNextCursor(data.next_cursor)
+      setCursors(data.next_cursor ? [...pageCursors.slice(0, p), data.next_cursor] : pageCursors.slice(0, p))
       setPage(p)
     } catch { /* ignore */ }
     finally { setLoading(false) }
   }
 
-  useEffect(() => { load(1) }, [refreshKey])
+  useEffect(() => { load(1, [null]) }, [refreshKey])
 
   const totalPages = Math.ceil(total / pageSize)
 
@@ -83,13 +88,13 @@ export default function TradeHistory({ refreshKey }: TradeHistoryProps) {
             </Table>
             {totalPages > 1 && (
               <div className="flex justify-center gap-2 p-4">
-                <Button size="sm" variant="outline" disabled={page <= 1} onClick={() => load(page - 1)}>
+                <Button size="sm" variant="outline" disabled={page <= 1} onClick={() => load(page - 1, cursors)}>
                   Previous
                 </Button>
                 <span className="flex items-center text-sm text-muted-foreground">
                   Page {page} of {totalPages}
                 </span>
-                <Button size="sm" variant="outline" disabled={page >= totalPages} onClick={() => load(page + 1)}>
+                <Button size="sm" variant="outline" disabled={!nextCursor} onClick={() => load(page + 1, cursors)}>
                   Next
                 </Button>
               </div>
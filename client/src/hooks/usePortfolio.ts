@@ -15,5 +15,11 @@ export function usePortfolio() {
 
   useEffect(() => { refresh() }, [refresh])
 
-  return { data, loading, refresh }
+  // Live updates from the quote stream replace polling once loaded
+  const update = useCallback((portfolio: PortfolioResponse) => {
+    setData(portfolio)
+    setLoading(false)
+  }, [])
+
+  return { data, loading, refresh, update }
 }
@@ -1,11 +1,17 @@
 import { useEffect, useRef } from 'react'
+import { apiFetch } from '@/api/client'
 import { API_BASE } from '@/utils/constants'
 import { useAuthStore } from '@/stores/authStore'
 import { useQuoteStore } from '@/stores/quoteStore'
+import type { PortfolioResponse } from '@/api/portfolio'
 
 const MAX_BACKOFF = 30_000
+// How often to ack a displayed quote event, for the server's tick-to-screen latency
+const ACK_INTERVAL = 10_000
 
-export function useQuoteStream(symbols: string[]) {
+// With onPortfolio, the stream also carries the user's portfolio valued at
+// live prices, resent whenever a held symbol ticks or a trade changes it.
+export function useQuoteStream(symbols: string[], onPortfolio?: (portfolio: PortfolioResponse) => void) {
   const accessToken = useAuthStore((s) => s.accessToken)
   const updateAccessToken = useAuthStore((s) => s.updateAccessToken)
   const setSnapshot = useQuoteStore((s) => s.setSnapshot)
@@ -13,11 +19,13 @@ export function useQuoteStream(symbols: string[]) {
   const esRef = useRef<EventSource | null>(null)
   const retryRef = useRef<ReturnType<typeof setTimeout> | null>(null)
   const backoffRef = useRef(1000)
-  const cbRef = useRef({ setSnapshot, updateQuotes, updateAccessToken })
+  const lastAckRef = useRef(0)
+  const ackPendingRef = useRef(false)
+  const cbRef = useRef({ setSnapshot, updateQuotes, updateAccessToken, onPortfolio })
   const connectRef = useRef<((token: string, symbolsParam: string) => void) | null>(null)
 
   useEffect(() => {
-    cbRef.current = { setSnapshot, updateQuotes, updateAccessToken }
+    cbRef.current = { setSnapshot, updateQuotes, updateAccessToken, onPortfolio }
   })
 
   if (connectRef.current == null) {
@@ -27,7 +35,8 @@ export function useQuoteStream(symbols: string[]) {
         esRef.current = null
       }
 
-      const url = `${API_BASE}/stream?symbols=${encodeURIComponent(symbolsParam)}&token=${encodeURIComponent(token)}`
+      let url = `${API_BASE}/stream?symbols=${encodeURIComponent(symbolsParam)}&token=${encodeURIComponent(token)}&ack=true`
+      if (cbRef.current.onPortfolio) url += '&portfolio=true'
       const es = new EventSource(url)
       esRef.current = es
 
@@ -42,6 +51,33 @@ export function useQuoteStream(symbols: string[]) {
           cbRef.current.updateQuotes(JSON.parse(e.data))
           backoffRef.current = 1000
         } catch { /* ignore */ }
+
+        // Ack once the update has been painted, at most every ACK_INTERVAL.
+        // Hidden tabs don't paint (or run animation frames), so they don't ack.
+        const sentAt = Number(e.lastEventId)
+        if (
+          sentAt && !document.hidden && !ackPendingRef.current &&
+          Date.now() - lastAckRef.current >= ACK_INTERVAL
+        ) {
+          ackPendingRef.current = true
+          // The frame callback runs just before the paint; a task queued from it runs after
+          requestAnimationFrame(() => {
+            setTimeout(() => {
+              ackPendingRef.current = false
+              lastAckRef.current = Date.now()
+              apiFetch('/stream/ack', {
+                method: 'POST',
+                body: JSON.stringify({ sent_at: [sentAt] }),
+              }).catch(() => { /* ignore */ })
+            }, 0)
+          })
+        }
+      })
+
+      es.addEventListener('portfolio', (e) => {
+        try {
+          cbRef.current.onPortfolio?.(JSON.parse(e.data))
+        } catch { /* ignore */ }
       })
 
       es.onopen = () => {
@@ -83,9 +119,10 @@ export function useQuoteStream(symbols: string[]) {
   }
 
   const symbolsKey = symbols.join(',')
+  const withPortfolio = onPortfolio !== undefined
 
   useEffect(() => {
-    if (!accessToken || symbols.length === 0) return
+    if (!accessToken || (symbols.length === 0 && !withPortfolio)) return
 
     backoffRef.current = 1000
     connectRef.current!(accessToken, symbolsKey)
@@ -97,5 +134,5 @@ export function useQuoteStream(symbols: string[]) {
         esRef.current = null
       }
     }
-  }, [accessToken, symbolsKey]) // eslint-disable-line react-hooks/exhaustive-deps
+  }, [accessToken, symbolsKey, withPortfolio]) // eslint-disable-line react-hooks/exhaustive-deps
 }
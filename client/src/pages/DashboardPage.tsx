@@ -207,17 +207,19 @@ export default function DashboardPage() {
   useQuoteStream(allSymbols)
 
   const quotes = useQuoteStore((s) => s.quotes)
+  const updateQuotes = useQuoteStore((s) => s.updateQuotes)
 
-  // Load watchlist
+  // Load watchlist, with quotes so its rows render before the stream connects
   useEffect(() => {
     const load = async () => {
       try {
-        const data = await fetchWatchlist()
+        const data = await fetchWatchlist(true)
+        updateQuotes(data.items.flatMap((i) => (i.quote ? [i.quote] : [])))
         setWatchlistSymbols(data.items.map((i) => i.symbol))
       } catch { /* ignore */ }
     }
     load()
-  }, [])
+  }, [updateQuotes])
 
   const handleAddTicker = useCallback(async (symbol: string) => {
     try {
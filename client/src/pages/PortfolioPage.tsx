@@ -9,7 +9,7 @@ import { usePortfolio } from '@/hooks/usePortfolio'
 import { useQuoteStream } from '@/hooks/useQuoteStream'
 
 export default function PortfolioPage() {
-  const { data, loading, refresh } = usePortfolio()
+  const { data, loading, update } = usePortfolio()
   const [tradeSymbol, setTradeSymbol] = useState<string | null>(null)
   const [refreshKey, setRefreshKey] = useState(0)
 
@@ -18,10 +18,10 @@ export default function PortfolioPage() {
     [data?.positions],
   )
 
-  useQuoteStream(positionSymbols)
+  useQuoteStream(positionSymbols, update)
 
+  // The portfolio stream picks up the trade itself
   const handleTradeSuccess = () => {
-    refresh()
     setRefreshKey((k) => k + 1)
   }
 
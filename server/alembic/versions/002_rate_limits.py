@@ -0,0 +1,34 @@
+"""rate_limits
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "002"
+down_revision: Union[str, None] = "001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "rate_limits",
+        sa.Column("key", sa.String(320), primary_key=True),
+        sa.Column("window_index", sa.BigInteger(), default=0),
+        sa.Column("prev_count", sa.Integer(), default=0),
+        sa.Column("curr_count", sa.Integer(), default=0),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_index("ix_rate_limits_expires_at", "rate_limits", ["expires_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_rate_limits_expires_at", table_name="rate_limits")
+    op.drop_table("rate_limits")
@@ -0,0 +1,34 @@
+"""otp_lifecycle_indexes
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "003"
+down_revision: Union[str, None] = "002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_otp_active",
+        "otp_codes",
+        ["email", "code", "expires_at"],
+        postgresql_where=sa.text("used = false"),
+    )
+    op.create_index("ix_otp_codes_expires_at", "otp_codes", ["expires_at"])
+    op.drop_index("ix_otp_email_code", table_name="otp_codes")
+
+
+def downgrade() -> None:
+    op.create_index("ix_otp_email_code", "otp_codes", ["email", "code"])
+    op.drop_index("ix_otp_codes_expires_at", table_name="otp_codes")
+    op.drop_index("ix_otp_active", table_name="otp_codes")
@@ -0,0 +1,44 @@
+"""orders
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "004"
+down_revision: Union[str, None] = "003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "orders",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("users.id"), nullable=False, index=True),
+        sa.Column("symbol", sa.String(20), nullable=False),
+        sa.Column("side", sa.String(4), nullable=False),
+        sa.Column("order_type", sa.String(5), nullable=False),
+        sa.Column("quantity", sa.Integer(), nullable=False),
+        sa.Column("price", sa.Float(), nullable=False),
+        sa.Column("status", sa.String(10), nullable=False, server_default="OPEN"),
+        sa.Column("reject_reason", sa.String(255), nullable=True),
+        sa.Column("trade_id", postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("filled_at", sa.DateTime(timezone=True), nullable=True),
+        sa.CheckConstraint("side IN ('BUY', 'SELL')", name="ck_order_side"),
+        sa.CheckConstraint("order_type IN ('LIMIT', 'STOP')", name="ck_order_type"),
+    )
+    op.create_index("ix_orders_open", "orders", ["symbol"], postgresql_where=sa.text("status = 'OPEN'"))
+
+
+def downgrade() -> None:
+    op.drop_index("ix_orders_open", table_name="orders")
+    op.drop_table("orders")
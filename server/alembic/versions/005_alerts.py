@@ -0,0 +1,41 @@
+"""alerts
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "005"
+down_revision: Union[str, None] = "004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "alerts",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("users.id"), nullable=False, index=True),
+        sa.Column("symbol", sa.String(20), nullable=False),
+        sa.Column("condition", sa.String(8), nullable=False),
+        sa.Column("threshold", sa.Float(), nullable=False),
+        sa.Column("reference_price", sa.Float(), nullable=True),
+        sa.Column("status", sa.String(10), nullable=False, server_default="ACTIVE"),
+        sa.Column("triggered_price", sa.Float(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("triggered_at", sa.DateTime(timezone=True), nullable=True),
+        sa.CheckConstraint("condition IN ('ABOVE', 'BELOW', 'PCT_MOVE')", name="ck_alert_condition"),
+    )
+    op.create_index("ix_alerts_active", "alerts", ["symbol"], postgresql_where=sa.text("status = 'ACTIVE'"))
+
+
+def downgrade() -> None:
+    op.drop_index("ix_alerts_active", table_name="alerts")
+    op.drop_table("alerts")
@@ -0,0 +1,37 @@
+"""trade_history_index
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "006"
+down_revision: Union[str, None] = "005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Built concurrently so trading isn't blocked while it builds on a large table
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_trades_user_executed",
+            "trades",
+            ["user_id", sa.text("executed_at DESC"), sa.text("id DESC")],
+            postgresql_include=["symbol", "side", "quantity", "price", "total"],
+            postgresql_concurrently=True,
+        )
+        # Its user_id prefix makes the single-column index redundant
+        op.drop_index("ix_trades_user_id", table_name="trades", postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index("ix_trades_user_id", "trades", ["user_id"], postgresql_concurrently=True)
+        op.drop_index("ix_trades_user_executed", table_name="trades", postgresql_concurrently=True)
@@ -0,0 +1,34 @@
+"""portfolio_snapshots
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "007"
+down_revision: Union[str, None] = "006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "portfolio_snapshots",
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("users.id"), primary_key=True),
+        sa.Column("bucket_seconds", sa.Integer(), primary_key=True),
+        sa.Column("taken_at", sa.DateTime(timezone=True), primary_key=True),
+        sa.Column("total_value", sa.Float(), nullable=False),
+    )
+    op.create_index("ix_portfolio_snapshots_bucket_taken", "portfolio_snapshots", ["bucket_seconds", "taken_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_portfolio_snapshots_bucket_taken", table_name="portfolio_snapshots")
+    op.drop_table("portfolio_snapshots")
@@ -0,0 +1,104 @@
+"""partition_trades
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-19
+
+"""
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "008"
+down_revision: Union[str, None] = "007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Months of empty partitions to create past the current one; the
+# maintenance job keeps this many ahead from then on
+MONTHS_AHEAD = 3
+
+_COLUMNS = "id, user_id, symbol, side, quantity, price, total, executed_at"
+
+
+def _month_start(year: int, month: int) -> datetime:
+    return datetime(year + (month - 1) // 12, (month - 1) % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def _create_history_index():
+    op.create_index(
+        "ix_trades_user_executed",
+        "trades",
+        ["user_id", sa.text("executed_at DESC"), sa.text("id DESC")],
+        postgresql_include=["symbol", "side", "quantity", "price", "total"],
+    )
+
+
+def upgrade() -> None:
+    # Rewrites the table: every trade is copied into its month's partition
+    op.execute("ALTER TABLE trades RENAME TO trades_unpartitioned")
+    op.execute("ALTER INDEX trades_pkey RENAME TO trades_unpartitioned_pkey")
+    op.execute("ALTER INDEX ix_trades_user_executed RENAME TO ix_trades_unpartitioned_user_executed")
+
+    # The partition key has to be part of the primary key
+    op.create_table(
+        "trades",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("symbol", sa.String(20), nullable=False),
+        sa.Column("side", sa.String(4), nullable=False),
+        sa.Column("quantity", sa.Integer(), nullable=False),
+        sa.Column("price", sa.Float(), nullable=False),
+        sa.Column("total", sa.Float(), nullable=False),
+        sa.Column("executed_at", sa.DateTime(timezone=True), primary_key=True, server_default=sa.func.now()),
+        sa.CheckConstraint("side IN ('BUY', 'SELL')", name="ck_trade_side"),
+        postgresql_partition_by="RANGE (executed_at)",
+    )
+
+    now = datetime.now(timezone.utc)
+    oldest = op.get_bind().execute(sa.text("SELECT min(executed_at) FROM trades_unpartitioned")).scalar() or now
+    oldest = oldest.astimezone(timezone.utc)
+    months = (now.year - oldest.year) * 12 + now.month - oldest.month + MONTHS_AHEAD
+    for i in range(months + 1):
+        start = _month_start(oldest.year, oldest.month + i)
+        end = _month_start(oldest.year, oldest.month + i + 1)
+        op.execute(
+            f"CREATE TABLE trades_{start:%Y_%m} PARTITION OF trades "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        )
+
+    op.execute(
+        f"INSERT INTO trades ({_COLUMNS}) "
+        f"SELECT id, user_id, symbol, side, quantity, price, total, coalesce(executed_at, now()) "
+        f"FROM trades_unpartitioned"
+    )
+    # Built after the copy, which is much faster than maintaining it row by row
+    _create_history_index()
+    op.drop_table("trades_unpartitioned")
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE trades RENAME TO trades_partitioned")
+    op.execute("ALTER INDEX trades_pkey RENAME TO trades_partitioned_pkey")
+    op.execute("ALTER INDEX ix_trades_user_executed RENAME TO ix_trades_partitioned_user_executed")
+
+    op.create_table(
+        "trades",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("symbol", sa.String(20), nullable=False),
+        sa.Column("side", sa.String(4), nullable=False),
+        sa.Column("quantity", sa.Integer(), nullable=False),
+        sa.Column("price", sa.Float(), nullable=False),
+        sa.Column("total", sa.Float(), nullable=False),
+        sa.Column("executed_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.CheckConstraint("side IN ('BUY', 'SELL')", name="ck_trade_side"),
+    )
+    op.execute(f"INSERT INTO trades ({_COLUMNS}) SELECT {_COLUMNS} FROM trades_partitioned")
+    _create_history_index()
+    # Drops the partitions with it
+    op.drop_table("trades_partitioned")
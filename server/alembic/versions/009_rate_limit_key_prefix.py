@@ -0,0 +1,31 @@
+"""rate_limit_key_prefix
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "009"
+down_revision: Union[str, None] = "008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Concurrency limits keep one row per lease; counting a group's leases is a
+    # prefix search, which the primary key index can't serve outside the C locale
+    op.create_index(
+        "ix_rate_limits_key_prefix",
+        "rate_limits",
+        ["key"],
+        postgresql_ops={"key": "text_pattern_ops"},
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_rate_limits_key_prefix", table_name="rate_limits")
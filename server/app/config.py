@@ -3,14 +3,45 @@ from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     database_url: str = "postgresql+asyncpg://pulse:pulse@db:5432/pulse"
+    database_replica_url: str = ""  # optional read replica for read-only endpoints
+    replica_read_your_writes_seconds: int = 10  # reads stay on the primary this long after a user's write
+    db_pool_size: int = 5
+    db_max_overflow: int = 5
+    db_pool_timeout_seconds: int = 30  # checkouts waiting longer than this fail
+    db_pool_recycle_seconds: int = 300
+    db_pool_pre_ping: bool = True
+    db_statement_cache_size: int = 500  # prepared statements kept per connection; 0 disables
+    slow_query_ms: int = 200  # statements slower than this are logged
     finnhub_api_key: str = ""
     jwt_secret: str = "change-me-to-a-random-secret"
     jwt_algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
     refresh_token_expire_days: int = 7
     resend_api_key: str = ""
+    email_workers: int = 4
+    email_outbox_size: int = 1000
     cors_origins: str = "http://localhost:5173,http://localhost:3000"
     starting_balance: float = 100000.00
+    auth_cache_ttl_seconds: int = 30
+    auth_cache_max_entries: int = 10000
+    position_cache_ttl_seconds: int = 300
+    position_cache_max_entries: int = 10000
+    otp_purge_interval_seconds: int = 3600
+    portfolio_snapshot_interval_seconds: int = 300
+    portfolio_snapshot_raw_retention_days: int = 7
+    portfolio_snapshot_hourly_retention_days: int = 90
+    leaderboard_rebuild_interval_seconds: int = 600
+    trade_partition_interval_seconds: int = 86400
+    trade_partitions_ahead_months: int = 3  # empty monthly trade partitions kept ready
+    market_cache_seconds: int = 1  # max-age of the public quote endpoints
+    warmup_priority_seeds: int = 50  # REST-seeded quickly at startup before reporting ready
+    server_timing_header: bool = False  # send each request's timing breakdown to clients
+    metrics_token: str = ""  # bearer token for /api/metrics; empty disables the endpoint
+    slow_request_ms: int = 1000  # requests slower than this are logged and profiled
+    slow_request_sample_interval_ms: int = 20
+    slow_request_profile_dir: str = "profiles"
+    slow_request_max_profiles: int = 200
+    rate_limit_backend: str = "memory"  # "memory" (per worker) or "postgres" (shared)
 
     model_config = {"env_file": ".env", "extra": "ignore"}
 
@@ -1,34 +1,73 @@
+import uuid
+from urllib.parse import parse_qs, urlencode, urlparse, urlunparse
+
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase
 
 from app.config import settings
+from app.utils.cache import TTLCache
+from app.utils.db_metrics import InstrumentedPool, instrument_engine
 
-# Neon provides postgresql:// URLs — swap to asyncpg driver and enable SSL
-_db_url = settings.database_url
-if _db_url.startswith("postgresql://"):
-    _db_url = _db_url.replace("postgresql://", "postgresql+asyncpg://", 1)
-
-# Strip query params that asyncpg doesn't understand (sslmode, channel_binding)
-from urllib.parse import urlparse, parse_qs, urlencode, urlunparse
-_parsed = urlparse(_db_url)
-_params = {k: v for k, v in parse_qs(_parsed.query).items() if k not in ("sslmode", "channel_binding")}
-_db_url = urlunparse(_parsed._replace(query=urlencode(_params, doseq=True)))
-
-_connect_args = {}
-if "neon.tech" in _db_url:
-    _connect_args["ssl"] = True
-
-engine = create_async_engine(
-    _db_url,
-    echo=False,
-    connect_args=_connect_args,
-    pool_pre_ping=True,
-    pool_recycle=300,
-    pool_size=5,
-    max_overflow=5,
-)
+
+def _create_engine(url: str):
+    # Neon provides postgresql:// URLs — swap to asyncpg driver and enable SSL
+    if url.startswith("postgresql://"):
+        url = url.replace("postgresql://", "postgresql+asyncpg://", 1)
+
+    # Strip query params that asyncpg doesn't understand (sslmode, channel_binding)
+    parsed = urlparse(url)
+    params = {k: v for k, v in parse_qs(parsed.query).items() if k not in ("sslmode", "channel_binding")}
+    params.setdefault("prepared_statement_cache_size", [str(settings.db_statement_cache_size)])
+    url = urlunparse(parsed._replace(query=urlencode(params, doseq=True)))
+
+    # SQLAlchemy keeps its own per-connection cache of asyncpg prepared
+    # statements (prepared_statement_cache_size above); size asyncpg's to match
+    connect_args = {"statement_cache_size": settings.db_statement_cache_size}
+    if "neon.tech" in url:
+        connect_args["ssl"] = True
+
+    created = create_async_engine(
+        url,
+        echo=False,
+        connect_args=connect_args,
+        poolclass=InstrumentedPool,
+        pool_pre_ping=settings.db_pool_pre_ping,
+        pool_recycle=settings.db_pool_recycle_seconds,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout_seconds,
+    )
+    instrument_engine(created)
+    return created
+
+
+engine = _create_engine(settings.database_url)
 AsyncSessionLocal = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
+# Read-only traffic goes to the replica when one is configured
+replica_engine = _create_engine(settings.database_replica_url) if settings.database_replica_url else None
+ReadSessionLocal = (
+    async_sessionmaker(replica_engine, class_=AsyncSession, expire_on_commit=False)
+    if replica_engine is not None
+    else AsyncSessionLocal
+)
+
+# Users who wrote recently read from the primary until the replica has caught up
+_recent_writes = TTLCache(max_entries=100000, ttl_seconds=settings.replica_read_your_writes_seconds)
+
+
+def note_write(user_id: uuid.UUID | str):
+    """Send the user's reads to the primary for a while, so they see their own writes."""
+    if replica_engine is not None:
+        _recent_writes.set(str(user_id), True)
+
+
+def read_session(user_id: uuid.UUID | str) -> AsyncSession:
+    """A session for the user's read-only queries: the replica unless they just wrote."""
+    if _recent_writes.get(str(user_id)):
+        return AsyncSessionLocal()
+    return ReadSessionLocal()
+
 
 class Base(DeclarativeBase):
     pass
@@ -4,22 +4,22 @@ from fastapi import Depends, HTTPException, Query, Request, status
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
+from app.database import get_db, read_session
 from app.models.user import User
-from app.services.auth_service import decode_token
+from app.services.auth_service import cache_user, decode_access_token, get_cached_user
 
+credentials_exception = HTTPException(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail="Invalid or expired token",
+    headers={"WWW-Authenticate": "Bearer"},
+)
 
-async def get_current_user(
+
+async def get_current_user_id(
     request: Request,
     token: str | None = Query(None),
-    db: AsyncSession = Depends(get_db),
-) -> User:
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Invalid or expired token",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-
+) -> uuid.UUID:
+    """Resolve the caller's identity from the token alone, without loading the user row."""
     # Try Bearer header first, then query param
     auth_token = token
     auth_header = request.headers.get("authorization")
@@ -29,17 +29,41 @@ async def get_current_user(
     if not auth_token:
         raise credentials_exception
 
-    payload = decode_token(auth_token)
-    if not payload or payload.get("type") != "access":
+    payload = decode_access_token(auth_token)
+    if not payload:
         raise credentials_exception
 
-    user_id = payload.get("sub")
-    if not user_id:
+    try:
+        user_id = uuid.UUID(payload["sub"])
+    except ValueError:
         raise credentials_exception
 
-    result = await db.execute(select(User).where(User.id == uuid.UUID(user_id)))
+    return user_id
+
+
+async def get_read_db(user_id: uuid.UUID = Depends(get_current_user_id)):
+    """A session for read-only endpoints: the replica, or the primary just after the caller wrote.
+
+    Don't use it where results populate shared caches (positions, the user
+    row), which must not be filled from a lagging replica.
+    """
+    async with read_session(user_id) as session:
+        yield session
+
+
+async def get_current_user(
+    user_id: uuid.UUID = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db),
+) -> User:
+    user = get_cached_user(user_id)
+    if user:
+        db.add(user)
+        return user
+
+    result = await db.execute(select(User).where(User.id == user_id))
     user = result.scalar_one_or_none()
     if not user:
         raise credentials_exception
 
+    cache_user(user)
     return user
@@ -0,0 +1,191 @@
+import asyncio
+import logging
+import os
+import re
+import time
+from collections import Counter
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import settings
+from app.utils import timing
+from app.utils.metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+MAX_STACK_DEPTH = 64
+
+
+class RouteStats:
+    """Latency histogram for one route, plus where its time went in total."""
+
+    __slots__ = ("latency", "db", "db_queries", "db_wait", "http", "serialize")
+
+    def __init__(self):
+        self.latency = Histogram()
+        self.db = 0.0
+        self.db_queries = 0
+        self.db_wait = 0.0
+        self.http = 0.0
+        self.serialize = 0.0
+
+    def observe(self, elapsed: float, request: timing.RequestTiming):
+        self.latency.observe(elapsed)
+        self.db += request.db
+        self.db_queries += request.db_queries
+        self.db_wait += request.db_wait
+        self.http += request.http
+        self.serialize += request.serialize
+
+
+_stats: dict[tuple[str, str], RouteStats] = {}  # (method, route) -> stats
+# Requests in progress, oldest first, for the slow request sampler
+_in_flight: dict[asyncio.Task, float] = {}  # request task -> start time
+_samples: dict[asyncio.Task, Counter] = {}  # request task -> folded stack -> count
+_sampler: asyncio.Task | None = None
+
+
+class TimingMiddleware:
+    """Times every request: per-route stats, slow request profiles and optionally a Server-Timing header."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request = timing.begin()
+        task = asyncio.current_task()
+        _in_flight[task] = request.started
+        streaming = False
+
+        async def send_with_timing(message: Message):
+            nonlocal streaming
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                if settings.server_timing_header:
+                    headers.append("Server-Timing", request.server_timing())
+                # Event streams stay open indefinitely; they aren't slow requests
+                if headers.get("content-type", "").startswith("text/event-stream"):
+                    streaming = True
+                    _in_flight.pop(task, None)
+                    _samples.pop(task, None)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _in_flight.pop(task, None)
+            samples = _samples.pop(task, None)
+            if not streaming:
+                elapsed = time.perf_counter() - request.started
+                route = scope.get("route")
+                key = (scope["method"], route.path if route is not None else "unmatched")
+                stats = _stats.get(key)
+                if stats is None:
+                    stats = _stats[key] = RouteStats()
+                stats.observe(elapsed, request)
+                if elapsed * 1000 >= settings.slow_request_ms:
+                    _report_slow(key, elapsed, request, samples)
+
+
+def _report_slow(key: tuple[str, str], elapsed: float, request: timing.RequestTiming, samples: Counter | None):
+    method, path = key
+    logger.warning(f"Slow request {method} {path} took {elapsed * 1000:.0f}ms: {request.server_timing()}")
+    if samples:
+        name = f"{int(time.time() * 1000)}-{method}-{re.sub(r'[^A-Za-z0-9]+', '_', path).strip('_')}.folded"
+        asyncio.get_running_loop().run_in_executor(None, _save_profile, name, samples)
+
+
+def _save_profile(name: str, samples: Counter):
+    """Write folded stacks (flamegraph.pl / speedscope format), keeping the newest few."""
+    directory = settings.slow_request_profile_dir
+    try:
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, name), "w") as f:
+            for stack, count in samples.most_common():
+                f.write(f"{stack} {count}\n")
+        profiles = sorted(p for p in os.listdir(directory) if p.endswith(".folded"))
+        for old in profiles[:-settings.slow_request_max_profiles]:
+            os.remove(os.path.join(directory, old))
+    except OSError as e:
+        logger.error(f"Failed to save slow request profile {name}: {e}")
+
+
+def _folded_stack(task: asyncio.Task) -> str | None:
+    """The coroutine chain a suspended task is waiting in, outermost first.
+
+    Task.get_stack() only reaches the outermost frame of a suspended
+    coroutine, so follow the await chain down instead.
+    """
+    frames = []
+    awaitable = task.get_coro()
+    while awaitable is not None and len(frames) < MAX_STACK_DEPTH:
+        frame = getattr(awaitable, "cr_frame", None) or getattr(awaitable, "gi_frame", None) or getattr(awaitable, "ag_frame", None)
+        if frame is None:
+            break
+        frames.append(f"{frame.f_code.co_qualname} ({os.path.basename(frame.f_code.co_filename)}:{frame.f_lineno})")
+        awaitable = getattr(awaitable, "cr_await", None) or getattr(awaitable, "gi_yieldfrom", None) or getattr(awaitable, "ag_await", None)
+    return ";".join(frames) or None
+
+
+async def _sample_slow_requests():
+    """Sample the stacks of requests already past the slow threshold.
+
+    Runs on the event loop, so it sees where slow requests are waiting (a
+    query, an upstream call, a lock). Time spent blocking the loop shows as
+    the gap between total and the db/http/serialize durations instead.
+    """
+    threshold = settings.slow_request_ms / 1000
+    interval = settings.slow_request_sample_interval_ms / 1000
+    while True:
+        await asyncio.sleep(interval)
+        now = time.perf_counter()
+        for task, started in list(_in_flight.items()):
+            if now - started < threshold:
+                break  # the rest started later
+            stack = _folded_stack(task)
+            if stack:
+                _samples.setdefault(task, Counter())[stack] += 1
+
+
+def render_metrics() -> str:
+    """Per-route stats in the Prometheus text format."""
+    lines = [
+        "# HELP http_request_duration_seconds Request latency by route.",
+        "# TYPE http_request_duration_seconds histogram",
+    ]
+    totals = {
+        "http_request_db_seconds_total": ("Time spent in database queries.", "db"),
+        "http_request_db_queries_total": ("Database queries run.", "db_queries"),
+        "http_request_db_wait_seconds_total": ("Time spent waiting for a pooled connection.", "db_wait"),
+        "http_request_upstream_seconds_total": ("Time spent in upstream HTTP calls.", "http"),
+        "http_request_serialize_seconds_total": ("Time spent rendering responses.", "serialize"),
+    }
+    for (method, path), stats in sorted(_stats.items()):
+        lines += stats.latency.lines("http_request_duration_seconds", f'method="{method}",route="{path}"')
+    for name, (help_text, attribute) in totals.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} counter")
+        for (method, path), stats in sorted(_stats.items()):
+            lines.append(f'{name}{{method="{method}",route="{path}"}} {getattr(stats, attribute)}')
+    return "\n".join(lines) + "\n"
+
+
+async def start():
+    global _sampler
+    _sampler = asyncio.create_task(_sample_slow_requests())
+
+
+async def stop():
+    global _sampler
+    if _sampler:
+        _sampler.cancel()
+        try:
+            await _sampler
+        except asyncio.CancelledError:
+            pass
+        _sampler = None
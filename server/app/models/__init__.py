@@ -1,7 +1,11 @@
+from app.models.alert import Alert
+from app.models.order import Order
 from app.models.otp import OtpCode
+from app.models.portfolio_snapshot import PortfolioSnapshot
 from app.models.position import Position
+from app.models.rate_limit import RateLimit
 from app.models.trade import Trade
 from app.models.user import User
 from app.models.watchlist import Watchlist
 
-__all__ = ["User", "OtpCode", "Watchlist", "Trade", "Position"]
+__all__ = ["User", "OtpCode", "Watchlist", "Trade", "Position", "RateLimit", "Order", "Alert", "PortfolioSnapshot"]
@@ -0,0 +1,26 @@
+import uuid
+from datetime import datetime
+
+from sqlalchemy import DateTime, Float, ForeignKey, Index, Integer
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+
+class PortfolioSnapshot(Base):
+    """A user's total portfolio value at a point in time.
+
+    bucket_seconds is 0 for raw snapshots; rollups keep the closing value of
+    each hour (3600) or day (86400), stamped with the bucket's start.
+    """
+
+    __tablename__ = "portfolio_snapshots"
+
+    user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id"), primary_key=True)
+    bucket_seconds: Mapped[int] = mapped_column(Integer, primary_key=True)
+    taken_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
+    total_value: Mapped[float] = mapped_column(Float, nullable=False)
+
+    # For rollups and retention, which work across all users
+    __table_args__ = (Index("ix_portfolio_snapshots_bucket_taken", "bucket_seconds", "taken_at"),)
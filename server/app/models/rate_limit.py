@@ -0,0 +1,20 @@
+from datetime import datetime
+
+from sqlalchemy import BigInteger, DateTime, Index, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+
+class RateLimit(Base):
+    __tablename__ = "rate_limits"
+    __table_args__ = (
+        # Prefix searches (key LIKE 'group:%') for counting a group's leases
+        Index("ix_rate_limits_key_prefix", "key", postgresql_ops={"key": "text_pattern_ops"}),
+    )
+
+    key: Mapped[str] = mapped_column(String(320), primary_key=True)
+    window_index: Mapped[int] = mapped_column(BigInteger, default=0)
+    prev_count: Mapped[int] = mapped_column(Integer, default=0)
+    curr_count: Mapped[int] = mapped_column(Integer, default=0)
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, index=True)
@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import CheckConstraint, DateTime, Float, ForeignKey, Integer, String, func
+from sqlalchemy import CheckConstraint, DateTime, Float, ForeignKey, Index, Integer, String, func
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column
 
@@ -12,12 +12,24 @@ class Trade(Base):
     __tablename__ = "trades"
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False, index=True)
+    user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     symbol: Mapped[str] = mapped_column(String(20), nullable=False)
     side: Mapped[str] = mapped_column(String(4), nullable=False)
     quantity: Mapped[int] = mapped_column(Integer, nullable=False)
     price: Mapped[float] = mapped_column(Float, nullable=False)
     total: Mapped[float] = mapped_column(Float, nullable=False)
-    executed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    # Part of the primary key because trades are partitioned by month on it
+    executed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True, server_default=func.now())
 
-    __table_args__ = (CheckConstraint("side IN ('BUY', 'SELL')", name="ck_trade_side"),)
+    __table_args__ = (
+        CheckConstraint("side IN ('BUY', 'SELL')", name="ck_trade_side"),
+        # Covers history pages newest first, so they're served by index-only scans
+        Index(
+            "ix_trades_user_executed",
+            "user_id",
+            executed_at.desc(),
+            id.desc(),
+            postgresql_include=["symbol", "side", "quantity", "price", "total"],
+        ),
+        {"postgresql_partition_by": "RANGE (executed_at)"},
+    )
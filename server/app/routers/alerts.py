@@ -0,0 +1,85 @@
+import uuid
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_db
+from app.middleware.auth import get_current_user_id, get_read_db
+from app.models.alert import Alert
+from app.schemas.alert import AlertListResponse, AlertRequest, AlertResponse
+from app.services import alert_service, event_service, finnhub_service
+from app.utils.responses import FastJSONResponse
+
+router = APIRouter(prefix="/alerts", tags=["alerts"])
+
+
+def _alert_response(alert: Alert) -> AlertResponse:
+    return AlertResponse(
+        id=str(alert.id),
+        symbol=alert.symbol,
+        condition=alert.condition,
+        threshold=alert.threshold,
+        reference_price=alert.reference_price,
+        status=alert.status,
+        triggered_price=alert.triggered_price,
+        created_at=str(alert.created_at),
+        triggered_at=str(alert.triggered_at) if alert.triggered_at else None,
+    )
+
+
+@router.post("", response_model=AlertResponse, status_code=status.HTTP_201_CREATED)
+async def create_alert(
+    req: AlertRequest,
+    user_id: uuid.UUID = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db),
+):
+    symbol = req.symbol.upper()
+    await finnhub_service.subscribe(symbol)
+
+    reference_price = None
+    if req.condition == "PCT_MOVE":
+        quote = finnhub_service.get_quote(symbol)
+        if not quote:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"No price data for {symbol}")
+        reference_price = quote["price"]
+
+    alert = Alert(
+        user_id=user_id,
+        symbol=symbol,
+        condition=req.condition,
+        threshold=req.threshold,
+        reference_price=reference_price,
+        status="ACTIVE",
+    )
+    db.add(alert)
+    await event_service.user_wrote(user_id, db)
+    await db.commit()
+    await db.refresh(alert)
+
+    await alert_service.open_alert(alert)
+
+    return _alert_response(alert)
+
+
+@router.get("", response_model=AlertListResponse)
+async def list_alerts(
+    alert_status: str | None = Query(None, alias="status", pattern="^(ACTIVE|TRIGGERED|CANCELLED)$"),
+    user_id: uuid.UUID = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_read_db),
+):
+    query = select(Alert).where(Alert.user_id == user_id)
+    if alert_status:
+        query = query.where(Alert.status == alert_status)
+    result = await db.execute(query.order_by(Alert.created_at.desc()).limit(100))
+    return FastJSONResponse(AlertListResponse(alerts=[_alert_response(a) for a in result.scalars().all()]))
+
+
+@router.delete("/{alert_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def cancel_alert(
+    alert_id: uuid.UUID,
+    user_id: uuid.UUID = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db),
+):
+    if not await alert_service.cancel_alert(db, user_id, alert_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No active alert with that id")
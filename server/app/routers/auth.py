@@ -18,7 +18,7 @@ from app.services.auth_service import (
     get_or_create_user,
     verify_otp,
 )
-from app.services.email_service import send_otp_email
+from app.services.email_service import queue_otp_email
 from app.utils.rate_limit import otp_send_limiter, otp_verify_limiter
 
 router = APIRouter(prefix="/auth", tags=["auth"])
@@ -26,17 +26,18 @@ router = APIRouter(prefix="/auth", tags=["auth"])
 
 @router.post("/register", response_model=RegisterResponse)
 async def register(req: RegisterRequest, db: AsyncSession = Depends(get_db)):
-    if not otp_send_limiter.is_allowed(req.email):
+    if not await otp_send_limiter.is_allowed(req.email):
         raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail="Too many OTP requests")
 
     code = await create_otp(db, req.email)
-    await send_otp_email(req.email, code)
+    if not queue_otp_email(req.email, code):
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Email service busy, try again shortly")
     return RegisterResponse(message="Verification code sent", email=req.email)
 
 
 @router.post("/verify", response_model=TokenResponse)
 async def verify(req: VerifyRequest, db: AsyncSession = Depends(get_db)):
-    if not otp_verify_limiter.is_allowed(req.email):
+    if not await otp_verify_limiter.is_allowed(req.email):
         raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail="Too many verification attempts")
 
     valid = await verify_otp(db, req.email, req.code)
@@ -0,0 +1,27 @@
+import uuid
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+
+from app.middleware.auth import get_current_user_id
+from app.schemas.leaderboard import LeaderboardEntry, LeaderboardResponse
+from app.services import leaderboard_service
+from app.utils.responses import FastJSONResponse
+
+router = APIRouter(prefix="/leaderboard", tags=["leaderboard"])
+
+
+@router.get("", response_model=LeaderboardResponse)
+async def get_leaderboard(
+    limit: int = Query(10, ge=1, le=leaderboard_service.MAX_TOP),
+    user_id: uuid.UUID = Depends(get_current_user_id),
+):
+    board = leaderboard_service.get_leaderboard()
+    if board is None:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Leaderboard is warming up")
+
+    me = board.rank_of(str(user_id))
+    return FastJSONResponse(LeaderboardResponse(
+        entries=[LeaderboardEntry(**entry) for entry in board.top(limit)],
+        me=LeaderboardEntry(**me) if me else None,
+        total_accounts=len(board),
+    ))
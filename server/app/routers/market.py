@@ -1,25 +1,27 @@
 import asyncio
 import json
 import logging
+import time
+import uuid
 
 import httpx
-from fastapi import APIRouter, Depends, Query, Request
+from fastapi import APIRouter, Depends, Query, Request, Response, status
+from pydantic import TypeAdapter
 from sse_starlette.sse import EventSourceResponse
 
 from app.config import settings
-from app.middleware.auth import get_current_user
-from app.models.user import User
-from app.schemas.market import IndexQuote, MarketStatus, QuoteSnapshot, SymbolSearchResult
-from app.services import finnhub_service
+from app.middleware.auth import get_current_user_id
+from app.schemas.market import IndexQuote, MarketStatus, QuoteSnapshot, StreamAckRequest, SymbolSearchResult
+from app.services import event_service, finnhub_service, latency_service, portfolio_service
+from app.utils.cache import TTLCache
+from app.utils.etag import etag_matches, make_etag, not_modified
+from app.utils.rate_limit import stream_limiter
+from app.utils.timing import measure
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(tags=["market"])
 
-# Track active SSE connections per user to prevent tab-spam resource exhaustion
-_active_streams: dict[str, int] = {}  # user_id -> count
-MAX_STREAMS_PER_USER = 3
-
 # ETF tickers used as proxies for major indices, with scaling factors to
 # convert ETF prices to approximate index values.
 # DIA ≈ DJIA / 100, SPY ≈ S&P 500 / 10 (by ETF design, very stable).
@@ -31,37 +33,77 @@ INDEX_MAP = {
     "IWM":  {"name": "Russell 2000", "factor": 8.7},
 }
 
+# Rendered bodies of the public quote endpoints, shared by every client and
+# keyed by ETag, so they can't go stale; the TTL only bounds memory
+_responses = TTLCache(max_entries=1000, ttl_seconds=max(settings.market_cache_seconds, 1))
+_CACHE_CONTROL = f"public, max-age={settings.market_cache_seconds}"
+_index_list = TypeAdapter(list[IndexQuote])
+_quote_list = TypeAdapter(list[QuoteSnapshot])
+
+
+def _cached_json(request: Request, etag: str, render) -> Response:
+    """304 if the client has etag, else the body from render(), reused across clients."""
+    if etag_matches(request, etag):
+        return not_modified(etag, _CACHE_CONTROL)
+    body = _responses.get(etag)
+    if body is None:
+        with measure("serialize"):
+            body = render()
+        _responses.set(etag, body)
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers={"ETag": etag, "Cache-Control": _CACHE_CONTROL},
+    )
+
+
+def _index_quote(symbol: str, quote: dict) -> IndexQuote:
+    info = INDEX_MAP[symbol]
+    factor = info["factor"]
+    sparkline = finnhub_service.get_sparkline(symbol)
+    prev = sparkline[0] if len(sparkline) > 1 else quote["price"]
+    price = quote["price"] * factor
+    prev_scaled = prev * factor
+    change = price - prev_scaled
+    change_pct = (change / prev_scaled * 100) if prev_scaled else 0
+    return IndexQuote(
+        symbol=symbol,
+        name=info["name"],
+        price=round(price, 2),
+        change=round(change, 2),
+        change_percent=round(change_pct, 2),
+    )
+
 
 @router.get("/market/indices", response_model=list[IndexQuote])
-async def get_indices():
+async def get_indices(request: Request):
+    quotes = {symbol: finnhub_service.get_quote(symbol) for symbol in INDEX_MAP}
+    if all(quotes.values()):
+        etag = make_etag("indices", [finnhub_service.get_version(symbol) for symbol in INDEX_MAP])
+        return _cached_json(
+            request,
+            etag,
+            lambda: _index_list.dump_json([_index_quote(symbol, quote) for symbol, quote in quotes.items()]),
+        )
+
+    # Some aren't streaming yet; not cached since the fallback reads vary
     results = []
     for symbol, info in INDEX_MAP.items():
         name = info["name"]
         factor = info["factor"]
-        quote = finnhub_service.get_quote(symbol)
+        quote = quotes[symbol]
         if quote:
-            sparkline = finnhub_service.get_sparkline(symbol)
-            prev = sparkline[0] if len(sparkline) > 1 else quote["price"]
-            price = quote["price"] * factor
-            prev_scaled = prev * factor
-            change = price - prev_scaled
-            change_pct = (change / prev_scaled * 100) if prev_scaled else 0
-            results.append(IndexQuote(
-                symbol=symbol,
-                name=name,
-                price=round(price, 2),
-                change=round(change, 2),
-                change_percent=round(change_pct, 2),
-            ))
+            results.append(_index_quote(symbol, quote))
         else:
             # Try Finnhub REST as fallback
             try:
                 async with httpx.AsyncClient() as client:
-                    resp = await client.get(
-                        "https://finnhub.io/api/v1/quote",
-                        params={"symbol": symbol, "token": settings.finnhub_api_key},
-                        timeout=5,
-                    )
+                    with measure("http"):
+                        resp = await client.get(
+                            "https://finnhub.io/api/v1/quote",
+                            params={"symbol": symbol, "token": settings.finnhub_api_key},
+                            timeout=5,
+                        )
                     if resp.status_code == 200:
                         data = resp.json()
                         price = data.get("c", 0) * factor
@@ -91,11 +133,12 @@ async def get_market_status():
         return MarketStatus(is_open=570 <= total_mins < 960)
     try:
         async with httpx.AsyncClient() as client:
-            resp = await client.get(
-                "https://finnhub.io/api/v1/stock/market-status",
-                params={"exchange": "US", "token": settings.finnhub_api_key},
-                timeout=5,
-            )
+            with measure("http"):
+                resp = await client.get(
+                    "https://finnhub.io/api/v1/stock/market-status",
+                    params={"exchange": "US", "token": settings.finnhub_api_key},
+                    timeout=5,
+                )
             if resp.status_code == 200:
                 data = resp.json()
                 return MarketStatus(
@@ -108,37 +151,66 @@ async def get_market_status():
 
 
 @router.get("/quotes/latest", response_model=list[QuoteSnapshot])
-async def get_latest_quotes(symbols: str = Query(...)):
+async def get_latest_quotes(request: Request, symbols: str = Query(...)):
     symbol_list = [s.strip().upper() for s in symbols.split(",") if s.strip()]
-    results = []
-    for symbol in symbol_list:
-        quote = finnhub_service.get_quote(symbol)
-        sparkline = finnhub_service.get_sparkline(symbol)
-        if quote:
-            results.append(QuoteSnapshot(
-                symbol=symbol,
-                price=quote["price"],
-                volume=quote.get("volume", 0),
-                timestamp=quote.get("timestamp", 0),
-                sparkline=sparkline,
-            ))
-    return results
+
+    def render() -> bytes:
+        results = []
+        for symbol in symbol_list:
+            snapshot = finnhub_service.get_snapshot(symbol)
+            if snapshot:
+                results.append(QuoteSnapshot(**snapshot))
+        return _quote_list.dump_json(results)
+
+    etag = make_etag("quotes", [(symbol, finnhub_service.get_version(symbol)) for symbol in symbol_list])
+    return _cached_json(request, etag, render)
+
+
+@router.get("/quotes/snapshot", response_class=Response)
+async def get_quote_snapshot(
+    symbols: str | None = Query(None, description="Comma-separated; all symbols if omitted"),
+    since_version: int = Query(0, ge=0),
+    epoch: str | None = Query(None),
+):
+    """Latest quotes as one packed columnar payload, for bulk consumers.
+
+    The layout is documented on QuoteColumns. To fetch only what changed,
+    pass the previous response's X-Quote-Version as since_version and
+    X-Quote-Epoch as epoch; versions are per worker, so the full set comes
+    back whenever the epoch doesn't match.
+    """
+    columns = finnhub_service.quote_columns
+    if epoch != columns.epoch:
+        since_version = 0
+    symbol_list = None
+    if symbols:
+        symbol_list = [s.strip().upper() for s in symbols.split(",") if s.strip()]
+    return Response(
+        content=columns.snapshot(symbol_list, since_version),
+        media_type="application/octet-stream",
+        headers={
+            "X-Quote-Epoch": columns.epoch,
+            "X-Quote-Version": str(columns.version),
+            "Cache-Control": "no-store",
+        },
+    )
 
 
 @router.get("/search", response_model=list[SymbolSearchResult])
 async def search_symbols(
     q: str = Query(..., min_length=1),
-    _user: User = Depends(get_current_user),
+    _user_id: uuid.UUID = Depends(get_current_user_id),
 ):
     if not settings.finnhub_api_key or settings.finnhub_api_key == "your_finnhub_api_key_here":
         return []
     try:
         async with httpx.AsyncClient() as client:
-            resp = await client.get(
-                "https://finnhub.io/api/v1/search",
-                params={"q": q, "token": settings.finnhub_api_key},
-                timeout=5,
-            )
+            with measure("http"):
+                resp = await client.get(
+                    "https://finnhub.io/api/v1/search",
+                    params={"q": q, "token": settings.finnhub_api_key},
+                    timeout=5,
+                )
             if resp.status_code == 200:
                 data = resp.json()
                 return [
@@ -159,37 +231,56 @@ async def stream_quotes(
     request: Request,
     symbols: str = Query(...),
     token: str = Query(...),
+    portfolio: bool = Query(False),
+    ack: bool = Query(False),
 ):
     # Validate token
-    from app.services.auth_service import decode_token
-    payload = decode_token(token)
-    if not payload or payload.get("type") != "access":
+    from app.services.auth_service import decode_access_token
+    payload = decode_access_token(token)
+    if not payload:
         from fastapi import HTTPException, status
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
 
     user_id = payload.get("sub", "unknown")
 
-    # Enforce per-user SSE connection limit
-    if _active_streams.get(user_id, 0) >= MAX_STREAMS_PER_USER:
+    # Enforce per-user SSE connection limit to prevent tab-spam resource exhaustion
+    lease = await stream_limiter.acquire(user_id)
+    if lease is None:
         from fastapi import HTTPException, status
         raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail="Too many open streams")
 
     symbol_list = [s.strip().upper() for s in symbols.split(",") if s.strip()]
 
     # Auto-subscribe any symbols not already tracked (e.g. watchlist items after restart)
-    for sym in symbol_list:
-        if not finnhub_service.get_quote(sym):
-            await finnhub_service.subscribe(sym)
+    try:
+        for sym in symbol_list:
+            if not finnhub_service.get_quote(sym):
+                await finnhub_service.subscribe(sym)
+    except BaseException:
+        await stream_limiter.release(user_id, lease)
+        raise
 
     async def event_generator():
-        _active_streams[user_id] = _active_streams.get(user_id, 0) + 1
+        # Per-user events (e.g. triggered alerts) pushed by any worker
+        events = event_service.subscribe_user(user_id)
+        live_portfolio = None
         try:
+            # Portfolio valued at live prices, resent whenever a held symbol ticks
+            # or a trade changes it
+            if portfolio:
+                live_portfolio = await portfolio_service.open_live_portfolio(user_id)
+                portfolio_version = live_portfolio.version
+                yield {"event": "portfolio", "data": live_portfolio.response().model_dump_json()}
+
             # Send initial snapshot
             snapshots = []
+            last_prices: dict[str, float] = {}
             for symbol in symbol_list:
                 quote = finnhub_service.get_quote(symbol)
                 sparkline = finnhub_service.get_sparkline(symbol)
                 if quote:
+                    # Updates then start from here, so the snapshot isn't resent
+                    last_prices[symbol] = quote["price"]
                     snapshots.append({
                         "symbol": symbol,
                         "price": quote["price"],
@@ -200,12 +291,18 @@ async def stream_quotes(
             yield {"event": "snapshot", "data": json.dumps(snapshots)}
 
             # Stream updates
-            last_prices: dict[str, float] = {}
             heartbeat_counter = 0
+            lease_counter = 0
             while True:
                 if await request.is_disconnected():
                     break
 
+                # Keep the stream's slot alive (~every 20s) so it outlasts the lease
+                lease_counter += 1
+                if lease_counter >= 40:
+                    await stream_limiter.refresh(user_id, lease)
+                    lease_counter = 0
+
                 updates = []
                 for symbol in symbol_list:
                     quote = finnhub_service.get_quote(symbol)
@@ -219,11 +316,31 @@ async def stream_quotes(
                                 "price": price,
                                 "volume": quote.get("volume", 0),
                                 "timestamp": quote.get("timestamp", 0),
+                                "received_at": int(quote.get("received_at", 0) * 1000),
                                 "sparkline": sparkline,
                             })
 
+                while not events.empty():
+                    event = events.get_nowait()
+                    yield {"event": event["event"], "data": json.dumps(event["data"])}
+                    heartbeat_counter = 0
+
                 if updates:
-                    yield {"event": "quote", "data": json.dumps(updates)}
+                    sent_at = time.time()
+                    for update in updates:
+                        if update["received_at"]:
+                            latency_service.record("quote", "queue", sent_at - update["received_at"] / 1000)
+                    event = {"event": "quote", "data": json.dumps(updates)}
+                    if ack:
+                        # The client acks shown updates by this id (POST /stream/ack)
+                        event["id"] = str(int(sent_at * 1000))
+                    yield event
+                    latency_service.record("quote", "write", time.time() - sent_at)
+                    heartbeat_counter = 0
+
+                if live_portfolio is not None and live_portfolio.version != portfolio_version:
+                    portfolio_version = live_portfolio.version
+                    yield {"event": "portfolio", "data": live_portfolio.response().model_dump_json()}
                     heartbeat_counter = 0
                 else:
                     heartbeat_counter += 1
@@ -235,8 +352,18 @@ async def stream_quotes(
 
                 await asyncio.sleep(0.5)
         finally:
-            _active_streams[user_id] = max(_active_streams.get(user_id, 1) - 1, 0)
-            if _active_streams[user_id] == 0:
-                del _active_streams[user_id]
+            if live_portfolio is not None:
+                portfolio_service.close_live_portfolio(user_id)
+            event_service.unsubscribe_user(user_id, events)
+            await stream_limiter.release(user_id, lease)
 
     return EventSourceResponse(event_generator())
+
+
+@router.post("/stream/ack", status_code=status.HTTP_204_NO_CONTENT)
+async def ack_stream_events(
+    req: StreamAckRequest,
+    _user_id: uuid.UUID = Depends(get_current_user_id),
+):
+    """Round trip of quote events the client has displayed, for tick-to-screen latency."""
+    latency_service.record_round_trips("quote", [sent / 1000 for sent in req.sent_at], time.time())
@@ -0,0 +1,78 @@
+import uuid
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_db
+from app.middleware.auth import get_current_user_id, get_read_db
+from app.models.order import Order
+from app.schemas.order import OrderListResponse, OrderRequest, OrderResponse
+from app.services import event_service, order_service
+from app.utils.responses import FastJSONResponse
+
+router = APIRouter(prefix="/orders", tags=["orders"])
+
+
+def _order_response(order: Order) -> OrderResponse:
+    return OrderResponse(
+        id=str(order.id),
+        symbol=order.symbol,
+        side=order.side,
+        order_type=order.order_type,
+        quantity=order.quantity,
+        price=order.price,
+        status=order.status,
+        reject_reason=order.reject_reason,
+        trade_id=str(order.trade_id) if order.trade_id else None,
+        created_at=str(order.created_at),
+        filled_at=str(order.filled_at) if order.filled_at else None,
+    )
+
+
+@router.post("", response_model=OrderResponse, status_code=status.HTTP_201_CREATED)
+async def create_order(
+    req: OrderRequest,
+    user_id: uuid.UUID = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db),
+):
+    order = Order(
+        user_id=user_id,
+        symbol=req.symbol.upper(),
+        side=req.side,
+        order_type=req.order_type,
+        quantity=req.quantity,
+        price=req.price,
+        status="OPEN",
+    )
+    db.add(order)
+    await event_service.user_wrote(user_id, db)
+    await db.commit()
+    await db.refresh(order)
+
+    await order_service.open_order(order)
+
+    return _order_response(order)
+
+
+@router.get("", response_model=OrderListResponse)
+async def list_orders(
+    order_status: str | None = Query(None, alias="status", pattern="^(OPEN|FILLED|CANCELLED|REJECTED)$"),
+    user_id: uuid.UUID = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_read_db),
+):
+    query = select(Order).where(Order.user_id == user_id)
+    if order_status:
+        query = query.where(Order.status == order_status)
+    result = await db.execute(query.order_by(Order.created_at.desc()).limit(100))
+    return FastJSONResponse(OrderListResponse(orders=[_order_response(o) for o in result.scalars().all()]))
+
+
+@router.delete("/{order_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def cancel_order(
+    order_id: uuid.UUID,
+    user_id: uuid.UUID = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db),
+):
+    if not await order_service.cancel_order(db, user_id, order_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No open order with that id")
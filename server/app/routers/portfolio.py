@@ -1,18 +1,54 @@
-from fastapi import APIRouter, Depends
+import uuid
+
+from fastapi import APIRouter, Depends, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
-from app.middleware.auth import get_current_user
+from app.middleware.auth import get_current_user, get_current_user_id, get_read_db
 from app.models.user import User
-from app.schemas.portfolio import PortfolioResponse
-from app.services.portfolio_service import get_portfolio
+from app.schemas.portfolio import PortfolioAnalyticsResponse, PortfolioHistoryPoint, PortfolioHistoryResponse, PortfolioResponse
+from app.services.analytics_service import get_analytics
+from app.services.portfolio_service import get_portfolio, get_portfolio_version
+from app.services.snapshot_service import get_history
+from app.utils.etag import etag_matches, make_etag, not_modified
+from app.utils.responses import FastJSONResponse
 
 router = APIRouter(prefix="/portfolio", tags=["portfolio"])
 
 
 @router.get("", response_model=PortfolioResponse)
 async def portfolio(
+    request: Request,
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    etag = make_etag("portfolio", user.id, await get_portfolio_version(db, user))
+    if etag_matches(request, etag):
+        return not_modified(etag, "private, no-cache")
+    return FastJSONResponse(
+        await get_portfolio(db, user),
+        headers={"ETag": etag, "Cache-Control": "private, no-cache"},
+    )
+
+
+@router.get("/history", response_model=PortfolioHistoryResponse)
+async def portfolio_history(
+    range_name: str = Query("1m", alias="range", pattern="^(1d|1w|1m|3m|1y|all)$"),
+    points: int = Query(500, ge=3, le=2000),
+    user_id: uuid.UUID = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_read_db),
+):
+    resolution, series = await get_history(db, user_id, range_name, points)
+    return FastJSONResponse(PortfolioHistoryResponse(
+        range=range_name,
+        resolution_seconds=resolution,
+        points=[PortfolioHistoryPoint(t=taken_at.isoformat(), value=value) for taken_at, value in series],
+    ))
+
+
+@router.get("/analytics", response_model=PortfolioAnalyticsResponse)
+async def portfolio_analytics(
     user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    return await get_portfolio(db, user)
+    return await get_analytics(db, user)
@@ -1,16 +1,32 @@
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy import func, select
+import csv
+import io
+import json
+import uuid
+import zlib
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
-from app.middleware.auth import get_current_user
-from app.models.trade import Trade
+from app.middleware.auth import get_current_user, get_current_user_id, get_read_db
 from app.models.user import User
-from app.schemas.trade import TradeHistoryResponse, TradeRequest, TradeResponse
-from app.services.trade_service import execute_trade
+from app.schemas.trade import (
+    BatchTradeRequest,
+    BatchTradeResponse,
+    BatchTradeResult,
+    TradeHistoryResponse,
+    TradeRequest,
+    TradeResponse,
+)
+from app.services.trade_service import count_trades, execute_trade, execute_trade_batch, list_trades, stream_trades
+from app.utils.pagination import decode_cursor, encode_cursor
+from app.utils.responses import FastJSONResponse
 
 router = APIRouter(prefix="/trades", tags=["trades"])
 
+EXPORT_COLUMNS = ["id", "symbol", "side", "quantity", "price", "total", "executed_at"]
+
 
 @router.post("", response_model=TradeResponse)
 async def create_trade(
@@ -30,28 +46,63 @@ async def create_trade(
     )
 
 
-@router.get("", response_model=TradeHistoryResponse)
-async def get_trade_history(
-    page: int = Query(1, ge=1),
-    page_size: int = Query(20, ge=1, le=100),
+@router.post("/batch", response_model=BatchTradeResponse)
+async def create_trade_batch(
+    req: BatchTradeRequest,
     user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    count_result = await db.execute(
-        select(func.count()).select_from(Trade).where(Trade.user_id == user.id)
-    )
-    total = count_result.scalar() or 0
-
-    result = await db.execute(
-        select(Trade)
-        .where(Trade.user_id == user.id)
-        .order_by(Trade.executed_at.desc())
-        .offset((page - 1) * page_size)
-        .limit(page_size)
+    results, cash_balance = await execute_trade_batch(
+        db,
+        user,
+        [(order.symbol, order.side, order.quantity) for order in req.orders],
+        atomic=req.mode == "all_or_nothing",
     )
-    trades = result.scalars().all()
+    return FastJSONResponse(BatchTradeResponse(
+        results=[
+            BatchTradeResult(
+                index=i,
+                status=result_status,
+                trade=TradeResponse(
+                    id=str(trade.id),
+                    symbol=trade.symbol,
+                    side=trade.side,
+                    quantity=trade.quantity,
+                    price=trade.price,
+                    total=trade.total,
+                    executed_at=str(trade.executed_at),
+                ) if trade else None,
+                error=error,
+            )
+            for i, (result_status, trade, error) in enumerate(results)
+        ],
+        filled=sum(1 for result_status, _, _ in results if result_status == "filled"),
+        cash_balance=round(cash_balance, 2),
+    ))
+
+
+@router.get("", response_model=TradeHistoryResponse)
+async def get_trade_history(
+    cursor: str | None = Query(None),
+    page_size: int = Query(20, ge=1, le=100),
+    include_total: bool = Query(False),
+    user_id: uuid.UUID = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_read_db),
+):
+    before = None
+    if cursor:
+        before = decode_cursor(cursor)
+        if before is None:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+    # Fetch one extra row to learn whether there's a next page
+    trades = await list_trades(db, user_id, page_size + 1, before)
+    next_cursor = None
+    if len(trades) > page_size:
+        trades = trades[:page_size]
+        next_cursor = encode_cursor(trades[-1].executed_at, trades[-1].id)
 
-    return TradeHistoryResponse(
+    return FastJSONResponse(TradeHistoryResponse(
         trades=[
             TradeResponse(
                 id=str(t.id),
@@ -64,7 +115,54 @@ async def get_trade_history(
             )
             for t in trades
         ],
-        total=total,
-        page=page,
+        next_cursor=next_cursor,
+        total=await count_trades(user_id) if include_total else None,
         page_size=page_size,
-    )
+    ))
+
+
+async def _csv_chunks(batches):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    async for rows in batches:
+        writer.writerows(rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+async def _ndjson_chunks(batches):
+    async for rows in batches:
+        yield "".join(json.dumps(dict(zip(EXPORT_COLUMNS, row)), default=str) + "\n" for row in rows)
+
+
+async def _gzip_chunks(chunks):
+    compressor = zlib.compressobj(wbits=31)  # gzip container
+    async for chunk in chunks:
+        data = compressor.compress(chunk.encode())
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+@router.get("/export")
+async def export_trades(
+    export_format: str = Query("csv", alias="format", pattern="^(csv|ndjson)$"),
+    gzip: bool = Query(False),
+    user_id: uuid.UUID = Depends(get_current_user_id),
+):
+    """Stream the full trade history, one cursor batch at a time."""
+    batches = stream_trades(user_id)
+    if export_format == "csv":
+        chunks, media_type = _csv_chunks(batches), "text/csv"
+    else:
+        chunks, media_type = _ndjson_chunks(batches), "application/x-ndjson"
+
+    headers = {"Content-Disposition": f'attachment; filename="trades.{export_format}"'}
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+        return StreamingResponse(_gzip_chunks(chunks), media_type=media_type, headers=headers)
+    return StreamingResponse(chunks, media_type=media_type, headers=headers)
@@ -1,29 +1,64 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import asyncio
+import uuid
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
-from app.middleware.auth import get_current_user
+from app.middleware.auth import get_current_user, get_current_user_id, get_read_db
 from app.models.user import User
 from app.models.watchlist import Watchlist
-from app.schemas.watchlist import WatchlistAddRequest, WatchlistItem, WatchlistResponse
-from app.services import finnhub_service
+from app.schemas.market import QuoteSnapshot
+from app.schemas.watchlist import (
+    WatchlistAddRequest,
+    WatchlistBulkAddResponse,
+    WatchlistBulkRemoveResponse,
+    WatchlistBulkRequest,
+    WatchlistItem,
+    WatchlistResponse,
+)
+from app.services import event_service, finnhub_service
+from app.utils.responses import FastJSONResponse
 
 router = APIRouter(prefix="/watchlist", tags=["watchlist"])
 
 
+def _normalize(symbols: list[str]) -> list[str]:
+    """Uppercased and deduplicated, keeping the order given."""
+    return list(dict.fromkeys(s.strip().upper() for s in symbols if s.strip()))
+
+
+def _insert(user: User, symbols: list[str]):
+    # One statement however many symbols; ones already watched are skipped
+    return (
+        insert(Watchlist)
+        .values([{"user_id": user.id, "symbol": symbol} for symbol in symbols])
+        .on_conflict_do_nothing(constraint="uq_watchlist_user_symbol")
+        .returning(Watchlist.symbol, Watchlist.added_at)
+    )
+
+
 @router.get("", response_model=WatchlistResponse)
 async def get_watchlist(
-    user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
+    include: str | None = Query(None, pattern="^quotes$"),
+    user_id: uuid.UUID = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_read_db),
 ):
     result = await db.execute(
-        select(Watchlist).where(Watchlist.user_id == user.id).order_by(Watchlist.added_at.desc())
-    )
-    items = result.scalars().all()
-    return WatchlistResponse(
-        items=[WatchlistItem(symbol=w.symbol, added_at=str(w.added_at)) for w in items]
+        select(Watchlist.symbol, Watchlist.added_at)
+        .where(Watchlist.user_id == user_id)
+        .order_by(Watchlist.added_at.desc())
     )
+    items = []
+    for symbol, added_at in result.all():
+        item = WatchlistItem(symbol=symbol, added_at=str(added_at))
+        if include == "quotes":
+            snapshot = finnhub_service.get_snapshot(symbol)
+            item.quote = QuoteSnapshot(**snapshot) if snapshot else None
+        items.append(item)
+    return FastJSONResponse(WatchlistResponse(items=items))
 
 
 @router.post("", response_model=WatchlistItem, status_code=status.HTTP_201_CREATED)
@@ -34,20 +69,62 @@ async def add_to_watchlist(
 ):
     symbol = req.symbol.upper()
 
-    existing = await db.execute(
-        select(Watchlist).where(Watchlist.user_id == user.id, Watchlist.symbol == symbol)
-    )
-    if existing.scalar_one_or_none():
+    row = (await db.execute(_insert(user, [symbol]))).first()
+    if row is None:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Symbol already in watchlist")
-
-    entry = Watchlist(user_id=user.id, symbol=symbol)
-    db.add(entry)
+    await event_service.user_wrote(user.id, db)
     await db.commit()
-    await db.refresh(entry)
 
     await finnhub_service.subscribe(symbol)
 
-    return WatchlistItem(symbol=entry.symbol, added_at=str(entry.added_at))
+    return WatchlistItem(symbol=row.symbol, added_at=str(row.added_at))
+
+
+@router.post("/bulk", response_model=WatchlistBulkAddResponse, status_code=status.HTTP_201_CREATED)
+async def add_many_to_watchlist(
+    req: WatchlistBulkRequest,
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    symbols = _normalize(req.symbols)
+    if not symbols:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No symbols given")
+
+    rows = (await db.execute(_insert(user, symbols))).all()
+    await event_service.user_wrote(user.id, db)
+    await db.commit()
+
+    # New symbols are seeded over REST one request each, so do them concurrently
+    await asyncio.gather(*(finnhub_service.subscribe(row.symbol) for row in rows))
+
+    added = {row.symbol: row.added_at for row in rows}
+    return WatchlistBulkAddResponse(
+        added=[WatchlistItem(symbol=symbol, added_at=str(added[symbol])) for symbol in symbols if symbol in added],
+        existing=[symbol for symbol in symbols if symbol not in added],
+    )
+
+
+@router.delete("", response_model=WatchlistBulkRemoveResponse)
+async def remove_many_from_watchlist(
+    symbols: str = Query(..., description="Comma-separated symbols"),
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    symbol_list = _normalize(symbols.split(","))
+    if not symbol_list:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No symbols given")
+    if len(symbol_list) > 100:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="At most 100 symbols at a time")
+
+    result = await db.execute(
+        delete(Watchlist)
+        .where(Watchlist.user_id == user.id, Watchlist.symbol.in_(symbol_list))
+        .returning(Watchlist.symbol)
+    )
+    removed = set(result.scalars().all())
+    await event_service.user_wrote(user.id, db)
+    await db.commit()
+    return WatchlistBulkRemoveResponse(removed=[symbol for symbol in symbol_list if symbol in removed])
 
 
 @router.delete("/{symbol}", status_code=status.HTTP_204_NO_CONTENT)
@@ -62,4 +139,5 @@ async def remove_from_watchlist(
     )
     if result.rowcount == 0:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Symbol not in watchlist")
+    await event_service.user_wrote(user.id, db)
     await db.commit()
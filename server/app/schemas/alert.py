@@ -0,0 +1,23 @@
+from pydantic import BaseModel, Field
+
+
+class AlertRequest(BaseModel):
+    symbol: str
+    condition: str = Field(..., pattern="^(ABOVE|BELOW|PCT_MOVE)$")
+    threshold: float = Field(..., gt=0)  # price, or percent move for PCT_MOVE
+
+
+class AlertResponse(BaseModel):
+    id: str
+    symbol: str
+    condition: str
+    threshold: float
+    reference_price: float | None = None
+    status: str
+    triggered_price: float | None = None
+    created_at: str
+    triggered_at: str | None = None
+
+
+class AlertListResponse(BaseModel):
+    alerts: list[AlertResponse]
@@ -0,0 +1,15 @@
+from pydantic import BaseModel
+
+
+class LeaderboardEntry(BaseModel):
+    rank: int
+    name: str
+    total_value: float
+    total_return: float
+    total_return_percent: float
+
+
+class LeaderboardResponse(BaseModel):
+    entries: list[LeaderboardEntry]
+    me: LeaderboardEntry | None = None  # None until the account's first trade is picked up
+    total_accounts: int
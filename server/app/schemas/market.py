@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class IndexQuote(BaseModel):
@@ -26,3 +26,7 @@ class SymbolSearchResult(BaseModel):
 class MarketStatus(BaseModel):
     is_open: bool
     holiday: str | None = None
+
+
+class StreamAckRequest(BaseModel):
+    sent_at: list[int] = Field(..., max_length=100)  # ids (send times, epoch ms) of quote events shown
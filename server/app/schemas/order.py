@@ -0,0 +1,27 @@
+from pydantic import BaseModel, Field
+
+
+class OrderRequest(BaseModel):
+    symbol: str
+    side: str = Field(..., pattern="^(BUY|SELL)$")
+    order_type: str = Field(..., pattern="^(LIMIT|STOP)$")
+    quantity: int = Field(..., gt=0)
+    price: float = Field(..., gt=0)
+
+
+class OrderResponse(BaseModel):
+    id: str
+    symbol: str
+    side: str
+    order_type: str
+    quantity: int
+    price: float
+    status: str
+    reject_reason: str | None = None
+    trade_id: str | None = None
+    created_at: str
+    filled_at: str | None = None
+
+
+class OrderListResponse(BaseModel):
+    orders: list[OrderResponse]
@@ -24,3 +24,32 @@ class PortfolioSummary(BaseModel):
 class PortfolioResponse(BaseModel):
     summary: PortfolioSummary
     positions: list[PositionResponse]
+
+
+class PortfolioHistoryPoint(BaseModel):
+    t: str
+    value: float
+
+
+class PortfolioHistoryResponse(BaseModel):
+    range: str
+    resolution_seconds: int  # 0 for raw snapshots
+    points: list[PortfolioHistoryPoint]
+
+
+class SymbolAnalytics(BaseModel):
+    symbol: str
+    realized_pnl: float
+    closed_trades: int
+    win_rate: float | None = None
+
+
+class PortfolioAnalyticsResponse(BaseModel):
+    trade_count: int
+    closed_trades: int  # sells, each matched FIFO against earlier buys
+    win_rate: float | None = None  # percent of sells with a realized gain
+    avg_hold_seconds: int | None = None  # share-weighted
+    realized_pnl: float
+    max_drawdown_percent: float
+    sharpe_ratio: float | None = None  # annualized, from daily equity at trade prices
+    symbols: list[SymbolAnalytics]
@@ -19,6 +19,24 @@ class TradeResponse(BaseModel):
 
 class TradeHistoryResponse(BaseModel):
     trades: list[TradeResponse]
-    total: int
-    page: int
+    next_cursor: str | None = None  # pass as ?cursor= for the next page; None on the last page
+    total: int | None = None  # only when requested with include_total
     page_size: int
+
+
+class BatchTradeRequest(BaseModel):
+    orders: list[TradeRequest] = Field(..., min_length=1, max_length=1000)
+    mode: str = Field("all_or_nothing", pattern="^(all_or_nothing|best_effort)$")
+
+
+class BatchTradeResult(BaseModel):
+    index: int
+    status: str  # filled, rejected, or cancelled (not applied because the all-or-nothing batch failed)
+    trade: TradeResponse | None = None
+    error: str | None = None
+
+
+class BatchTradeResponse(BaseModel):
+    results: list[BatchTradeResult]
+    filled: int
+    cash_balance: float
@@ -1,16 +1,32 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+
+from app.schemas.market import QuoteSnapshot
 
 
 class WatchlistAddRequest(BaseModel):
     symbol: str
 
 
+class WatchlistBulkRequest(BaseModel):
+    symbols: list[str] = Field(..., min_length=1, max_length=100)
+
+
 class WatchlistItem(BaseModel):
     symbol: str
     added_at: str
+    quote: QuoteSnapshot | None = None  # only with ?include=quotes, and once the symbol has a price
 
     model_config = {"from_attributes": True}
 
 
 class WatchlistResponse(BaseModel):
     items: list[WatchlistItem]
+
+
+class WatchlistBulkAddResponse(BaseModel):
+    added: list[WatchlistItem]
+    existing: list[str]  # already in the watchlist, left as they were
+
+
+class WatchlistBulkRemoveResponse(BaseModel):
+    removed: list[str]
@@ -0,0 +1,110 @@
+import logging
+import uuid
+
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import AsyncSessionLocal
+from app.models.alert import Alert
+from app.services import event_service
+from app.services.trigger_book import TriggerBook
+
+logger = logging.getLogger(__name__)
+
+
+def _levels(alert: dict) -> list[tuple[float, str]]:
+    if alert["condition"] == "ABOVE":
+        return [(alert["threshold"], "above")]
+    if alert["condition"] == "BELOW":
+        return [(alert["threshold"], "below")]
+    # PCT_MOVE fires on a move of threshold percent either way
+    move = alert["reference_price"] * alert["threshold"] / 100
+    return [(alert["reference_price"] + move, "above"), (alert["reference_price"] - move, "below")]
+
+
+def _item(alert: Alert) -> dict:
+    return {
+        "id": alert.id,
+        "user_id": alert.user_id,
+        "symbol": alert.symbol,
+        "condition": alert.condition,
+        "threshold": alert.threshold,
+        "reference_price": alert.reference_price,
+    }
+
+
+async def _load(alert_id: uuid.UUID) -> dict | None:
+    async with AsyncSessionLocal() as db:
+        alert = await db.get(Alert, alert_id)
+    return _item(alert) if alert is not None and alert.status == "ACTIVE" else None
+
+
+async def open_alert(alert: Alert):
+    """Start watching a newly created alert, on this worker and the others."""
+    await _book.open(_item(alert))
+
+
+async def _trigger(alert: dict, price: float):
+    async with AsyncSessionLocal() as db:
+        # Only the worker that flips the status notifies, so an alert held in
+        # several workers' books fires once
+        result = await db.execute(
+            update(Alert)
+            .where(Alert.id == alert["id"], Alert.status == "ACTIVE")
+            .values(status="TRIGGERED", triggered_price=price, triggered_at=func.now())
+            .returning(Alert.triggered_at)
+            .execution_options(synchronize_session=False)
+        )
+        triggered_at = result.scalar_one_or_none()
+        await db.commit()
+    if triggered_at is None:
+        return
+    # Drop it from the other workers' books
+    await _book.close(alert["id"])
+
+    await event_service.publish_user_event(str(alert["user_id"]), "alert", {
+        "id": str(alert["id"]),
+        "symbol": alert["symbol"],
+        "condition": alert["condition"],
+        "threshold": alert["threshold"],
+        "price": price,
+        "triggered_at": triggered_at.isoformat(),
+    })
+    logger.info(f"Triggered alert {alert['id']} ({alert['symbol']} {alert['condition']} {alert['threshold']})")
+
+
+async def cancel_alert(db: AsyncSession, user_id: uuid.UUID, alert_id: uuid.UUID) -> bool:
+    result = await db.execute(
+        update(Alert)
+        .where(Alert.id == alert_id, Alert.user_id == user_id, Alert.status == "ACTIVE")
+        .values(status="CANCELLED")
+        .returning(Alert.id)
+        .execution_options(synchronize_session=False)
+    )
+    cancelled = result.first() is not None
+    if cancelled:
+        await event_service.user_wrote(user_id, db)
+    await db.commit()
+    if cancelled:
+        await _book.close(alert_id)
+    return cancelled
+
+
+# Active alerts, indexed by the price level(s) that trigger them
+_book = TriggerBook("alert", _levels, _trigger, _load)
+
+
+async def start():
+    async with AsyncSessionLocal() as db:
+        # Plain rows rather than ORM objects: there can be a great many
+        result = await db.execute(
+            select(Alert.id, Alert.user_id, Alert.symbol, Alert.condition, Alert.threshold, Alert.reference_price)
+            .where(Alert.status == "ACTIVE")
+        )
+        alerts = result.all()
+    count = await _book.start(_item(alert) for alert in alerts)
+    logger.info(f"Alert engine started with {count} active alerts")
+
+
+async def stop():
+    await _book.stop()
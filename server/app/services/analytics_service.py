@@ -0,0 +1,164 @@
+import math
+import uuid
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.user import User
+from app.services import event_service
+from app.utils.cache import TTLCache
+
+TRADING_DAYS = 252
+
+# Per-user analytics, dropped when the user next trades on any worker
+_cache = TTLCache(max_entries=1000, ttl_seconds=3600)
+
+# The whole ledger as one row of arrays, oldest first, straight off the
+# covering history index
+_LOAD_TRADES = text("""
+    SELECT array_agg(symbol ORDER BY executed_at, id),
+           array_agg(side = 'BUY' ORDER BY executed_at, id),
+           array_agg(quantity ORDER BY executed_at, id),
+           array_agg(price ORDER BY executed_at, id),
+           array_agg(extract(epoch FROM executed_at)::float8 ORDER BY executed_at, id)
+    FROM trades
+    WHERE user_id = :user_id
+""")
+
+
+def compute_analytics(
+    starting_balance: float,
+    symbols: np.ndarray,
+    is_buy: np.ndarray,
+    quantity: np.ndarray,
+    price: np.ndarray,
+    executed_at: np.ndarray,
+) -> dict:
+    """Replay a time-ordered trade ledger into performance statistics.
+
+    Sells are matched to earlier buys of the same symbol first in, first out.
+    Instead of walking lots, each symbol's buys are laid out as cumulative
+    functions of shares bought (cost, and buy time). A sell covers one share
+    interval of that axis, so its matched cost and holding time are two
+    np.interp lookups each.
+
+    Equity after each trade marks every holding at the last price it traded
+    at, so max drawdown and Sharpe reflect the ledger only, not market moves
+    between trades.
+    """
+    n = len(quantity)
+    quantity = quantity.astype(np.float64)
+    signed = np.where(is_buy, quantity, -quantity)
+    cash_flow = -signed * price
+    market_delta = np.zeros(n)
+
+    names, codes = np.unique(symbols, return_inverse=True)
+    by_symbol = []
+    sell_pnl = []
+    held_shares = 0.0
+    held_seconds = 0.0
+    for code, symbol in enumerate(names):
+        idx = np.flatnonzero(codes == code)
+
+        # Change in this symbol's marked value at each of its trades
+        holding = np.cumsum(signed[idx])
+        previous_holding = holding - signed[idx]
+        previous_price = np.concatenate([[0.0], price[idx][:-1]])
+        market_delta[idx] = holding * price[idx] - previous_holding * previous_price
+
+        buys = idx[is_buy[idx]]
+        sells = idx[~is_buy[idx]]
+        bought = np.concatenate([[0.0], np.cumsum(quantity[buys])])
+        cost = np.concatenate([[0.0], np.cumsum(quantity[buys] * price[buys])])
+        bought_at = np.concatenate([[0.0], np.cumsum(quantity[buys] * executed_at[buys])])
+
+        # Each sell covers shares (sold_from, sold_to] of everything bought so far
+        sold_to = np.cumsum(quantity[sells])
+        sold_from = np.minimum(sold_to - quantity[sells], bought[-1])
+        sold_to = np.minimum(sold_to, bought[-1])
+        matched = sold_to - sold_from
+
+        matched_cost = np.interp(sold_to, bought, cost) - np.interp(sold_from, bought, cost)
+        realized = matched * price[sells] - matched_cost
+        matched_since = np.interp(sold_to, bought, bought_at) - np.interp(sold_from, bought, bought_at)
+        held_seconds += float(np.sum(matched * executed_at[sells] - matched_since))
+        held_shares += float(np.sum(matched))
+
+        sell_pnl.append(realized)
+        by_symbol.append({
+            "symbol": str(symbol),
+            "realized_pnl": round(float(np.sum(realized)), 2),
+            "closed_trades": len(sells),
+            "win_rate": round(float(np.mean(realized > 0)) * 100, 2) if len(sells) else None,
+        })
+
+    realized = np.concatenate(sell_pnl) if sell_pnl else np.zeros(0)
+    equity = starting_balance + np.cumsum(market_delta + cash_flow)
+
+    max_drawdown = 0.0
+    if n:
+        peak = np.maximum.accumulate(np.concatenate([[starting_balance], equity]))[1:]
+        max_drawdown = float(np.min((equity - peak) / peak)) * 100
+
+    # Sharpe from the last equity of each day with trades
+    sharpe = None
+    if n:
+        days = np.floor(executed_at / 86400)
+        last_of_day = np.flatnonzero(np.diff(np.append(days, math.inf)) != 0)
+        closes = np.concatenate([[starting_balance], equity[last_of_day]])
+        returns = np.diff(closes) / closes[:-1]
+        if len(returns) >= 2 and np.std(returns, ddof=1) > 0:
+            sharpe = round(float(np.mean(returns) / np.std(returns, ddof=1) * math.sqrt(TRADING_DAYS)), 2)
+
+    return {
+        "trade_count": n,
+        "closed_trades": len(realized),
+        "win_rate": round(float(np.mean(realized > 0)) * 100, 2) if len(realized) else None,
+        "avg_hold_seconds": round(held_seconds / held_shares) if held_shares else None,
+        "realized_pnl": round(float(np.sum(realized)), 2),
+        "max_drawdown_percent": round(max_drawdown, 2),
+        "sharpe_ratio": sharpe,
+        "symbols": sorted(by_symbol, key=lambda s: s["realized_pnl"], reverse=True),
+    }
+
+
+async def get_analytics(db: AsyncSession, user: User) -> dict:
+    key = str(user.id)
+    cached = _cache.get(key)
+    if isinstance(cached, dict):
+        return cached
+
+    # Mark the load in progress; a trade meanwhile drops the marker and the
+    # possibly stale result isn't cached
+    marker = None
+    if cached is None:
+        marker = object()
+        _cache.set(key, marker)
+    symbols, is_buy, quantity, price, executed_at = (
+        await db.execute(_LOAD_TRADES, {"user_id": user.id})
+    ).one()
+    analytics = compute_analytics(
+        user.starting_balance,
+        np.array(symbols or [], dtype=object),
+        np.array(is_buy or [], dtype=bool),
+        np.array(quantity or [], dtype=np.float64),
+        np.array(price or [], dtype=np.float64),
+        np.array(executed_at or [], dtype=np.float64),
+    )
+    if marker is not None and _cache.get(key) is marker:
+        _cache.set(key, analytics)
+    return analytics
+
+
+def invalidate(user_id: uuid.UUID | str):
+    _cache.pop(str(user_id))
+
+
+def _on_positions_changed(payload: dict):
+    invalidate(payload["user_id"])
+
+
+async def start():
+    # Trades executed on other workers
+    event_service.on_broadcast("positions_changed", _on_positions_changed)
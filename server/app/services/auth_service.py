@@ -1,14 +1,22 @@
 import secrets
+import time
 import uuid
 from datetime import datetime, timedelta, timezone
 
 from jose import JWTError, jwt
-from sqlalchemy import select
+from sqlalchemy import delete, func, inspect, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
 
 from app.config import settings
 from app.models.otp import OtpCode
 from app.models.user import User
+from app.utils.cache import TTLCache
+
+# Verified access-token payloads and user rows, so authenticated requests can
+# skip JWT verification and the users lookup while an entry is fresh.
+_token_cache = TTLCache(max_entries=settings.auth_cache_max_entries, ttl_seconds=settings.auth_cache_ttl_seconds)
+_user_cache = TTLCache(max_entries=settings.auth_cache_max_entries, ttl_seconds=settings.auth_cache_ttl_seconds)
 
 
 def generate_otp() -> str:
@@ -28,21 +36,39 @@ async def create_otp(db: AsyncSession, email: str) -> str:
 
 
 async def verify_otp(db: AsyncSession, email: str, code: str) -> bool:
+    # Consume the code in a single statement so two concurrent verifies can't
+    # both succeed. Expiring it now also makes it eligible for the next purge.
     result = await db.execute(
-        select(OtpCode).where(
+        update(OtpCode)
+        .where(
             OtpCode.email == email.lower(),
             OtpCode.code == code,
             OtpCode.used == False,  # noqa: E712
-            OtpCode.expires_at > datetime.now(timezone.utc),
+            OtpCode.expires_at > func.now(),
         )
+        .values(used=True, expires_at=func.now())
+        .returning(OtpCode.id)
+        .execution_options(synchronize_session=False)
     )
-    otp = result.scalar_one_or_none()
-    if not otp:
-        return False
-
-    otp.used = True
+    consumed = result.first() is not None
     await db.commit()
-    return True
+    return consumed
+
+
+async def purge_expired_otps(db: AsyncSession, batch_size: int = 1000) -> int:
+    """Delete expired and consumed codes in small batches to keep locks short."""
+    purged = 0
+    while True:
+        batch = select(OtpCode.id).where(OtpCode.expires_at <= func.now()).limit(batch_size)
+        result = await db.execute(
+            delete(OtpCode)
+            .where(OtpCode.id.in_(batch.scalar_subquery()))
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        purged += result.rowcount
+        if result.rowcount < batch_size:
+            return purged
 
 
 async def get_or_create_user(db: AsyncSession, email: str) -> User:
@@ -51,6 +77,7 @@ async def get_or_create_user(db: AsyncSession, email: str) -> User:
     if user:
         user.is_verified = True
         await db.commit()
+        invalidate_user(user.id)
         return user
 
     user = User(
@@ -93,3 +120,39 @@ def decode_token(token: str) -> dict | None:
         return payload
     except JWTError:
         return None
+
+
+def decode_access_token(token: str) -> dict | None:
+    payload = _token_cache.get(token)
+    if payload is not None:
+        return payload
+
+    payload = decode_token(token)
+    if not payload or payload.get("type") != "access" or not payload.get("sub"):
+        return None
+
+    # Never keep a payload around past the token's own expiry
+    _token_cache.set(token, payload, ttl_seconds=payload.get("exp", 0) - time.time())
+    return payload
+
+
+def get_cached_user(user_id: uuid.UUID) -> User | None:
+    columns = _user_cache.get(str(user_id))
+    if columns is None:
+        return None
+
+    # Build a fresh detached instance per request so callers can attach it to
+    # their own session without sharing mutable ORM state.
+    user = User(**columns)
+    make_transient_to_detached(user)
+    return user
+
+
+def cache_user(user: User):
+    state = inspect(user)
+    columns = {attr.key: state.dict[attr.key] for attr in state.mapper.column_attrs if attr.key in state.dict}
+    _user_cache.set(str(user.id), columns)
+
+
+def invalidate_user(user_id: uuid.UUID):
+    _user_cache.pop(str(user_id))
@@ -1,36 +1,118 @@
+import asyncio
 import logging
 
-import resend
+import httpx
 
 from app.config import settings
 
 logger = logging.getLogger(__name__)
 
+RESEND_URL = "https://api.resend.com/emails"
+MAX_ATTEMPTS = 4
+RETRY_BASE_DELAY = 1  # seconds, doubled after each failed attempt
 
-async def send_otp_email(email: str, code: str) -> bool:
+_queue: asyncio.Queue | None = None
+_client: httpx.AsyncClient | None = None
+_workers: list[asyncio.Task] = []
+
+
+def _otp_message(email: str, code: str) -> dict:
+    return {
+        "from": "Market Pulse <contact@notifications.jeffkershner.com>",
+        "to": [email],
+        "subject": f"Your Market Pulse login code: {code}",
+        "html": f"""
+            <div style="font-family: sans-serif; max-width: 400px; margin: 0 auto; padding: 20px;">
+                <h2 style="color: #1a1a2e;">Market Pulse</h2>
+                <p>Your verification code is:</p>
+                <div style="font-size: 32px; font-weight: bold; letter-spacing: 8px; padding: 20px; background: #f5f5f5; text-align: center; border-radius: 8px; margin: 20px 0;">
+                    {code}
+                </div>
+                <p style="color: #666; font-size: 14px;">This code expires in 10 minutes.</p>
+            </div>
+        """,
+    }
+
+
+def queue_otp_email(email: str, code: str) -> bool:
+    """Hand the OTP email to the outbox without waiting for delivery."""
     if not settings.resend_api_key:
         logger.warning(f"RESEND_API_KEY not set. OTP for {email}: {code}")
         return True
 
-    resend.api_key = settings.resend_api_key
+    if _queue is None:
+        logger.error("Email outbox not started, dropping OTP email")
+        return False
 
     try:
-        resend.Emails.send({
-            "from": "Market Pulse <contact@notifications.jeffkershner.com>",
-            "to": [email],
-            "subject": f"Your Market Pulse login code: {code}",
-            "html": f"""
-                <div style="font-family: sans-serif; max-width: 400px; margin: 0 auto; padding: 20px;">
-                    <h2 style="color: #1a1a2e;">Market Pulse</h2>
-                    <p>Your verification code is:</p>
-                    <div style="font-size: 32px; font-weight: bold; letter-spacing: 8px; padding: 20px; background: #f5f5f5; text-align: center; border-radius: 8px; margin: 20px 0;">
-                        {code}
-                    </div>
-                    <p style="color: #666; font-size: 14px;">This code expires in 10 minutes.</p>
-                </div>
-            """,
-        })
+        _queue.put_nowait(_otp_message(email, code))
         return True
-    except Exception as e:
-        logger.error(f"Failed to send OTP email: {e}")
+    except asyncio.QueueFull:
+        logger.error(f"Email outbox full, dropping OTP email for {email}")
         return False
+
+
+async def send_email(message: dict) -> bool:
+    """Deliver one message through the Resend API, retrying transient failures."""
+    delay = RETRY_BASE_DELAY
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        try:
+            resp = await _client.post(RESEND_URL, json=message)
+            if resp.status_code < 300:
+                return True
+            # Client errors other than rate limiting won't succeed on retry
+            if resp.status_code < 500 and resp.status_code != 429:
+                logger.error(f"Failed to send email: {resp.status_code} {resp.text}")
+                return False
+            logger.warning(f"Email send attempt {attempt} got {resp.status_code}")
+        except httpx.HTTPError as e:
+            logger.warning(f"Email send attempt {attempt} failed: {e}")
+
+        if attempt < MAX_ATTEMPTS:
+            await asyncio.sleep(delay)
+            delay *= 2
+
+    logger.error(f"Giving up on email to {message['to']} after {MAX_ATTEMPTS} attempts")
+    return False
+
+
+async def _worker():
+    while True:
+        message = await _queue.get()
+        try:
+            await send_email(message)
+        except Exception as e:
+            logger.error(f"Email worker error: {e}")
+        finally:
+            _queue.task_done()
+
+
+async def start():
+    global _queue, _client
+    _queue = asyncio.Queue(maxsize=settings.email_outbox_size)
+    # One pooled client shared by all workers so deliveries reuse connections
+    _client = httpx.AsyncClient(
+        headers={"Authorization": f"Bearer {settings.resend_api_key}"},
+        timeout=10,
+        limits=httpx.Limits(max_connections=settings.email_workers),
+    )
+    for _ in range(settings.email_workers):
+        _workers.append(asyncio.create_task(_worker()))
+
+
+async def stop():
+    global _queue, _client
+    if _queue is not None:
+        # Give queued codes a moment to go out before shutting down
+        try:
+            await asyncio.wait_for(_queue.join(), timeout=5)
+        except asyncio.TimeoutError:
+            logger.warning(f"Email outbox stopped with {_queue.qsize()} undelivered messages")
+    for task in _workers:
+        task.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
+    if _client:
+        await _client.aclose()
+        _client = None
+    _queue = None
@@ -0,0 +1,143 @@
+import asyncio
+import json
+import logging
+import uuid
+from collections.abc import Callable
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import engine, note_write, replica_engine
+
+logger = logging.getLogger(__name__)
+
+# Workers share events over Postgres LISTEN/NOTIFY so a user's stream gets
+# them whichever worker it is connected to.
+CHANNEL = "pulse_events"
+USER_QUEUE_SIZE = 100
+
+_worker_id = uuid.uuid4().hex
+_user_queues: dict[str, set[asyncio.Queue]] = {}  # user_id -> one queue per open stream
+_handlers: dict[str, list[Callable[[dict], None]]] = {}  # topic -> handlers for other workers' broadcasts
+_listen_conn = None
+
+_NOTIFY = text("SELECT pg_notify(:channel, :message)")
+
+
+def subscribe_user(user_id: str) -> asyncio.Queue:
+    queue = asyncio.Queue(maxsize=USER_QUEUE_SIZE)
+    _user_queues.setdefault(user_id, set()).add(queue)
+    return queue
+
+
+def unsubscribe_user(user_id: str, queue: asyncio.Queue):
+    queues = _user_queues.get(user_id)
+    if queues is None:
+        return
+    queues.discard(queue)
+    if not queues:
+        del _user_queues[user_id]
+
+
+def has_subscribers(user_id: str) -> bool:
+    return user_id in _user_queues
+
+
+def _deliver(user_id: str, event: str, data: dict):
+    # Events report changes to the user's data, which the client may read next
+    note_write(user_id)
+    for queue in _user_queues.get(user_id, ()):
+        try:
+            queue.put_nowait({"event": event, "data": data})
+        except asyncio.QueueFull:
+            logger.warning(f"Dropping {event} event for slow stream of user {user_id}")
+
+
+async def publish_user_event(user_id: str, event: str, data: dict):
+    """Push an event to every open stream of a user, on any worker."""
+    _deliver(user_id, event, data)
+    await broadcast("user_event", {"user_id": user_id, "event": event, "data": data})
+
+
+async def user_wrote(user_id: uuid.UUID | str, db: AsyncSession | None = None):
+    """Send the user's reads to the primary on every worker, so they see their own write.
+
+    Given a session, call it before the write commits so the notice goes with it.
+    """
+    note_write(user_id)
+    if replica_engine is not None:
+        await broadcast("user_wrote", {"user_id": str(user_id)}, db=db)
+
+
+def on_broadcast(topic: str, handler: Callable[[dict], None]):
+    """Run handler for broadcasts on topic that came from other workers."""
+    _handlers.setdefault(topic, []).append(handler)
+
+
+async def broadcast(topic: str, payload: dict, db: AsyncSession | None = None):
+    """Send payload to the other workers' handlers for topic.
+
+    Given a session, the notification joins its transaction and is only
+    delivered if that commits.
+    """
+    if _listen_conn is None:
+        return
+    message = json.dumps({"origin": _worker_id, "topic": topic, "payload": payload}, default=str)
+    if db is not None:
+        await db.execute(_NOTIFY, {"channel": CHANNEL, "message": message})
+        return
+    try:
+        async with engine.begin() as conn:
+            await conn.execute(_NOTIFY, {"channel": CHANNEL, "message": message})
+    except Exception as e:
+        logger.warning(f"Failed to broadcast {topic}: {e}")
+
+
+def _on_notification(connection, pid, channel, message):
+    try:
+        message = json.loads(message)
+    except json.JSONDecodeError:
+        return
+    if message.get("origin") == _worker_id:
+        return
+    for handler in _handlers.get(message.get("topic"), ()):
+        try:
+            handler(message["payload"])
+        except Exception as e:
+            logger.error(f"Broadcast handler for {message.get('topic')} failed: {e}")
+
+
+def _on_user_event(payload: dict):
+    _deliver(payload["user_id"], payload["event"], payload["data"])
+
+
+def _on_user_wrote(payload: dict):
+    note_write(payload["user_id"])
+
+
+async def start():
+    global _listen_conn
+    on_broadcast("user_event", _on_user_event)
+    on_broadcast("user_wrote", _on_user_wrote)
+    try:
+        # Hold one pooled connection for the lifetime of the worker to LISTEN on
+        conn = await engine.connect()
+        raw = await conn.get_raw_connection()
+        await raw.driver_connection.add_listener(CHANNEL, _on_notification)
+        _listen_conn = conn
+        logger.info("Event service listening for cross-worker events")
+    except Exception as e:
+        logger.warning(f"Cross-worker events unavailable, delivering locally only: {e}")
+
+
+async def stop():
+    global _listen_conn
+    if _listen_conn is not None:
+        try:
+            raw = await _listen_conn.get_raw_connection()
+            await raw.driver_connection.remove_listener(CHANNEL, _on_notification)
+        except Exception:
+            pass
+        await _listen_conn.close()
+        _listen_conn = None
+    _handlers.clear()
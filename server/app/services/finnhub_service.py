@@ -3,11 +3,15 @@ import json
 import logging
 import time
 from collections import deque
+from collections.abc import Callable
 
 import httpx
 import websockets
 
 from app.config import settings
+from app.services import latency_service
+from app.utils.quote_columns import QuoteColumns
+from app.utils.timing import measure
 
 logger = logging.getLogger(__name__)
 
@@ -28,6 +32,9 @@ quote_cache: dict[str, dict] = {}
 sparkline_cache: dict[str, deque] = {}
 _sparkline_last_sample: dict[str, float] = {}
 _subscribed_symbols: set[str] = set()
+_tick_listeners: list[Callable[[str, float], None]] = []
+# quote_cache mirrored as columns for binary snapshots; its per-symbol versions also make ETags
+quote_columns = QuoteColumns()
 _ws = None
 _task: asyncio.Task | None = None
 _running = False
@@ -43,11 +50,53 @@ def get_sparkline(symbol: str) -> list[float]:
     return []
 
 
+def get_snapshot(symbol: str) -> dict | None:
+    """A symbol's quote with its sparkline, as the quote endpoints return it."""
+    quote = quote_cache.get(symbol)
+    if not quote:
+        return None
+    return {
+        "symbol": symbol,
+        "price": quote["price"],
+        "volume": quote.get("volume", 0),
+        "timestamp": quote.get("timestamp", 0),
+        "sparkline": get_sparkline(symbol),
+    }
+
+
+def get_version(symbol: str) -> int:
+    """Changes whenever the symbol's quote or sparkline does; 0 before the first quote."""
+    return quote_columns.version_of(symbol)
+
+
 def get_all_quotes() -> dict[str, dict]:
     return dict(quote_cache)
 
 
-async def subscribe(symbol: str):
+def add_tick_listener(listener: Callable[[str, float], None]):
+    """Register a callback run synchronously for every price update. Keep it cheap."""
+    _tick_listeners.append(listener)
+
+
+def _update_columns(symbol: str):
+    quote = quote_cache[symbol]
+    quote_columns.update(symbol, quote["price"], quote.get("volume", 0), quote.get("timestamp", 0))
+
+
+def _publish_tick(symbol: str, price: float):
+    _update_columns(symbol)
+    for listener in _tick_listeners:
+        try:
+            listener(symbol, price)
+        except Exception as e:
+            logger.error(f"Tick listener failed for {symbol}: {e}")
+
+
+def rest_enabled() -> bool:
+    return bool(settings.finnhub_api_key) and settings.finnhub_api_key != "your_finnhub_api_key_here"
+
+
+async def subscribe(symbol: str, seed: bool = True):
     global _ws
     already_subscribed = symbol in _subscribed_symbols
     _subscribed_symbols.add(symbol)
@@ -58,8 +107,8 @@ async def subscribe(symbol: str):
         except Exception:
             pass
     # Seed cache via REST so the symbol has data immediately
-    if not already_subscribed and symbol not in quote_cache:
-        await _seed_symbol_from_rest(symbol)
+    if seed and not already_subscribed and symbol not in quote_cache:
+        await seed_from_rest(symbol)
 
 
 async def unsubscribe(symbol: str):
@@ -96,6 +145,7 @@ async def _connect_and_consume():
                 async for message in ws:
                     if not _running:
                         break
+                    received_at = time.time()
                     try:
                         data = json.loads(message)
                         if data.get("type") == "trade" and data.get("data"):
@@ -103,7 +153,8 @@ async def _connect_and_consume():
                                 symbol = trade["s"]
                                 price = trade["p"]
                                 volume = trade.get("v", 0)
-                                timestamp = trade.get("t", int(time.time() * 1000))
+                                timestamp = trade.get("t", int(received_at * 1000))
+                                latency_service.record_upstream(received_at - timestamp / 1000)
 
                                 prev_volume = quote_cache.get(symbol, {}).get("volume", 0)
                                 quote_cache[symbol] = {
@@ -111,6 +162,7 @@ async def _connect_and_consume():
                                     "price": price,
                                     "volume": prev_volume + volume,
                                     "timestamp": timestamp,
+                                    "received_at": received_at,
                                 }
 
                                 now = time.time()
@@ -123,6 +175,8 @@ async def _connect_and_consume():
                                     _sparkline_last_sample[symbol] = now
                                 elif sparkline_cache[symbol]:
                                     sparkline_cache[symbol][-1] = price
+
+                                _publish_tick(symbol, price)
                     except (json.JSONDecodeError, KeyError) as e:
                         logger.debug(f"Error processing message: {e}")
 
@@ -153,6 +207,7 @@ async def _run_simulated():
             "price": base,
             "volume": random.randint(100000, 5000000),
             "timestamp": int(time.time() * 1000),
+            "received_at": time.time(),
         }
         sparkline_cache[symbol] = deque(maxlen=20)
         walk_price = base
@@ -160,6 +215,7 @@ async def _run_simulated():
             walk_price = round(walk_price * (1 + random.uniform(-0.002, 0.002)), 2)
             sparkline_cache[symbol].append(walk_price)
         _sparkline_last_sample[symbol] = time.time()
+        _update_columns(symbol)
 
     while _running:
         await asyncio.sleep(1.5)
@@ -174,6 +230,7 @@ async def _run_simulated():
                     "price": new_price,
                     "volume": quote_cache[symbol]["volume"] + random.randint(100, 5000),
                     "timestamp": int(time.time() * 1000),
+                    "received_at": time.time(),
                 }
 
                 now = time.time()
@@ -187,18 +244,21 @@ async def _run_simulated():
                 elif sparkline_cache[symbol]:
                     sparkline_cache[symbol][-1] = new_price
 
+                _publish_tick(symbol, new_price)
+
 
-async def _seed_symbol_from_rest(symbol: str):
+async def seed_from_rest(symbol: str):
     """Fetch a single symbol's quote via REST API to seed the cache."""
-    if not settings.finnhub_api_key or settings.finnhub_api_key == "your_finnhub_api_key_here":
+    if not rest_enabled():
         return
     try:
         async with httpx.AsyncClient() as client:
-            resp = await client.get(
-                "https://finnhub.io/api/v1/quote",
-                params={"symbol": symbol, "token": settings.finnhub_api_key},
-                timeout=5,
-            )
+            with measure("http"):
+                resp = await client.get(
+                    "https://finnhub.io/api/v1/quote",
+                    params={"symbol": symbol, "token": settings.finnhub_api_key},
+                    timeout=5,
+                )
             if resp.status_code == 200:
                 data = resp.json()
                 price = data.get("c", 0)
@@ -209,6 +269,7 @@ async def _seed_symbol_from_rest(symbol: str):
                         "price": price,
                         "volume": data.get("v", 0) or 0,
                         "timestamp": data.get("t", int(time.time())) * 1000,
+                        "received_at": time.time(),
                     }
                     if symbol not in sparkline_cache:
                         sparkline_cache[symbol] = deque(maxlen=20)
@@ -216,30 +277,18 @@ async def _seed_symbol_from_rest(symbol: str):
                         sparkline_cache[symbol].append(prev_close)
                     sparkline_cache[symbol].append(price)
                     _sparkline_last_sample[symbol] = time.time()
+                    _publish_tick(symbol, price)
                     logger.debug(f"Seeded {symbol} @ {price} (pc={prev_close})")
     except Exception as e:
         logger.debug(f"Failed to seed {symbol}: {e}")
 
 
-async def _seed_cache_from_rest():
-    """Fetch initial quotes via REST API so the cache isn't empty before WS trades arrive."""
-    if not settings.finnhub_api_key or settings.finnhub_api_key == "your_finnhub_api_key_here":
-        return
-
-    for symbol in list(_subscribed_symbols):
-        await _seed_symbol_from_rest(symbol)
-        await asyncio.sleep(0.1)  # respect rate limits (60/min)
-
-    logger.info(f"Seeded cache with {len(quote_cache)} symbols via REST API")
-
-
 async def start():
     global _task, _running
     _running = True
     for symbol in DEFAULT_SYMBOLS:
         _subscribed_symbols.add(symbol)
-    # Seed cache in background so it doesn't block server startup
-    asyncio.create_task(_seed_cache_from_rest())
+    # Quotes are seeded by warmup_service, which also adds users' symbols
     _task = asyncio.create_task(_connect_and_consume())
     logger.info(f"Finnhub service started with {len(_subscribed_symbols)} symbols")
 
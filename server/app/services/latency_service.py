@@ -0,0 +1,49 @@
+from app.utils.metrics import Histogram
+
+# Upper bounds in seconds, from sub-millisecond fan-out to a badly delayed feed
+TICK_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Acks older than this are a sleeping tab or a bogus client, not latency
+MAX_ROUND_TRIP_SECONDS = 60.0
+
+# A tick's path to the screen, each stage timed separately:
+#   upstream    exchange trade time -> received from the feed (includes clock skew)
+#   queue       received -> picked up by a stream for sending
+#   write       the stream's write of the event
+#   round_trip  event sent -> the client's ack arrives back, by the server clock
+_upstream = Histogram(TICK_BUCKETS)
+_stages: dict[tuple[str, str], Histogram] = {}  # (event, stage) -> histogram
+
+
+def record_upstream(seconds: float):
+    _upstream.observe(max(seconds, 0.0))
+
+
+def record(event: str, stage: str, seconds: float):
+    histogram = _stages.get((event, stage))
+    if histogram is None:
+        histogram = _stages[(event, stage)] = Histogram(TICK_BUCKETS)
+    histogram.observe(max(seconds, 0.0))
+
+
+def record_round_trips(event: str, sent_at: list[float], now: float) -> int:
+    """Record acks for events sent at the given times (epoch seconds); returns how many counted."""
+    counted = 0
+    for sent in sent_at:
+        seconds = now - sent
+        if 0 <= seconds <= MAX_ROUND_TRIP_SECONDS:
+            record(event, "round_trip", seconds)
+            counted += 1
+    return counted
+
+
+def render_metrics() -> str:
+    lines = [
+        "# HELP tick_upstream_lag_seconds Exchange trade time to receipt from the feed.",
+        "# TYPE tick_upstream_lag_seconds histogram",
+        *_upstream.lines("tick_upstream_lag_seconds"),
+        "# HELP tick_delivery_seconds Time in each stage of delivering a tick to clients.",
+        "# TYPE tick_delivery_seconds histogram",
+    ]
+    for (event, stage), histogram in sorted(_stages.items()):
+        lines += histogram.lines("tick_delivery_seconds", f'event="{event}",stage="{stage}"')
+    return "\n".join(lines) + "\n"
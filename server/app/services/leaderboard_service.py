@@ -0,0 +1,342 @@
+import asyncio
+import logging
+import math
+import time
+import uuid
+
+import numpy as np
+from sqlalchemy import text
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.services import event_service, finnhub_service
+
+logger = logging.getLogger(__name__)
+
+# How often trades since the last pass are folded in, and how stale cached
+# ranks may get while ticks keep arriving
+REFRESH_INTERVAL_SECONDS = 1.0
+MAX_TOP = 100
+
+
+class Leaderboard:
+    """Every account's value, kept current as ticks and trades arrive.
+
+    Open positions are held as columnar arrays grouped by account, plus a
+    permutation grouping them by symbol. Building values every account with
+    one sparse matrix-vector product of the position quantities against the
+    quote vector. After that a tick only adjusts the accounts holding that
+    symbol, and an account that trades has its array entries zeroed and its
+    new positions kept in `overrides` until the next rebuild.
+
+    Positions in a symbol with no quote yet are valued at cost, as in the
+    portfolio endpoint.
+    """
+
+    def __init__(
+        self,
+        user_ids: list[str],
+        names: list[str],
+        cash: np.ndarray,
+        starting: np.ndarray,
+        symbols: list[str],
+        pos_account: np.ndarray,
+        pos_symbol: np.ndarray,
+        pos_quantity: np.ndarray,
+        pos_cost: np.ndarray,
+        prices: dict[str, float],
+    ):
+        n = len(user_ids)
+        self.user_ids = list(user_ids)
+        self.names = list(names)
+        self.rows = {user_id: i for i, user_id in enumerate(self.user_ids)}
+        self.built = n  # accounts below this row may have entries in the arrays
+        self.cash = np.asarray(cash, dtype=np.float64).copy()
+        self.starting = np.asarray(starting, dtype=np.float64).copy()
+
+        # Positions grouped by account, so an account's entries are one slice
+        order = np.argsort(pos_account, kind="stable")
+        self.pos_account = np.asarray(pos_account, dtype=np.int32)[order]
+        self.pos_quantity = np.asarray(pos_quantity, dtype=np.float64)[order]
+        self.pos_cost = np.asarray(pos_cost, dtype=np.float64)[order]
+        self.pos_symbol = np.asarray(pos_symbol, dtype=np.int32)[order]
+        self.account_offsets = np.searchsorted(self.pos_account, np.arange(n + 1))
+
+        # ...and a permutation grouping them by symbol, for ticks
+        self.symbol_names = list(symbols)
+        self.symbols = {symbol: i for i, symbol in enumerate(symbols)}
+        self.by_symbol = np.argsort(self.pos_symbol, kind="stable")
+        self.symbol_offsets = np.searchsorted(self.pos_symbol[self.by_symbol], np.arange(len(symbols) + 1))
+
+        # row -> {symbol: (quantity, cost)} for accounts that traded since the build
+        self.overrides: dict[int, dict[str, tuple[float, float]]] = {}
+        self.override_holders: dict[str, set[int]] = {}
+
+        self.prices = dict(prices)
+        self.values = np.zeros(n)
+        self.version = 0
+        self.revalue()
+
+        self._ranked_version = -1
+        self._ranked_at = 0.0
+        self._returns = np.zeros(0)
+        self._top: list[int] = []
+
+    def __len__(self) -> int:
+        return len(self.user_ids)
+
+    def revalue(self):
+        """Value every account from scratch at the current prices."""
+        n = len(self.user_ids)
+        quote_vector = np.array([self.prices.get(symbol, math.nan) for symbol in self.symbol_names])
+        unit = quote_vector[self.pos_symbol] if len(quote_vector) else np.zeros(0)
+        unit = np.where(np.isnan(unit), self.pos_cost, unit)
+        values = self.cash[:n] + np.bincount(self.pos_account, weights=self.pos_quantity * unit, minlength=n)
+        for row, held in self.overrides.items():
+            values[row] += sum(quantity * self.prices.get(symbol, cost) for symbol, (quantity, cost) in held.items())
+        self.values[:n] = values
+        self.version += 1
+
+    def tick(self, symbol: str, price: float):
+        old = self.prices.get(symbol)
+        if old == price:
+            return
+        col = self.symbols.get(symbol)
+        if col is not None:
+            idx = self.by_symbol[self.symbol_offsets[col]:self.symbol_offsets[col + 1]]
+            if idx.size:
+                # An account holds at most one position per symbol, so the rows are unique
+                base = self.pos_cost[idx] if old is None else old
+                self.values[self.pos_account[idx]] += self.pos_quantity[idx] * (price - base)
+        for row in self.override_holders.get(symbol, ()):
+            quantity, cost = self.overrides[row][symbol]
+            self.values[row] += quantity * (price - (cost if old is None else old))
+        self.prices[symbol] = price
+        self.version += 1
+
+    def set_account(
+        self,
+        user_id: str,
+        name: str,
+        cash: float,
+        starting: float,
+        positions: list[tuple[str, float, float]],
+    ):
+        """Replace one account's cash and (symbol, quantity, cost) positions."""
+        row = self.rows.get(user_id)
+        if row is None:
+            row = self._append(user_id)
+        if row < self.built:
+            self.pos_quantity[self.account_offsets[row]:self.account_offsets[row + 1]] = 0
+        for symbol in self.overrides.pop(row, {}):
+            self.override_holders[symbol].discard(row)
+
+        held = {symbol: (quantity, cost) for symbol, quantity, cost in positions}
+        if held:
+            self.overrides[row] = held
+            for symbol in held:
+                self.override_holders.setdefault(symbol, set()).add(row)
+
+        self.names[row] = name
+        self.cash[row] = cash
+        self.starting[row] = starting
+        self.values[row] = cash + sum(
+            quantity * self.prices.get(symbol, cost) for symbol, (quantity, cost) in held.items()
+        )
+        self.version += 1
+
+    def _append(self, user_id: str) -> int:
+        row = len(self.user_ids)
+        self.user_ids.append(user_id)
+        self.names.append("")
+        self.rows[user_id] = row
+        if row >= len(self.values):
+            grow = max(1024, len(self.values))
+            self.cash = np.concatenate([self.cash, np.zeros(grow)])
+            self.starting = np.concatenate([self.starting, np.zeros(grow)])
+            self.values = np.concatenate([self.values, np.zeros(grow)])
+        return row
+
+    def _rank(self):
+        """Recompute returns and the top accounts, at most once per refresh interval."""
+        now = time.monotonic()
+        if self._ranked_version == self.version or now - self._ranked_at < REFRESH_INTERVAL_SECONDS:
+            return
+        n = len(self.user_ids)
+        starting = self.starting[:n]
+        self._returns = np.divide(
+            self.values[:n] - starting, starting, out=np.zeros(n), where=starting > 0
+        ) * 100
+        k = min(MAX_TOP, n)
+        if k:
+            top = np.argpartition(-self._returns, k - 1)[:k]
+            self._top = top[np.argsort(-self._returns[top], kind="stable")].tolist()
+        self._ranked_version = self.version
+        self._ranked_at = now
+
+    def _entry(self, row: int, rank: int) -> dict:
+        total_value = float(self.values[row])
+        total_return = total_value - float(self.starting[row])
+        return {
+            "rank": rank,
+            "name": self.names[row],
+            "total_value": round(total_value, 2),
+            "total_return": round(total_return, 2),
+            "total_return_percent": round(float(self._returns[row]), 2),
+        }
+
+    def top(self, limit: int) -> list[dict]:
+        self._rank()
+        entries = []
+        for i, row in enumerate(self._top[:limit]):
+            # Tied accounts share the better rank
+            if i and self._returns[row] == self._returns[self._top[i - 1]]:
+                rank = entries[-1]["rank"]
+            else:
+                rank = i + 1
+            entries.append(self._entry(row, rank))
+        return entries
+
+    def rank_of(self, user_id: str) -> dict | None:
+        self._rank()
+        row = self.rows.get(user_id)
+        if row is None or row >= len(self._returns):
+            return None
+        return self._entry(row, int(np.count_nonzero(self._returns > self._returns[row])) + 1)
+
+
+_board: Leaderboard | None = None
+_dirty: set[str] = set()
+_task: asyncio.Task | None = None
+
+_NAME = "coalesce(display_name, 'Trader ' || left(id::text, 8))"
+
+# Accounts in id order and their open positions keyed by account and symbol
+# index, aggregated into arrays so a million rows arrive as a handful of values
+_LOAD_ACCOUNTS = text(f"""
+    SELECT array_agg(id::text ORDER BY id), array_agg({_NAME} ORDER BY id),
+           array_agg(cash_balance ORDER BY id), array_agg(starting_balance ORDER BY id)
+    FROM users
+""")
+_LOAD_POSITIONS = text("""
+    WITH account AS (
+        SELECT id, (row_number() OVER (ORDER BY id) - 1)::int AS row FROM users
+    ), symbol AS (
+        SELECT symbol, (row_number() OVER (ORDER BY symbol) - 1)::int AS col
+        FROM (SELECT DISTINCT symbol FROM positions WHERE quantity > 0) s
+    )
+    SELECT (SELECT array_agg(symbol ORDER BY col) FROM symbol),
+           array_agg(account.row), array_agg(symbol.col), array_agg(p.quantity), array_agg(p.avg_cost_basis)
+    FROM positions p
+    JOIN account ON account.id = p.user_id
+    JOIN symbol ON symbol.symbol = p.symbol
+    WHERE p.quantity > 0
+""")
+_LOAD_CHANGED_ACCOUNTS = text(f"""
+    SELECT id::text, {_NAME}, cash_balance, starting_balance FROM users WHERE id = ANY(:ids)
+""")
+_LOAD_CHANGED_POSITIONS = text("""
+    SELECT user_id::text, symbol, quantity, avg_cost_basis
+    FROM positions WHERE user_id = ANY(:ids) AND quantity > 0
+""")
+
+
+async def _build() -> Leaderboard:
+    async with AsyncSessionLocal() as db:
+        # One snapshot, so account rows numbered by the second query match the first
+        await db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+        user_ids, names, cash, starting = (await db.execute(_LOAD_ACCOUNTS)).one()
+        symbols, pos_account, pos_symbol, pos_quantity, pos_cost = (await db.execute(_LOAD_POSITIONS)).one()
+        await db.commit()
+
+    return Leaderboard(
+        user_ids or [],
+        names or [],
+        np.array(cash or [], dtype=np.float64),
+        np.array(starting or [], dtype=np.float64),
+        symbols or [],
+        np.array(pos_account or [], dtype=np.int32),
+        np.array(pos_symbol or [], dtype=np.int32),
+        np.array(pos_quantity or [], dtype=np.float64),
+        np.array(pos_cost or [], dtype=np.float64),
+        {symbol: quote["price"] for symbol, quote in list(finnhub_service.quote_cache.items())},
+    )
+
+
+async def _refresh(board: Leaderboard):
+    """Reload the accounts that traded since the last pass."""
+    if not _dirty:
+        return
+    # Cleared before reading, so accounts that trade during the read stay dirty
+    changed = set(_dirty)
+    _dirty.clear()
+    ids = [uuid.UUID(user_id) for user_id in changed]
+    try:
+        async with AsyncSessionLocal() as db:
+            accounts = (await db.execute(_LOAD_CHANGED_ACCOUNTS, {"ids": ids})).all()
+            rows = (await db.execute(_LOAD_CHANGED_POSITIONS, {"ids": ids})).all()
+    except BaseException:
+        # Retried on the next pass rather than left stale until the next rebuild
+        _dirty.update(changed)
+        raise
+
+    positions: dict[str, list[tuple[str, float, float]]] = {}
+    for user_id, symbol, quantity, cost in rows:
+        positions.setdefault(user_id, []).append((symbol, quantity, cost))
+    for user_id, name, cash, starting in accounts:
+        board.set_account(user_id, name, cash, starting, positions.get(user_id, []))
+
+
+async def _maintain():
+    global _board
+    rebuilt_at = 0.0
+    while True:
+        try:
+            if time.monotonic() - rebuilt_at >= settings.leaderboard_rebuild_interval_seconds:
+                # Accounts that trade meanwhile stay dirty and are reloaded on top
+                started = time.perf_counter()
+                _board = await _build()
+                rebuilt_at = time.monotonic()
+                logger.info(f"Leaderboard built with {len(_board)} accounts in {time.perf_counter() - started:.2f}s")
+            await _refresh(_board)
+        except Exception as e:
+            logger.error(f"Leaderboard update failed: {e}")
+        await asyncio.sleep(REFRESH_INTERVAL_SECONDS)
+
+
+def account_changed(user_id: uuid.UUID | str):
+    """Queue an account for reloading after its cash or positions changed."""
+    _dirty.add(str(user_id))
+
+
+def get_leaderboard() -> Leaderboard | None:
+    return _board
+
+
+def _on_tick(symbol: str, price: float):
+    if _board is not None:
+        _board.tick(symbol, price)
+
+
+def _on_positions_changed(payload: dict):
+    account_changed(payload["user_id"])
+
+
+async def start():
+    global _task
+    finnhub_service.add_tick_listener(_on_tick)
+    # Trades executed on other workers
+    event_service.on_broadcast("positions_changed", _on_positions_changed)
+    # Built in the background; the endpoint reports it as warming up until then
+    _task = asyncio.create_task(_maintain())
+
+
+async def stop():
+    global _task
+    if _task:
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+        _task = None
@@ -0,0 +1,63 @@
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.services.auth_service import purge_expired_otps
+from app.services.partition_service import maintain_partitions
+from app.services.snapshot_service import take_snapshots
+
+logger = logging.getLogger(__name__)
+
+_tasks: list[asyncio.Task] = []
+
+
+async def _purge_otps():
+    async with AsyncSessionLocal() as db:
+        purged = await purge_expired_otps(db)
+    if purged:
+        logger.info(f"Purged {purged} expired OTP codes")
+
+
+async def _snapshot_portfolios():
+    async with AsyncSessionLocal() as db:
+        taken = await take_snapshots(db)
+    if taken:
+        logger.info(f"Snapshotted {taken} portfolio values")
+
+
+async def _maintain_trade_partitions():
+    created = await maintain_partitions()
+    if created:
+        logger.info(f"Created {created} trade partitions")
+
+
+# (name, interval in seconds, job)
+JOBS: list[tuple[str, int, Callable[[], Awaitable[None]]]] = [
+    ("otp_purge", settings.otp_purge_interval_seconds, _purge_otps),
+    ("portfolio_snapshots", settings.portfolio_snapshot_interval_seconds, _snapshot_portfolios),
+    ("trade_partitions", settings.trade_partition_interval_seconds, _maintain_trade_partitions),
+]
+
+
+async def _run_periodically(name: str, interval: int, job: Callable[[], Awaitable[None]]):
+    while True:
+        try:
+            await job()
+        except Exception as e:
+            logger.warning(f"Maintenance job {name} failed: {e}")
+        await asyncio.sleep(interval)
+
+
+async def start():
+    for name, interval, job in JOBS:
+        _tasks.append(asyncio.create_task(_run_periodically(name, interval, job)))
+    logger.info(f"Maintenance service started with {len(_tasks)} jobs")
+
+
+async def stop():
+    for task in _tasks:
+        task.cancel()
+    await asyncio.gather(*_tasks, return_exceptions=True)
+    _tasks.clear()
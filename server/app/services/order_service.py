@@ -0,0 +1,134 @@
+import logging
+import uuid
+
+from fastapi import HTTPException
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import AsyncSessionLocal
+from app.models.order import Order
+from app.models.user import User
+from app.services import event_service, finnhub_service
+from app.services.trade_service import execute_trade
+from app.services.trigger_book import TriggerBook
+
+logger = logging.getLogger(__name__)
+
+
+def _levels(order: dict) -> list[tuple[float, str]]:
+    # BUY LIMIT and SELL STOP fire on the way down, the others on the way up
+    fires = "below" if (order["side"], order["order_type"]) in (("BUY", "LIMIT"), ("SELL", "STOP")) else "above"
+    return [(order["price"], fires)]
+
+
+def _item(order: Order) -> dict:
+    return {
+        "id": order.id,
+        "user_id": order.user_id,
+        "symbol": order.symbol,
+        "side": order.side,
+        "order_type": order.order_type,
+        "quantity": order.quantity,
+        "price": order.price,
+    }
+
+
+async def _load(order_id: uuid.UUID) -> dict | None:
+    async with AsyncSessionLocal() as db:
+        order = await db.get(Order, order_id)
+    return _item(order) if order is not None and order.status == "OPEN" else None
+
+
+async def open_order(order: Order):
+    """Start watching a newly placed order, on this worker and the others."""
+    await _book.open(_item(order))
+
+
+def _fill_price(order: dict, trigger_price: float) -> float | None:
+    """The price to fill at now, or None if it moved back through a limit order's limit.
+
+    Fills run behind a queue, so the market may have moved since the tick
+    that triggered them. Stops fill at market; limits never fill worse than
+    their limit.
+    """
+    quote = finnhub_service.get_quote(order["symbol"])
+    price = quote["price"] if quote else trigger_price
+    if order["order_type"] == "LIMIT":
+        if (order["side"] == "BUY" and price > order["price"]) or (order["side"] == "SELL" and price < order["price"]):
+            return None
+    return price
+
+
+async def _fill(order: dict, trigger_price: float):
+    async with AsyncSessionLocal() as db:
+        # Claim the order first so a cancel, or another worker holding the same
+        # order in its book, can't race the fill. The claim commits with the
+        # trade, or with the rejection.
+        trade_id = uuid.uuid4()
+        claimed = await db.execute(
+            update(Order)
+            .where(Order.id == order["id"], Order.status == "OPEN")
+            .values(status="FILLED", trade_id=trade_id, filled_at=func.now())
+            .returning(Order.id)
+            .execution_options(synchronize_session=False)
+        )
+        if claimed.first() is None:
+            await db.rollback()
+            return
+
+        user = await db.get(User, order["user_id"])
+        price = _fill_price(order, trigger_price)
+        if price is None:
+            await db.rollback()
+            _book.index(order)
+            return
+        try:
+            await execute_trade(
+                db, user, order["symbol"], order["side"], order["quantity"],
+                trade_id=trade_id, price=price, commit_rejection=False,
+            )
+            logger.info(f"Filled order {order['id']} ({order['side']} {order['quantity']} {order['symbol']} @ {price})")
+        except HTTPException as e:
+            await db.execute(
+                update(Order)
+                .where(Order.id == order["id"])
+                .values(status="REJECTED", trade_id=None, filled_at=None, reject_reason=e.detail[:255])
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+            logger.info(f"Rejected order {order['id']}: {e.detail}")
+    # Drop it from the other workers' books
+    await _book.close(order["id"])
+
+
+async def cancel_order(db: AsyncSession, user_id: uuid.UUID, order_id: uuid.UUID) -> bool:
+    result = await db.execute(
+        update(Order)
+        .where(Order.id == order_id, Order.user_id == user_id, Order.status == "OPEN")
+        .values(status="CANCELLED")
+        .returning(Order.id)
+        .execution_options(synchronize_session=False)
+    )
+    cancelled = result.first() is not None
+    if cancelled:
+        await event_service.user_wrote(user_id, db)
+    await db.commit()
+    if cancelled:
+        await _book.close(order_id)
+    return cancelled
+
+
+# Resting orders, indexed by the price level that triggers them
+_book = TriggerBook("order", _levels, _fill, _load)
+
+
+async def start():
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(Order).where(Order.status == "OPEN"))
+        orders = result.scalars().all()
+    count = await _book.start(_item(order) for order in orders)
+    logger.info(f"Order engine started with {count} resting orders")
+
+
+async def stop():
+    await _book.stop()
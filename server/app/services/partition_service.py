@@ -0,0 +1,80 @@
+import logging
+from datetime import datetime, timezone
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.config import settings
+from app.database import engine
+
+logger = logging.getLogger(__name__)
+
+# Arbitrary advisory lock key so only one worker manages partitions at a time
+_PARTITION_LOCK = 0x5E0A_0002
+# There's no default partition, so a trade dated past the last one fails to
+# insert; complain while fewer months than this past the current one exist
+MIN_UPCOMING_PARTITIONS = 2
+
+_PARTITIONS = text("""
+    SELECT c.relname
+    FROM pg_inherits i
+    JOIN pg_class c ON c.oid = i.inhrelid
+    WHERE i.inhparent = 'trades'::regclass
+""")
+
+
+def _month_start(year: int, month: int) -> datetime:
+    return datetime(year + (month - 1) // 12, (month - 1) % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+async def maintain_partitions() -> int:
+    """Create the coming months' trade partitions. Returns how many were created."""
+    try:
+        return await _maintain()
+    finally:
+        # Also after a failed run, which is what leaves the partitions short
+        await _check_upcoming()
+
+
+async def _maintain() -> int:
+    async with engine.connect() as conn:
+        # Each partition commits on its own, so a lock timeout only loses that one
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        locked = (await conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": _PARTITION_LOCK})).scalar()
+        if not locked:
+            return 0
+        try:
+            # Give up on a busy table rather than queue trades behind the DDL
+            await conn.execute(text("SET lock_timeout = '5s'"))
+            return await _create_upcoming(conn)
+        finally:
+            await conn.execute(text("RESET lock_timeout"))
+            await conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": _PARTITION_LOCK})
+
+
+async def _check_upcoming():
+    now = datetime.now(timezone.utc)
+    async with engine.connect() as conn:
+        existing = {row.relname for row in await conn.execute(_PARTITIONS)}
+    wanted = [f"trades_{_month_start(now.year, now.month + i):%Y_%m}" for i in range(MIN_UPCOMING_PARTITIONS + 1)]
+    missing = [name for name in wanted if name not in existing]
+    if missing:
+        logger.error(f"Trade partitions missing: {', '.join(missing)}; trades in those months will fail to insert")
+
+
+async def _create_upcoming(conn: AsyncConnection) -> int:
+    now = datetime.now(timezone.utc)
+    existing = {row.relname for row in await conn.execute(_PARTITIONS)}
+    created = 0
+    for i in range(settings.trade_partitions_ahead_months + 1):
+        start = _month_start(now.year, now.month + i)
+        name = f"trades_{start:%Y_%m}"
+        if name in existing:
+            continue
+        end = _month_start(now.year, now.month + i + 1)
+        await conn.execute(text(
+            f"CREATE TABLE {name} PARTITION OF trades "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        ))
+        created += 1
+    return created
@@ -1,57 +1,305 @@
+import asyncio
+import itertools
+import logging
+import uuid
+from array import array
+
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import settings
+from app.database import AsyncSessionLocal, note_write
 from app.models.position import Position
 from app.models.user import User
 from app.schemas.portfolio import PortfolioResponse, PortfolioSummary, PositionResponse
-from app.services import finnhub_service
+from app.services import event_service, finnhub_service
+from app.services.auth_service import invalidate_user
+from app.utils.cache import TTLCache
 
+logger = logging.getLogger(__name__)
 
-async def get_portfolio(db: AsyncSession, user: User) -> PortfolioResponse:
+# Position set versions, unique within the process so a reloaded set never
+# reuses the version of one it replaced
+_versions = itertools.count(1)
+
+
+class PositionSet:
+    """A user's open positions as parallel arrays, indexed by symbol."""
+
+    def __init__(self, rows=()):
+        self.version = next(_versions)
+        self.symbols: list[str] = []
+        self.index: dict[str, int] = {}
+        self.quantity = array("q")
+        self.avg_cost_basis = array("d")
+        self.total_cost = array("d")
+        self.realized_pnl = array("d")
+        for row in rows:
+            self.update(*row)
+
+    def update(self, symbol: str, quantity: int, avg_cost_basis: float, total_cost: float, realized_pnl: float):
+        """Set one position's committed values; a closed position drops out."""
+        self.version = next(_versions)
+        i = self.index.get(symbol)
+        if quantity <= 0:
+            if i is not None:
+                self._remove(i)
+            return
+        if i is None:
+            self.index[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+            self.quantity.append(quantity)
+            self.avg_cost_basis.append(avg_cost_basis)
+            self.total_cost.append(total_cost)
+            self.realized_pnl.append(realized_pnl)
+        else:
+            self.quantity[i] = quantity
+            self.avg_cost_basis[i] = avg_cost_basis
+            self.total_cost[i] = total_cost
+            self.realized_pnl[i] = realized_pnl
+
+    def _remove(self, i: int):
+        del self.index[self.symbols[i]]
+        del self.symbols[i]
+        for column in (self.quantity, self.avg_cost_basis, self.total_cost, self.realized_pnl):
+            del column[i]
+        for j in range(i, len(self.symbols)):
+            self.index[self.symbols[j]] = j
+
+    def copy(self) -> "PositionSet":
+        return PositionSet(zip(self.symbols, self.quantity, self.avg_cost_basis, self.total_cost, self.realized_pnl))
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+
+class LivePortfolio:
+    """A user's positions valued at the latest quotes.
+
+    A tick reprices only the position in that symbol and adjusts the running
+    totals by its change, so keeping the portfolio current costs O(1) per tick
+    instead of a reload and full revaluation.
+    """
+
+    def __init__(self, cash_balance: float, starting_balance: float, positions: PositionSet):
+        self.version = 0  # bumped on every change, so streams can tell when to resend
+        self.load(cash_balance, starting_balance, positions)
+
+    def load(self, cash_balance: float, starting_balance: float, positions: PositionSet):
+        self.cash_balance = cash_balance
+        self.starting_balance = starting_balance
+        self.positions = positions
+        self.prices = array("d", bytes(8 * len(positions)))
+        self.market_values = array("d", bytes(8 * len(positions)))
+        for i, symbol in enumerate(positions.symbols):
+            quote = finnhub_service.get_quote(symbol)
+            self.prices[i] = quote["price"] if quote else positions.avg_cost_basis[i]
+            self.market_values[i] = round(self.prices[i] * positions.quantity[i], 2)
+        self.market_value = sum(self.market_values)
+        self.version += 1
+
+    def reprice(self, symbol: str, price: float) -> bool:
+        i = self.positions.index.get(symbol)
+        if i is None or self.prices[i] == price:
+            return False
+        market_value = round(price * self.positions.quantity[i], 2)
+        self.market_value += market_value - self.market_values[i]
+        self.prices[i] = price
+        self.market_values[i] = market_value
+        self.version += 1
+        return True
+
+    def response(self) -> PortfolioResponse:
+        p = self.positions
+        positions = []
+        for i, symbol in enumerate(p.symbols):
+            unrealized = round((self.prices[i] - p.avg_cost_basis[i]) * p.quantity[i], 2)
+            unrealized_pct = round((unrealized / p.total_cost[i]) * 100, 2) if p.total_cost[i] else 0.0
+            positions.append(PositionResponse(
+                symbol=symbol,
+                quantity=p.quantity[i],
+                avg_cost_basis=round(p.avg_cost_basis[i], 2),
+                total_cost=round(p.total_cost[i], 2),
+                current_price=round(self.prices[i], 2),
+                market_value=self.market_values[i],
+                unrealized_pnl=unrealized,
+                unrealized_pnl_percent=unrealized_pct,
+                realized_pnl=round(p.realized_pnl[i], 2),
+            ))
+
+        total_value = round(self.cash_balance + self.market_value, 2)
+        total_return = round(total_value - self.starting_balance, 2)
+        total_return_pct = round((total_return / self.starting_balance) * 100, 2) if self.starting_balance else 0.0
+
+        return PortfolioResponse(
+            summary=PortfolioSummary(
+                total_value=total_value,
+                cash_balance=round(self.cash_balance, 2),
+                invested_value=round(self.market_value, 2),
+                total_return=total_return,
+                total_return_percent=total_return_pct,
+            ),
+            positions=positions,
+        )
+
+
+# Open positions per user. Trades on this worker update entries in place after
+# commit; trades on other workers drop them via a positions_changed broadcast.
+_positions = TTLCache(max_entries=settings.position_cache_max_entries, ttl_seconds=settings.position_cache_ttl_seconds)
+
+# Portfolios kept live for users with a portfolio stream open on this worker
+_live: dict[str, LivePortfolio] = {}  # user_id -> portfolio
+_streams: dict[str, int] = {}  # user_id -> open portfolio streams
+_holders: dict[str, set[str]] = {}  # symbol -> user_ids with a live position in it
+_reloads: set[asyncio.Task] = set()
+_generations: dict[str, int] = {}  # user_id -> latest reload started, so older ones don't land after it
+_reload_seq = itertools.count()
+
+
+async def get_positions(db: AsyncSession, user_id: uuid.UUID) -> PositionSet:
+    """A user's open positions, from the cache when possible. Don't modify the result."""
+    key = str(user_id)
+    cached = _positions.get(key)
+    if isinstance(cached, PositionSet):
+        return cached
+
+    # Mark the load in progress. A trade committing meanwhile replaces or drops
+    # the marker, and then this possibly stale result isn't cached.
+    marker = None
+    if cached is None:
+        marker = object()
+        _positions.set(key, marker)
     result = await db.execute(
-        select(Position).where(Position.user_id == user.id, Position.quantity > 0)
+        select(Position.symbol, Position.quantity, Position.avg_cost_basis, Position.total_cost, Position.realized_pnl)
+        .where(Position.user_id == user_id, Position.quantity > 0)
     )
-    positions = result.scalars().all()
-
-    position_responses = []
-    total_invested = 0.0
-    total_market_value = 0.0
-    total_unrealized = 0.0
-
-    for pos in positions:
-        quote = finnhub_service.get_quote(pos.symbol)
-        current_price = quote["price"] if quote else pos.avg_cost_basis
-        market_value = round(current_price * pos.quantity, 2)
-        unrealized = round((current_price - pos.avg_cost_basis) * pos.quantity, 2)
-        unrealized_pct = round((unrealized / pos.total_cost) * 100, 2) if pos.total_cost else 0.0
-
-        total_invested += pos.total_cost
-        total_market_value += market_value
-        total_unrealized += unrealized
-
-        position_responses.append(PositionResponse(
-            symbol=pos.symbol,
-            quantity=pos.quantity,
-            avg_cost_basis=round(pos.avg_cost_basis, 2),
-            total_cost=round(pos.total_cost, 2),
-            current_price=round(current_price, 2),
-            market_value=market_value,
-            unrealized_pnl=unrealized,
-            unrealized_pnl_percent=unrealized_pct,
-            realized_pnl=round(pos.realized_pnl, 2),
-        ))
-
-    total_value = round(user.cash_balance + total_market_value, 2)
-    total_return = round(total_value - user.starting_balance, 2)
-    total_return_pct = round((total_return / user.starting_balance) * 100, 2) if user.starting_balance else 0.0
-
-    return PortfolioResponse(
-        summary=PortfolioSummary(
-            total_value=total_value,
-            cash_balance=round(user.cash_balance, 2),
-            invested_value=round(total_market_value, 2),
-            total_return=total_return,
-            total_return_percent=total_return_pct,
-        ),
-        positions=position_responses,
+    positions = PositionSet(result.all())
+    if marker is not None and _positions.get(key) is marker:
+        _positions.set(key, positions)
+    return positions
+
+
+def update_positions(user_id: uuid.UUID, rows: list[tuple[str, int, float, float, float]]):
+    """Apply committed (symbol, quantity, avg_cost_basis, total_cost, realized_pnl) rows."""
+    key = str(user_id)
+    cached = _positions.get(key)
+    if isinstance(cached, PositionSet):
+        for row in rows:
+            cached.update(*row)
+    else:
+        _positions.pop(key)
+
+
+def invalidate_positions(user_id: uuid.UUID):
+    _positions.pop(str(user_id))
+
+
+async def get_portfolio(db: AsyncSession, user: User) -> PortfolioResponse:
+    positions = await get_positions(db, user.id)
+    return LivePortfolio(user.cash_balance, user.starting_balance, positions).response()
+
+
+async def get_portfolio_version(db: AsyncSession, user: User) -> tuple:
+    """Changes whenever get_portfolio's result would: on trades and on ticks for held symbols."""
+    positions = await get_positions(db, user.id)
+    return (
+        positions.version,
+        user.cash_balance,
+        user.starting_balance,
+        [finnhub_service.get_version(symbol) for symbol in positions.symbols],
     )
+
+
+def _index_holdings(user_id: str, portfolio: LivePortfolio | None, symbols: set[str]):
+    for symbol in symbols:
+        holders = _holders.get(symbol)
+        if holders is not None:
+            holders.discard(user_id)
+            if not holders:
+                del _holders[symbol]
+    if portfolio is not None:
+        for symbol in portfolio.positions.symbols:
+            _holders.setdefault(symbol, set()).add(user_id)
+
+
+async def _reload(user_id: str):
+    # Back-to-back trades start overlapping reloads; only the last one started
+    # read state after every trade, so only it may apply
+    generation = _generations[user_id] = next(_reload_seq)
+    async with AsyncSessionLocal() as db:
+        user = await db.get(User, uuid.UUID(user_id))
+        # Copied because the cached set changes in place under later trades
+        positions = (await get_positions(db, user.id)).copy()
+
+    portfolio = _live.get(user_id)
+    if portfolio is None:
+        # The last stream closed while loading
+        return
+    if _generations.get(user_id) != generation:
+        return
+    previous = set(portfolio.positions.symbols)
+    portfolio.load(user.cash_balance, user.starting_balance, positions)
+    _index_holdings(user_id, portfolio, previous)
+
+
+async def open_live_portfolio(user_id: str) -> LivePortfolio:
+    """Start keeping a user's portfolio live for a stream; pair with close_live_portfolio."""
+    _streams[user_id] = _streams.get(user_id, 0) + 1
+    portfolio = _live.get(user_id)
+    if portfolio is None:
+        portfolio = _live[user_id] = LivePortfolio(0.0, 0.0, PositionSet())
+        try:
+            await _reload(user_id)
+        except BaseException:
+            close_live_portfolio(user_id)
+            raise
+        for symbol in portfolio.positions.symbols:
+            await finnhub_service.subscribe(symbol)
+    return portfolio
+
+
+def close_live_portfolio(user_id: str):
+    remaining = _streams.get(user_id, 0) - 1
+    if remaining > 0:
+        _streams[user_id] = remaining
+        return
+    _streams.pop(user_id, None)
+    _generations.pop(user_id, None)
+    portfolio = _live.pop(user_id, None)
+    if portfolio is not None:
+        _index_holdings(user_id, None, set(portfolio.positions.symbols))
+
+
+async def _refresh(user_id: str):
+    try:
+        await _reload(user_id)
+    except Exception as e:
+        logger.error(f"Failed to reload live portfolio for {user_id}: {e}")
+
+
+def refresh_live_portfolio(user_id: str):
+    """Reload a live portfolio after its positions or cash changed."""
+    if user_id not in _live:
+        return
+    task = asyncio.create_task(_refresh(user_id))
+    _reloads.add(task)
+    task.add_done_callback(_reloads.discard)
+
+
+def _on_tick(symbol: str, price: float):
+    for user_id in _holders.get(symbol, ()):
+        _live[user_id].reprice(symbol, price)
+
+
+def _on_positions_changed(payload: dict):
+    user_id = uuid.UUID(payload["user_id"])
+    note_write(user_id)
+    invalidate_positions(user_id)
+    invalidate_user(user_id)
+    refresh_live_portfolio(payload["user_id"])
+
+
+async def start():
+    finnhub_service.add_tick_listener(_on_tick)
+    # Trades executed on other workers
+    event_service.on_broadcast("positions_changed", _on_positions_changed)
@@ -0,0 +1,145 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.portfolio_snapshot import PortfolioSnapshot
+from app.services import finnhub_service
+from app.utils.downsample import lttb
+
+HOUR = 3600
+DAY = 86400
+
+# Range name -> how far back it reaches (None for everything)
+RANGES: dict[str, timedelta | None] = {
+    "1d": timedelta(days=1),
+    "1w": timedelta(weeks=1),
+    "1m": timedelta(days=30),
+    "3m": timedelta(days=90),
+    "1y": timedelta(days=365),
+    "all": None,
+}
+
+# Arbitrary advisory lock key so only one worker snapshots at a time
+_SNAPSHOT_LOCK = 0x5E0A_0001
+
+# Values every user with open positions, or whose account changed recently, at
+# the given quotes in one statement, so nothing round-trips through Python.
+# Positions without a quote count at cost, as in the portfolio endpoint.
+_SNAPSHOT = text("""
+    INSERT INTO portfolio_snapshots (user_id, bucket_seconds, taken_at, total_value)
+    SELECT u.id, 0, :taken_at,
+           round((u.cash_balance + coalesce(sum(p.quantity * coalesce(q.price, p.avg_cost_basis)), 0))::numeric, 2)
+    FROM users u
+    LEFT JOIN positions p ON p.user_id = u.id AND p.quantity > 0
+    LEFT JOIN unnest(CAST(:symbols AS varchar[]), CAST(:prices AS float8[])) AS q(symbol, price)
+        ON q.symbol = p.symbol
+    WHERE u.updated_at >= :active_since
+       OR EXISTS (SELECT 1 FROM positions op WHERE op.user_id = u.id AND op.quantity > 0)
+    GROUP BY u.id
+    ON CONFLICT DO NOTHING
+""")
+
+# Closing raw value of each bucket since :since, rewritten every run so the
+# current, still open bucket stays up to date
+_ROLLUP = text("""
+    INSERT INTO portfolio_snapshots (user_id, bucket_seconds, taken_at, total_value)
+    SELECT DISTINCT ON (user_id, bucket) user_id, :bucket_seconds, bucket, total_value
+    FROM (
+        SELECT user_id, taken_at, total_value,
+               date_bin(make_interval(secs => :bucket_seconds), taken_at, TIMESTAMPTZ '2000-01-01') AS bucket
+        FROM portfolio_snapshots
+        WHERE bucket_seconds = 0 AND taken_at >= :since
+    ) raw
+    ORDER BY user_id, bucket, taken_at DESC
+    ON CONFLICT (user_id, bucket_seconds, taken_at) DO UPDATE SET total_value = excluded.total_value
+""")
+
+_PURGE = text("DELETE FROM portfolio_snapshots WHERE bucket_seconds = :bucket_seconds AND taken_at < :before")
+
+
+def _floor(moment: datetime, seconds: int) -> datetime:
+    return datetime.fromtimestamp(moment.timestamp() // seconds * seconds, tz=timezone.utc)
+
+
+async def take_snapshots(db: AsyncSession) -> int:
+    """Snapshot active users' values, roll them up and apply retention.
+
+    Snapshots are stamped with the start of the current interval, so when
+    several workers run this the later ones find it done and skip it.
+    """
+    now = datetime.now(timezone.utc)
+    taken_at = _floor(now, settings.portfolio_snapshot_interval_seconds)
+
+    locked = (await db.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": _SNAPSHOT_LOCK})).scalar()
+    if not locked:
+        await db.commit()
+        return 0
+    done = (await db.execute(
+        select(PortfolioSnapshot.user_id)
+        .where(PortfolioSnapshot.bucket_seconds == 0, PortfolioSnapshot.taken_at == taken_at)
+        .limit(1)
+    )).first()
+    if done:
+        await db.commit()
+        return 0
+
+    quotes = [(symbol, quote["price"]) for symbol, quote in list(finnhub_service.quote_cache.items())]
+    result = await db.execute(_SNAPSHOT, {
+        "taken_at": taken_at,
+        "symbols": [symbol for symbol, _ in quotes],
+        "prices": [price for _, price in quotes],
+        "active_since": now - timedelta(days=1),
+    })
+
+    # The previous bucket too, in case it closed between two runs
+    for bucket_seconds in (HOUR, DAY):
+        since = _floor(now, bucket_seconds) - timedelta(seconds=bucket_seconds)
+        await db.execute(_ROLLUP, {"bucket_seconds": bucket_seconds, "since": since})
+
+    await db.execute(_PURGE, {
+        "bucket_seconds": 0,
+        "before": now - timedelta(days=settings.portfolio_snapshot_raw_retention_days),
+    })
+    await db.execute(_PURGE, {
+        "bucket_seconds": HOUR,
+        "before": now - timedelta(days=settings.portfolio_snapshot_hourly_retention_days),
+    })
+    await db.commit()
+    return result.rowcount
+
+
+def _resolution(span: timedelta | None) -> int:
+    """The finest resolution still retained over the whole span."""
+    if span is not None and span <= timedelta(days=settings.portfolio_snapshot_raw_retention_days):
+        return 0
+    if span is not None and span <= timedelta(days=settings.portfolio_snapshot_hourly_retention_days):
+        return HOUR
+    return DAY
+
+
+async def get_history(
+    db: AsyncSession,
+    user_id: uuid.UUID,
+    range_name: str,
+    max_points: int,
+) -> tuple[int, list[tuple[datetime, float]]]:
+    """A user's equity curve over a range, downsampled to at most max_points.
+
+    Reads one primary-key range scan at the chosen resolution. Returns the
+    resolution used and (taken_at, total_value) points, oldest first.
+    """
+    span = RANGES[range_name]
+    bucket_seconds = _resolution(span)
+    query = select(PortfolioSnapshot.taken_at, PortfolioSnapshot.total_value).where(
+        PortfolioSnapshot.user_id == user_id,
+        PortfolioSnapshot.bucket_seconds == bucket_seconds,
+    )
+    if span is not None:
+        query = query.where(PortfolioSnapshot.taken_at >= datetime.now(timezone.utc) - span)
+    rows = (await db.execute(query.order_by(PortfolioSnapshot.taken_at))).all()
+
+    points = lttb([(taken_at.timestamp(), value) for taken_at, value in rows], max_points)
+    return bucket_seconds, [(datetime.fromtimestamp(x, tz=timezone.utc), y) for x, y in points]
@@ -1,78 +1,424 @@
+import uuid
+from collections.abc import AsyncIterator
+from datetime import datetime
+
 from fastapi import HTTPException, status
-from sqlalchemy import select
+from sqlalchemy import func, insert, select, text, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
 
+from app.database import AsyncSessionLocal, note_write, read_session
 from app.models.position import Position
 from app.models.trade import Trade
 from app.models.user import User
-from app.services import finnhub_service
-
+from app.services import analytics_service, event_service, finnhub_service, leaderboard_service, portfolio_service
+from app.services.auth_service import invalidate_user
+from app.utils.cache import TTLCache
 
-async def execute_trade(db: AsyncSession, user: User, symbol: str, side: str, quantity: int) -> Trade:
-    quote = finnhub_service.get_quote(symbol.upper())
-    if not quote:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"No price data for {symbol}")
+# Per-user trade counts for history totals, dropped when the user next trades
+# on any worker
+_trade_counts = TTLCache(max_entries=10000, ttl_seconds=60)
 
-    price = quote["price"]
-    total = round(price * quantity, 2)
-    symbol = symbol.upper()
+# Data-modifying CTEs let each order run as a single statement: the cash
+# check, balance update, position upsert and trade insert either all happen or
+# none do, so a rejected order leaves nothing to roll back. Both paths lock
+# the user row before the position row, so a concurrent buy and sell of the
+# same symbol can't deadlock. Plain SQL is used because the postgresql insert
+# construct isn't compile-cacheable.
+_BUY = text("""
+    WITH debit AS (
+        UPDATE users
+        SET cash_balance = round((cash_balance - :total)::numeric, 2), updated_at = now()
+        WHERE id = :user_id AND cash_balance >= :total
+        RETURNING id, cash_balance
+    ), position AS (
+        INSERT INTO positions (id, user_id, symbol, quantity, avg_cost_basis, total_cost, realized_pnl)
+        SELECT CAST(:position_id AS uuid), debit.id, CAST(:symbol AS varchar), CAST(:quantity AS integer),
+               CAST(:price AS float8), CAST(:total AS float8), 0.0
+        FROM debit
+        ON CONFLICT ON CONSTRAINT uq_position_user_symbol DO UPDATE SET
+            quantity = positions.quantity + excluded.quantity,
+            total_cost = round((positions.total_cost + excluded.total_cost)::numeric, 2),
+            avg_cost_basis = round(
+                ((positions.total_cost + excluded.total_cost) / (positions.quantity + excluded.quantity))::numeric, 4
+            ),
+            updated_at = now()
+        RETURNING positions.quantity, positions.avg_cost_basis, positions.total_cost, positions.realized_pnl
+    ), trade AS (
+        INSERT INTO trades (id, user_id, symbol, side, quantity, price, total)
+        SELECT CAST(:trade_id AS uuid), debit.id, CAST(:symbol AS varchar), 'BUY', CAST(:quantity AS integer),
+               CAST(:price AS float8), CAST(:total AS float8)
+        FROM debit
+        RETURNING executed_at
+    )
+    SELECT debit.cash_balance, trade.executed_at,
+           position.quantity, position.avg_cost_basis, position.total_cost, position.realized_pnl
+    FROM debit, position, trade
+""")
 
-    # Get or create position
-    result = await db.execute(
-        select(Position).where(Position.user_id == user.id, Position.symbol == symbol)
+_SELL = text("""
+    WITH locked AS (
+        SELECT id FROM users WHERE id = :user_id FOR UPDATE
+    ), position AS (
+        UPDATE positions
+        SET realized_pnl = round((realized_pnl + round(((:price - avg_cost_basis) * :quantity)::numeric, 2))::numeric, 2),
+            quantity = quantity - :quantity,
+            total_cost = round((avg_cost_basis * (quantity - :quantity))::numeric, 2),
+            updated_at = now()
+        FROM locked
+        WHERE positions.user_id = locked.id AND positions.symbol = :symbol AND positions.quantity >= :quantity
+        RETURNING positions.user_id, positions.quantity, positions.avg_cost_basis, positions.total_cost,
+                  positions.realized_pnl
+    ), credit AS (
+        UPDATE users
+        SET cash_balance = round((cash_balance + :total)::numeric, 2), updated_at = now()
+        FROM position
+        WHERE users.id = position.user_id
+        RETURNING users.id, users.cash_balance
+    ), trade AS (
+        INSERT INTO trades (id, user_id, symbol, side, quantity, price, total)
+        SELECT CAST(:trade_id AS uuid), position.user_id, CAST(:symbol AS varchar), 'SELL', CAST(:quantity AS integer),
+               CAST(:price AS float8), CAST(:total AS float8)
+        FROM position
+        RETURNING executed_at
     )
-    position = result.scalar_one_or_none()
+    SELECT credit.cash_balance, trade.executed_at,
+           position.quantity, position.avg_cost_basis, position.total_cost, position.realized_pnl
+    FROM credit, position, trade
+""")
 
-    if side == "BUY":
-        if user.cash_balance < total:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Insufficient cash. Need ${total:.2f}, have ${user.cash_balance:.2f}",
-            )
 
-        user.cash_balance = round(user.cash_balance - total, 2)
+async def execute_trade(
+    db: AsyncSession,
+    user: User,
+    symbol: str,
+    side: str,
+    quantity: int,
+    trade_id: uuid.UUID | None = None,
+    price: float | None = None,
+    commit_rejection: bool = True,
+) -> Trade:
+    """Execute a market order, at price if given, else at the latest quote.
 
-        if position:
-            new_total_cost = position.total_cost + total
-            new_quantity = position.quantity + quantity
-            position.avg_cost_basis = round(new_total_cost / new_quantity, 4)
-            position.total_cost = round(new_total_cost, 2)
-            position.quantity = new_quantity
-        else:
-            position = Position(
-                user_id=user.id,
-                symbol=symbol,
-                quantity=quantity,
-                avg_cost_basis=price,
-                total_cost=total,
-                realized_pnl=0.0,
-            )
-            db.add(position)
-
-    elif side == "SELL":
-        if not position or position.quantity < quantity:
-            available = position.quantity if position else 0
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Insufficient shares. Have {available}, trying to sell {quantity}",
-            )
+    A rejection raises HTTPException. With commit_rejection=False nothing is
+    committed first, so the caller can record the rejection in its own
+    transaction.
+    """
+    if price is None:
+        quote = finnhub_service.get_quote(symbol.upper())
+        if not quote:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"No price data for {symbol}")
+        price = quote["price"]
 
-        realized = round((price - position.avg_cost_basis) * quantity, 2)
-        position.realized_pnl = round(position.realized_pnl + realized, 2)
-        position.quantity -= quantity
-        position.total_cost = round(position.avg_cost_basis * position.quantity, 2)
+    total = round(price * quantity, 2)
+    symbol = symbol.upper()
+    user_id = user.id
+    trade_id = trade_id or uuid.uuid4()
 
-        user.cash_balance = round(user.cash_balance + total, 2)
+    params = {
+        "user_id": user_id,
+        "trade_id": trade_id,
+        "symbol": symbol,
+        "quantity": quantity,
+        "price": price,
+        "total": total,
+    }
+    if side == "BUY":
+        row = (await db.execute(_BUY, {**params, "position_id": uuid.uuid4()})).first()
+    else:
+        row = (await db.execute(_SELL, params)).first()
+    if row is None:
+        await _raise_rejection(db, user_id, symbol, side, quantity, total, commit=commit_rejection)
+
+    await _commit_trades(
+        db, user_id, [(symbol, row.quantity, row.avg_cost_basis, row.total_cost, row.realized_pnl)]
+    )
+    # Reflect the new balance without marking the user dirty for another UPDATE
+    set_committed_value(user, "cash_balance", row.cash_balance)
 
-    trade = Trade(
-        user_id=user.id,
+    return Trade(
+        id=trade_id,
+        user_id=user_id,
         symbol=symbol,
         side=side,
         quantity=quantity,
         price=price,
         total=total,
+        executed_at=row.executed_at,
     )
-    db.add(trade)
+
+
+async def _commit_trades(
+    db: AsyncSession,
+    user_id: uuid.UUID,
+    positions: list[tuple[str, int, float, float, float]],
+):
+    """Commit executed trades and update everything derived from the user's account.
+
+    positions are the committed (symbol, quantity, avg_cost_basis, total_cost,
+    realized_pnl) of every position the trades touched.
+    """
+    # Sent with the commit so other workers drop their cached positions
+    await event_service.broadcast("positions_changed", {"user_id": str(user_id)}, db=db)
     await db.commit()
-    await db.refresh(trade)
-    return trade
+    note_write(user_id)
+    invalidate_user(user_id)
+    _trade_counts.pop(str(user_id))
+    portfolio_service.update_positions(user_id, positions)
+    portfolio_service.refresh_live_portfolio(str(user_id))
+    leaderboard_service.account_changed(user_id)
+    analytics_service.invalidate(user_id)
+
+
+async def _raise_rejection(
+    db: AsyncSession, user_id: uuid.UUID, symbol: str, side: str, quantity: int, total: float, commit: bool = True
+):
+    """Raise with the balance that caused a rejected order."""
+    if side == "BUY":
+        cash = (await db.execute(select(User.cash_balance).where(User.id == user_id))).scalar_one()
+        detail = f"Insufficient cash. Need ${total:.2f}, have ${cash:.2f}"
+    else:
+        available = (
+            await db.execute(
+                select(Position.quantity).where(Position.user_id == user_id, Position.symbol == symbol)
+            )
+        ).scalar_one_or_none() or 0
+        detail = f"Insufficient shares. Have {available}, trying to sell {quantity}"
+
+    # Nothing was written; committing just releases the row lock without
+    # expiring the caller's loaded objects the way a rollback would.
+    if commit:
+        await db.commit()
+    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
+
+async def execute_trade_batch(
+    db: AsyncSession,
+    user: User,
+    orders: list[tuple[str, str, int]],
+    atomic: bool,
+) -> tuple[list[tuple[str, Trade | None, str | None]], float]:
+    """Apply (symbol, side, quantity) orders in one transaction.
+
+    Orders are priced from a single quote snapshot and checked in sequence
+    against the locked cash balance and positions, so earlier sells can fund
+    later buys. Accepted orders are then written with one balance update, one
+    position upsert and one trade insert, however many orders there are.
+
+    Returns a (status, trade, error) result per order plus the final cash
+    balance. When atomic, any rejection cancels every other order.
+    """
+    user_id = user.id
+    orders = [(symbol.upper(), side, quantity) for symbol, side, quantity in orders]
+    quotes = {symbol: finnhub_service.get_quote(symbol) for symbol, _, _ in orders}
+
+    # Lock the user row before position rows, the same order as execute_trade
+    starting_cash = cash = (
+        await db.execute(select(User.cash_balance).where(User.id == user_id).with_for_update())
+    ).scalar_one()
+    rows = await db.execute(
+        select(Position.symbol, Position.quantity, Position.avg_cost_basis, Position.total_cost, Position.realized_pnl)
+        .where(Position.user_id == user_id, Position.symbol.in_(quotes.keys()))
+        .with_for_update()
+    )
+    held = {row.symbol: row._asdict() for row in rows}
+
+    results: list[tuple[str, Trade | None, str | None]] = []
+    changed: set[str] = set()
+    fills: list[Trade] = []
+    for symbol, side, quantity in orders:
+        quote = quotes[symbol]
+        if not quote:
+            results.append(("rejected", None, f"No price data for {symbol}"))
+            continue
+
+        price = quote["price"]
+        total = round(price * quantity, 2)
+        position = held.get(symbol)
+
+        if side == "BUY":
+            if cash < total:
+                results.append(("rejected", None, f"Insufficient cash. Need ${total:.2f}, have ${cash:.2f}"))
+                continue
+
+            cash = round(cash - total, 2)
+            if position:
+                new_total_cost = position["total_cost"] + total
+                new_quantity = position["quantity"] + quantity
+                position["avg_cost_basis"] = round(new_total_cost / new_quantity, 4)
+                position["total_cost"] = round(new_total_cost, 2)
+                position["quantity"] = new_quantity
+            else:
+                held[symbol] = {
+                    "symbol": symbol,
+                    "quantity": quantity,
+                    "avg_cost_basis": price,
+                    "total_cost": total,
+                    "realized_pnl": 0.0,
+                }
+
+        else:
+            if not position or position["quantity"] < quantity:
+                available = position["quantity"] if position else 0
+                results.append(("rejected", None, f"Insufficient shares. Have {available}, trying to sell {quantity}"))
+                continue
+
+            realized = round((price - position["avg_cost_basis"]) * quantity, 2)
+            position["realized_pnl"] = round(position["realized_pnl"] + realized, 2)
+            position["quantity"] -= quantity
+            position["total_cost"] = round(position["avg_cost_basis"] * position["quantity"], 2)
+            cash = round(cash + total, 2)
+
+        changed.add(symbol)
+        trade = Trade(id=uuid.uuid4(), user_id=user_id, symbol=symbol, side=side, quantity=quantity, price=price, total=total)
+        fills.append(trade)
+        results.append(("filled", trade, None))
+
+    rejected = len(fills) < len(orders)
+    if not fills or (atomic and rejected):
+        # Nothing to write; release the row locks
+        await db.commit()
+        if atomic and rejected:
+            results = [(status, None, error) if status == "rejected" else ("cancelled", None, None) for status, _, error in results]
+        return results, starting_cash
+
+    await db.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(cash_balance=cash, updated_at=func.now())
+        .execution_options(synchronize_session=False)
+    )
+
+    position_upsert = pg_insert(Position.__table__).values([
+        {
+            "id": uuid.uuid4(),
+            "user_id": user_id,
+            "symbol": symbol,
+            "quantity": held[symbol]["quantity"],
+            "avg_cost_basis": held[symbol]["avg_cost_basis"],
+            "total_cost": held[symbol]["total_cost"],
+            "realized_pnl": held[symbol]["realized_pnl"],
+        }
+        for symbol in changed
+    ])
+    await db.execute(
+        position_upsert.on_conflict_do_update(
+            constraint="uq_position_user_symbol",
+            set_={
+                "quantity": position_upsert.excluded.quantity,
+                "avg_cost_basis": position_upsert.excluded.avg_cost_basis,
+                "total_cost": position_upsert.excluded.total_cost,
+                "realized_pnl": position_upsert.excluded.realized_pnl,
+                "updated_at": func.now(),
+            },
+        )
+    )
+
+    inserted = await db.execute(
+        insert(Trade.__table__)
+        .values([
+            {
+                "id": t.id,
+                "user_id": t.user_id,
+                "symbol": t.symbol,
+                "side": t.side,
+                "quantity": t.quantity,
+                "price": t.price,
+                "total": t.total,
+            }
+            for t in fills
+        ])
+        .returning(Trade.__table__.c.id, Trade.__table__.c.executed_at)
+    )
+    executed_at = dict(inserted.all())
+    await _commit_trades(db, user_id, [
+        (
+            symbol,
+            held[symbol]["quantity"],
+            held[symbol]["avg_cost_basis"],
+            held[symbol]["total_cost"],
+            held[symbol]["realized_pnl"],
+        )
+        for symbol in changed
+    ])
+    set_committed_value(user, "cash_balance", cash)
+
+    for trade in fills:
+        trade.executed_at = executed_at[trade.id]
+    return results, cash
+
+
+async def list_trades(
+    db: AsyncSession,
+    user_id: uuid.UUID,
+    limit: int,
+    before: tuple[datetime, uuid.UUID] | None = None,
+) -> list[Trade]:
+    """A user's trades newest first, starting after the (executed_at, id) key.
+
+    Seeks straight to the key on ix_trades_user_executed, so any page costs
+    the same however deep it is.
+    """
+    query = select(Trade).where(Trade.user_id == user_id)
+    # The plain upper bounds are redundant, but they prune the partitions
+    # newer than the page (empty future months at first), which can't be
+    # inferred from the row comparison. Scanning newest first, later
+    # partitions are only touched if the page runs into them.
+    if before is None:
+        query = query.where(Trade.executed_at <= func.now())
+    else:
+        query = query.where(Trade.executed_at <= before[0], tuple_(Trade.executed_at, Trade.id) < tuple_(*before))
+    result = await db.execute(query.order_by(Trade.executed_at.desc(), Trade.id.desc()).limit(limit))
+    return list(result.scalars().all())
+
+
+async def stream_trades(user_id: uuid.UUID, batch_size: int = 2000) -> AsyncIterator[list]:
+    """Yield all of a user's trades newest first, batch_size rows at a time.
+
+    Rows come from a server-side cursor, so memory use doesn't grow with the
+    size of the history. Uses its own session because a streaming response
+    outlives the request's.
+    """
+    trades = Trade.__table__.c
+    async with read_session(user_id) as db:
+        result = await db.stream(
+            select(trades.id, trades.symbol, trades.side, trades.quantity, trades.price, trades.total, trades.executed_at)
+            .where(trades.user_id == user_id)
+            .order_by(trades.executed_at.desc(), trades.id.desc())
+            .execution_options(yield_per=batch_size)
+        )
+        async for rows in result.partitions():
+            yield rows
+
+
+async def count_trades(user_id: uuid.UUID) -> int:
+    key = str(user_id)
+    cached = _trade_counts.get(key)
+    if isinstance(cached, int):
+        return cached
+
+    # Mark the count in progress; a trade meanwhile drops the marker and the
+    # possibly stale total isn't cached
+    marker = None
+    if cached is None:
+        marker = object()
+        _trade_counts.set(key, marker)
+    # Counted on the primary: the cache is shared, so a lagging replica's
+    # count would be served to every later request
+    async with AsyncSessionLocal() as db:
+        total = (
+            await db.execute(select(func.count()).select_from(Trade).where(Trade.user_id == user_id))
+        ).scalar() or 0
+    if marker is not None and _trade_counts.get(key) is marker:
+        _trade_counts.set(key, total)
+    return total
+
+
+def _on_positions_changed(payload: dict):
+    _trade_counts.pop(payload["user_id"])
+
+
+async def start():
+    # Trades executed on other workers
+    event_service.on_broadcast("positions_changed", _on_positions_changed)
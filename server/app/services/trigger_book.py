@@ -0,0 +1,148 @@
+import asyncio
+import logging
+import uuid
+from collections.abc import Awaitable, Callable, Iterable
+
+from app.services import event_service, finnhub_service
+from app.utils.price_index import PriceTriggerIndex
+
+logger = logging.getLogger(__name__)
+
+
+class TriggerBook:
+    """Price-triggered items (resting orders, alerts) held in every worker's memory.
+
+    Items are dicts with at least "id" and "symbol". The owning service says
+    at which (level, fires) each item triggers, what to do once it does, and
+    how to load one by id. A tick that crosses an item takes it out of the
+    book and queues it for the handler; if the handler raises, the item goes
+    back in the book so the next crossing tick retries it.
+
+    Every worker holds every item, so handlers must claim an item in the
+    database before acting on it. Workers keep their books in step through
+    "<name>_opened" and "<name>_closed" broadcasts.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        levels: Callable[[dict], list[tuple[float, str]]],
+        handle: Callable[[dict, float], Awaitable[None]],
+        load: Callable[[uuid.UUID], Awaitable[dict | None]],
+    ):
+        self.name = name
+        self._levels = levels
+        self._handle = handle
+        self._load = load
+        self._index = PriceTriggerIndex()
+        self._items: dict[uuid.UUID, dict] = {}  # item id -> what the handler needs
+        self._queue: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+        self._subscriptions: set[asyncio.Task] = set()
+
+    def index(self, item: dict):
+        """Put an item in the book without checking the current price."""
+        for level, fires in self._levels(item):
+            self._index.add(item["id"], item["symbol"], level, fires)
+        self._items[item["id"]] = item
+
+    def add(self, item: dict):
+        """Index an item and trigger it right away if the price already crossed."""
+        self.index(item)
+        quote = finnhub_service.get_quote(item["symbol"])
+        if quote:
+            self._match(item["symbol"], quote["price"])
+
+    async def open(self, item: dict):
+        """Start watching a new item, on this worker and the others."""
+        await finnhub_service.subscribe(item["symbol"])
+        self.add(item)
+        await event_service.broadcast(f"{self.name}_opened", {"id": str(item["id"])})
+
+    def remove(self, item_id: uuid.UUID):
+        self._index.remove(item_id)
+        self._items.pop(item_id, None)
+
+    async def close(self, item_id: uuid.UUID):
+        """Stop watching an item that was filled, triggered or cancelled, on every worker."""
+        self.remove(item_id)
+        await event_service.broadcast(f"{self.name}_closed", {"id": str(item_id)})
+
+    def _match(self, symbol: str, price: float):
+        for item_id in self._index.match(symbol, price):
+            item = self._items.pop(item_id, None)
+            if item and self._queue is not None:
+                self._queue.put_nowait((item, price))
+
+    async def _run(self):
+        while True:
+            item, price = await self._queue.get()
+            try:
+                await self._handle(item, price)
+            except Exception as e:
+                logger.error(f"Failed to handle {self.name} {item['id']}: {e}")
+                # Whatever the handler claimed rolled back with the failure, so
+                # the item is still open; the next crossing tick retries it
+                self.index(item)
+
+    async def _subscribe_all(self, symbols: set[str]):
+        for symbol in symbols:
+            await finnhub_service.subscribe(symbol)
+
+    async def _load_opened(self, item_id: uuid.UUID):
+        item = await self._load(item_id)
+        if item is not None and item_id not in self._items:
+            await finnhub_service.subscribe(item["symbol"])
+            self.add(item)
+
+    def _track(self, task: asyncio.Task):
+        self._subscriptions.add(task)
+        task.add_done_callback(self._subscriptions.discard)
+
+    def _on_opened(self, payload: dict):
+        # Items opened on other workers
+        self._track(asyncio.create_task(self._load_opened(uuid.UUID(payload["id"]))))
+
+    def _on_closed(self, payload: dict):
+        self.remove(uuid.UUID(payload["id"]))
+
+    async def start(self, items: Iterable[dict]) -> int:
+        """Load the open items and start handling them. Returns how many were loaded."""
+        self._queue = asyncio.Queue()
+        finnhub_service.add_tick_listener(self._match)
+        event_service.on_broadcast(f"{self.name}_opened", self._on_opened)
+        event_service.on_broadcast(f"{self.name}_closed", self._on_closed)
+
+        items = list(items)
+        for item in items:
+            self._items[item["id"]] = item
+        # One sort per book rather than an insort per level
+        self._index.load(
+            (item["id"], item["symbol"], level, fires) for item in items for level, fires in self._levels(item)
+        )
+        symbols = {item["symbol"] for item in items}
+        # Trigger whatever the current prices already crossed
+        for symbol in symbols:
+            quote = finnhub_service.get_quote(symbol)
+            if quote:
+                self._match(symbol, quote["price"])
+
+        self._task = asyncio.create_task(self._run())
+        # Items only trigger on ticks for their symbol
+        self._track(asyncio.create_task(self._subscribe_all(symbols)))
+        return len(items)
+
+    async def stop(self):
+        for task in self._subscriptions:
+            task.cancel()
+        await asyncio.gather(*self._subscriptions, return_exceptions=True)
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def __contains__(self, item_id: uuid.UUID) -> bool:
+        return item_id in self._items
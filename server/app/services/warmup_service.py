@@ -0,0 +1,102 @@
+import asyncio
+import logging
+import time
+
+from sqlalchemy import text
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.services import finnhub_service
+
+logger = logging.getLogger(__name__)
+
+# Pause between REST seeds: short while warming up the priority symbols, then
+# the sustained Finnhub free-tier rate (60/min) for the rest
+PRIORITY_SEED_INTERVAL = 0.1
+SEED_INTERVAL = 1.0
+
+# Every symbol some user watches or holds, most widely used first
+_RANKED_SYMBOLS = text("""
+    SELECT symbol, count(*) AS users
+    FROM (
+        SELECT user_id, symbol FROM watchlists
+        UNION
+        SELECT user_id, symbol FROM positions WHERE quantity > 0
+    ) used
+    GROUP BY symbol
+    ORDER BY users DESC, symbol
+""")
+
+_progress = {
+    "ready": False,
+    "symbols": 0,  # subscribed by the warmup
+    "priority": 0,  # seeded before reporting ready
+    "seeded": 0,
+    "started_at": None,
+    "ready_at": None,
+}
+_task: asyncio.Task | None = None
+
+
+def progress() -> dict:
+    return dict(_progress)
+
+
+def _ready():
+    _progress["ready"] = True
+    _progress["ready_at"] = time.time()
+    logger.info(
+        f"Warmup ready: {_progress['seeded']} of {_progress['symbols']} symbols seeded "
+        f"in {_progress['ready_at'] - _progress['started_at']:.1f}s"
+    )
+
+
+async def _warmup():
+    _progress["started_at"] = time.time()
+    try:
+        async with AsyncSessionLocal() as db:
+            ranked = [symbol for symbol, _ in (await db.execute(_RANKED_SYMBOLS)).all()]
+    except Exception as e:
+        # Don't hold readiness on it; users' symbols still subscribe lazily
+        logger.error(f"Failed to load symbols for warmup: {e}")
+        ranked = []
+
+    # The dashboard's symbols are on every page load, so they go first
+    symbols = list(dict.fromkeys(finnhub_service.DEFAULT_SYMBOLS + ranked))
+    for symbol in symbols:
+        await finnhub_service.subscribe(symbol, seed=False)
+    _progress["symbols"] = len(symbols)
+
+    if not finnhub_service.rest_enabled():
+        _ready()
+        return
+
+    unseeded = [symbol for symbol in symbols if not finnhub_service.get_quote(symbol)]
+    _progress["priority"] = min(len(unseeded), settings.warmup_priority_seeds)
+    for i, symbol in enumerate(unseeded):
+        if i == _progress["priority"]:
+            _ready()
+        # A tick may have arrived over the websocket meanwhile
+        if not finnhub_service.get_quote(symbol):
+            await finnhub_service.seed_from_rest(symbol)
+            await asyncio.sleep(PRIORITY_SEED_INTERVAL if i < _progress["priority"] else SEED_INTERVAL)
+        _progress["seeded"] += 1
+    if not _progress["ready"]:
+        _ready()
+
+
+async def start():
+    """Subscribe and seed quotes for symbols users watch or hold, in the background."""
+    global _task
+    _task = asyncio.create_task(_warmup())
+
+
+async def stop():
+    global _task
+    if _task:
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+        _task = None
@@ -0,0 +1,135 @@
+import logging
+import re
+import time
+
+from sqlalchemy import event, exc
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.util.queue import AsyncAdaptedQueue
+
+from app.config import settings
+from app.utils import timing
+from app.utils.metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds; checkouts are usually instant, so start finer
+WAIT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Log a given slow statement at most this often
+SLOW_QUERY_LOG_INTERVAL_SECONDS = 10
+
+_checkout_wait = Histogram(WAIT_BUCKETS)
+_query_duration = Histogram(WAIT_BUCKETS)
+_timeouts = 0
+_slow_queries = 0
+_slow_logged: dict[str, tuple[float, int]] = {}  # statement -> (last logged, suppressed since)
+
+
+class _TimedQueue(AsyncAdaptedQueue):
+    """The pool's queue of idle connections, timing how long each get waits."""
+
+    def get(self, block: bool = True, timeout: float | None = None):
+        started = time.perf_counter()
+        try:
+            return super().get(block, timeout)
+        finally:
+            waited = time.perf_counter() - started
+            _checkout_wait.observe(waited)
+            timing.add_db_wait(waited)
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """The default asyncio pool, timing waits for a free connection and counting timeouts.
+
+    Only the wait in the queue is timed; opening new connections, recycling
+    and the pre-ping happen outside it.
+    """
+
+    _queue_class = _TimedQueue
+
+    def connect(self):
+        global _timeouts
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            _timeouts += 1
+            raise
+
+
+_LITERALS = [
+    (re.compile(r"'(?:[^']|'')*'"), "?"),  # strings
+    (re.compile(r"\$\d+"), "?"),  # bind parameters
+    (re.compile(r"\b\d+(?:\.\d+)?\b"), "?"),  # numbers
+    (re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)"), "(?)"),  # IN lists and VALUES rows of any width
+    (re.compile(r"\(\?\)(?:\s*,\s*\(\?\))+"), "(?), ..."),  # any number of VALUES rows
+    (re.compile(r"\s+"), " "),
+]
+
+
+def normalize(statement: str) -> str:
+    """The statement with literals and list lengths folded, so repeats group together."""
+    for pattern, replacement in _LITERALS:
+        statement = pattern.sub(replacement, statement)
+    return statement.strip()
+
+
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    context._started = time.perf_counter()
+
+
+def _after_execute(conn, cursor, statement, parameters, context, executemany):
+    global _slow_queries
+    elapsed = time.perf_counter() - context._started
+    _query_duration.observe(elapsed)
+    timing.add_db_query(elapsed)
+    if elapsed * 1000 < settings.slow_query_ms:
+        return
+
+    _slow_queries += 1
+    normalized = normalize(statement)
+    now = time.monotonic()
+    last_logged, suppressed = _slow_logged.get(normalized, (0.0, 0))
+    if now - last_logged < SLOW_QUERY_LOG_INTERVAL_SECONDS:
+        _slow_logged[normalized] = (last_logged, suppressed + 1)
+        return
+    if len(_slow_logged) >= 1000:
+        _slow_logged.clear()
+    _slow_logged[normalized] = (now, 0)
+    repeats = f" ({suppressed} more since last logged)" if suppressed else ""
+    logger.warning(f"Slow query {elapsed * 1000:.0f}ms{repeats}: {normalized}")
+
+
+def instrument_engine(engine: AsyncEngine):
+    """Time every statement for the slow-query log, metrics and the running request."""
+    event.listen(engine.sync_engine, "before_cursor_execute", _before_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", _after_execute)
+
+
+def render_metrics(engines: dict[str, AsyncEngine]) -> str:
+    """Pool gauges per engine (e.g. primary, replica) and statement stats across all."""
+    gauges = {
+        "db_pool_size": ("Connections the pool keeps open.", lambda pool: pool.size()),
+        "db_pool_checked_out": ("Connections in use.", lambda pool: pool.checkedout()),
+        "db_pool_overflow": ("Connections open beyond the pool size.", lambda pool: max(pool.overflow(), 0)),
+    }
+    lines = []
+    for name, (help_text, read) in gauges.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} gauge")
+        for label, engine in engines.items():
+            lines.append(f'{name}{{pool="{label}"}} {read(engine.pool)}')
+    lines += [
+        "# HELP db_pool_timeouts_total Checkouts that gave up waiting for a connection.",
+        "# TYPE db_pool_timeouts_total counter",
+        f"db_pool_timeouts_total {_timeouts}",
+        "# HELP db_pool_checkout_wait_seconds Time spent waiting for an idle connection in the pool.",
+        "# TYPE db_pool_checkout_wait_seconds histogram",
+        *_checkout_wait.lines("db_pool_checkout_wait_seconds"),
+        "# HELP db_query_duration_seconds Statement execution time.",
+        "# TYPE db_query_duration_seconds histogram",
+        *_query_duration.lines("db_query_duration_seconds"),
+        "# HELP db_slow_queries_total Statements slower than SLOW_QUERY_MS.",
+        "# TYPE db_slow_queries_total counter",
+        f"db_slow_queries_total {_slow_queries}",
+    ]
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,28 @@
+import hashlib
+import os
+
+from fastapi import Request, Response
+
+# Versions are counted per process, so tags issued by another worker or an
+# earlier run must never match here; they miss and get a full response
+_EPOCH = os.urandom(8).hex()
+
+
+def make_etag(*parts) -> str:
+    """A strong ETag for a response that's fully determined by parts."""
+    digest = hashlib.blake2b(repr((_EPOCH, parts)).encode(), digest_size=12).hexdigest()
+    return f'"{digest}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # Weak comparison, as If-None-Match calls for
+    return etag in {tag.strip().removeprefix("W/") for tag in header.split(",")}
+
+
+def not_modified(etag: str, cache_control: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
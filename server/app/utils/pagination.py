@@ -0,0 +1,18 @@
+import base64
+import uuid
+from datetime import datetime
+
+
+def encode_cursor(executed_at: datetime, row_id: uuid.UUID) -> str:
+    """Opaque cursor for the row a keyset page ended on."""
+    raw = f"{executed_at.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, uuid.UUID] | None:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        executed_at, row_id = raw.split("|")
+        return datetime.fromisoformat(executed_at), uuid.UUID(row_id)
+    except ValueError:
+        return None
@@ -0,0 +1,81 @@
+import bisect
+import itertools
+from collections.abc import Hashable, Iterable
+
+
+class PriceTriggerIndex:
+    """Per-symbol price levels that fire once a tick crosses them.
+
+    Each symbol has two lists of (key, seq, item_id) kept sorted by key and
+    laid out so the entries a tick fires are always a suffix:
+      "below" fires once price <= level, key = level
+      "above" fires once price >= level, key = -level
+    Matching is a bisect plus slicing off the fired tail, O(log n + fired),
+    and a tick that crosses nothing costs one comparison per list.
+
+    An item may have several levels (e.g. a band around a price); it fires
+    on the first one crossed and its other levels are dropped.
+    """
+
+    def __init__(self):
+        self._books: dict[str, dict[str, list[tuple[float, int, Hashable]]]] = {}
+        self._entries: dict[Hashable, list[tuple[str, str, tuple]]] = {}
+        self._seq = itertools.count()
+
+    def add(self, item_id: Hashable, symbol: str, level: float, fires: str):
+        key = level if fires == "below" else -level
+        entry = (key, next(self._seq), item_id)
+        books = self._books.setdefault(symbol, {"below": [], "above": []})
+        bisect.insort(books[fires], entry)
+        self._entries.setdefault(item_id, []).append((symbol, fires, entry))
+
+    def load(self, levels: Iterable[tuple[Hashable, str, float, str]]):
+        """Add many (item_id, symbol, level, fires) at once, sorting each book once."""
+        touched = set()
+        for item_id, symbol, level, fires in levels:
+            key = level if fires == "below" else -level
+            entry = (key, next(self._seq), item_id)
+            book = self._books.setdefault(symbol, {"below": [], "above": []})[fires]
+            book.append(entry)
+            touched.add((symbol, fires))
+            self._entries.setdefault(item_id, []).append((symbol, fires, entry))
+        for symbol, fires in touched:
+            self._books[symbol][fires].sort()
+
+    def remove(self, item_id: Hashable) -> bool:
+        entries = self._entries.pop(item_id, None)
+        if not entries:
+            return False
+        for symbol, fires, entry in entries:
+            book = self._books[symbol][fires]
+            i = bisect.bisect_left(book, entry)
+            if i < len(book) and book[i] == entry:
+                del book[i]
+        return True
+
+    def match(self, symbol: str, price: float) -> list[Hashable]:
+        books = self._books.get(symbol)
+        if not books:
+            return []
+
+        fired: list[Hashable] = []
+        for fires, threshold in (("below", price), ("above", -price)):
+            book = books[fires]
+            if not book or book[-1][0] < threshold:
+                continue
+            i = bisect.bisect_left(book, (threshold,))
+            for _, _, item_id in book[i:]:
+                fired.append(item_id)
+            del book[i:]
+
+        # Drop the remaining levels of anything that fired
+        fired = list(dict.fromkeys(fired))
+        for item_id in fired:
+            self.remove(item_id)
+        return fired
+
+    def __contains__(self, item_id: Hashable) -> bool:
+        return item_id in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
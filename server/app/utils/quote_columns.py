@@ -0,0 +1,112 @@
+import itertools
+import os
+import struct
+
+import numpy as np
+
+MAGIC = b"PQS1"
+# magic, count, snapshot version, symbol block length
+_HEADER = struct.Struct("<4sIQI")
+
+
+class QuoteColumns:
+    """Latest quotes as parallel NumPy columns, for bulk binary snapshots.
+
+    Every update stamps the symbol with the next value of one process-wide
+    version counter, so "what changed since version v" is a comparison over
+    the version column, and a full snapshot is a straight copy of the column
+    buffers.
+
+    Snapshot layout, little-endian, columns 8-byte aligned:
+      header    magic "PQS1", uint32 count, uint64 version, uint32 symbols_len
+      symbols   symbols_len bytes of UTF-8 symbols joined by "\\n", zero-padded to 8
+      price     float64[count]
+      volume    int64[count]
+      timestamp int64[count]  (ms)
+      versions  int64[count]  (each quote's version)
+    """
+
+    def __init__(self, capacity: int = 256):
+        self.epoch = os.urandom(8).hex()  # versions mean nothing across processes
+        self.version = 0
+        self.symbols: list[str] = []
+        self.index: dict[str, int] = {}
+        self.price = np.zeros(capacity, dtype="<f8")
+        self.volume = np.zeros(capacity, dtype="<i8")
+        self.timestamp = np.zeros(capacity, dtype="<i8")
+        self.versions = np.zeros(capacity, dtype="<i8")
+        self._versions = itertools.count(1)
+        self._symbol_block: bytes | None = None
+
+    def update(self, symbol: str, price: float, volume: int, timestamp: int) -> int:
+        i = self.index.get(symbol)
+        if i is None:
+            i = self._append(symbol)
+        self.version = next(self._versions)
+        self.price[i] = price
+        self.volume[i] = volume
+        self.timestamp[i] = timestamp
+        self.versions[i] = self.version
+        return self.version
+
+    def version_of(self, symbol: str) -> int:
+        i = self.index.get(symbol)
+        return int(self.versions[i]) if i is not None else 0
+
+    def _append(self, symbol: str) -> int:
+        i = len(self.symbols)
+        if i == len(self.price):
+            for name in ("price", "volume", "timestamp", "versions"):
+                column = getattr(self, name)
+                grown = np.zeros(2 * len(column), dtype=column.dtype)
+                grown[:i] = column
+                setattr(self, name, grown)
+        self.index[symbol] = i
+        self.symbols.append(symbol)
+        self._symbol_block = None
+        return i
+
+    def snapshot(self, symbols: list[str] | None = None, since_version: int = 0) -> bytes:
+        """Packed quotes for the given symbols (default all) updated after since_version."""
+        n = len(self.symbols)
+        if symbols is None and since_version <= 0:
+            # The common full pull: cached symbol block plus column copies
+            if self._symbol_block is None:
+                self._symbol_block = "\n".join(self.symbols).encode()
+            return self._pack(self._symbol_block, slice(0, n), n)
+
+        if symbols is None:
+            rows = np.arange(n)
+        else:
+            rows = np.array([self.index[s] for s in symbols if s in self.index], dtype=np.int64)
+        if since_version > 0:
+            rows = rows[self.versions[rows] > since_version]
+        block = "\n".join(self.symbols[i] for i in rows).encode()
+        return self._pack(block, rows, len(rows))
+
+    def _pack(self, block: bytes, rows, count: int) -> bytes:
+        padding = b"\0" * (-(_HEADER.size + len(block)) % 8)
+        return b"".join((
+            _HEADER.pack(MAGIC, count, self.version, len(block)),
+            block,
+            padding,
+            self.price[rows].tobytes(),
+            self.volume[rows].tobytes(),
+            self.timestamp[rows].tobytes(),
+            self.versions[rows].tobytes(),
+        ))
+
+
+def decode_snapshot(body: bytes) -> dict:
+    """Reference reader for QuoteColumns.snapshot; the columns are zero-copy views."""
+    magic, count, version, symbols_len = _HEADER.unpack_from(body)
+    if magic != MAGIC:
+        raise ValueError("Not a quote snapshot")
+    offset = _HEADER.size
+    symbols = body[offset:offset + symbols_len].decode().split("\n") if count else []
+    offset += symbols_len + (-(offset + symbols_len) % 8)
+    columns = {}
+    for name, dtype in (("price", "<f8"), ("volume", "<i8"), ("timestamp", "<i8"), ("versions", "<i8")):
+        columns[name] = np.frombuffer(body, dtype=dtype, count=count, offset=offset)
+        offset += 8 * count
+    return {"version": version, "symbols": symbols, **columns}
@@ -1,22 +1,247 @@
+import asyncio
+import logging
 import time
-from collections import defaultdict
+import uuid
+from datetime import datetime, timezone
 
+from sqlalchemy import case, delete, func, literal, select, text
+from sqlalchemy.dialects.postgresql import insert
+
+from app.config import settings
+from app.database import engine
+from app.models.rate_limit import RateLimit
+
+logger = logging.getLogger(__name__)
+
+EVICTION_INTERVAL = 60  # seconds between sweeps of idle keys
+# Arbitrary advisory lock namespace for lease groups; the group name is the
+# second key, so acquires only wait on others for the same group
+_LEASE_LOCK = 0x5E0A_0003
+
+_LOCK_LEASE_GROUP = text("SELECT pg_advisory_xact_lock(:namespace, hashtext(:group))")
 
-class RateLimiter:
-    def __init__(self, max_requests: int, window_seconds: int):
-        self.max_requests = max_requests
-        self.window_seconds = window_seconds
-        self._requests: dict[str, list[float]] = defaultdict(list)
 
-    def is_allowed(self, key: str) -> bool:
+class MemoryBackend:
+    """Per-process counters. Limits are enforced independently by each worker."""
+
+    def __init__(self):
+        # key -> [window_index, prev_count, curr_count, expires_at]
+        self._entries: dict[str, list] = {}
+        self._leases: dict[str, dict[str, float]] = {}  # group -> lease id -> expires_at
+
+    async def hit(self, key: str, max_requests: int, window_seconds: int) -> bool:
         now = time.time()
-        window_start = now - self.window_seconds
-        self._requests[key] = [t for t in self._requests[key] if t > window_start]
-        if len(self._requests[key]) >= self.max_requests:
+        window = int(now // window_seconds)
+        entry = self._entries.get(key)
+
+        if entry is None or entry[3] <= now or entry[0] < window - 1:
+            prev, curr = 0, 0
+        elif entry[0] == window - 1:
+            prev, curr = entry[2], 0
+        else:
+            prev, curr = entry[1], entry[2]
+
+        # Sliding-window estimate: the previous window's count is weighted by
+        # how much of it still overlaps the trailing window.
+        weight = 1 - (now - window * window_seconds) / window_seconds
+        if prev * weight + curr >= max_requests:
             return False
-        self._requests[key].append(now)
+
+        self._entries[key] = [window, prev, curr + 1, (window + 2) * window_seconds]
         return True
 
+    async def acquire_lease(self, group: str, lease_id: str, max_leases: int, ttl_seconds: int) -> bool:
+        now = time.time()
+        leases = {lease: expires for lease, expires in self._leases.get(group, {}).items() if expires > now}
+        if len(leases) >= max_leases:
+            self._leases[group] = leases
+            return False
+        leases[lease_id] = now + ttl_seconds
+        self._leases[group] = leases
+        return True
+
+    async def renew_lease(self, group: str, lease_id: str, ttl_seconds: int):
+        self._leases.setdefault(group, {})[lease_id] = time.time() + ttl_seconds
+
+    async def release_lease(self, group: str, lease_id: str):
+        leases = self._leases.get(group)
+        if leases is not None:
+            leases.pop(lease_id, None)
+            if not leases:
+                del self._leases[group]
+
+    async def evict_expired(self) -> int:
+        now = time.time()
+        expired = [key for key, entry in self._entries.items() if entry[3] <= now]
+        for key in expired:
+            del self._entries[key]
+        for group, leases in list(self._leases.items()):
+            live = {lease: expires for lease, expires in leases.items() if expires > now}
+            expired.extend(leases.keys() - live.keys())
+            if live:
+                self._leases[group] = live
+            else:
+                del self._leases[group]
+        return len(expired)
+
+
+class PostgresBackend:
+    """Counters stored in the rate_limits table and shared by every worker.
+
+    Each check is a single atomic upsert, so concurrent workers can't both
+    slip under the limit. Leases are one row each, keyed "<group>:<lease id>".
+    """
+
+    async def hit(self, key: str, max_requests: int, window_seconds: int) -> bool:
+        now = time.time()
+        window = int(now // window_seconds)
+        weight = 1 - (now - window * window_seconds) / window_seconds
+        expires_at = datetime.fromtimestamp((window + 2) * window_seconds, tz=timezone.utc)
+
+        table = RateLimit.__table__
+        stale = table.c.expires_at <= func.now()
+        prev = case(
+            (stale, 0),
+            (table.c.window_index == window, table.c.prev_count),
+            (table.c.window_index == window - 1, table.c.curr_count),
+            else_=0,
+        )
+        curr = case(
+            (stale, 0),
+            (table.c.window_index == window, table.c.curr_count),
+            else_=0,
+        )
+        stmt = (
+            insert(table)
+            .values(key=key, window_index=window, prev_count=0, curr_count=1, expires_at=expires_at)
+            .on_conflict_do_update(
+                index_elements=[table.c.key],
+                set_={"window_index": window, "prev_count": prev, "curr_count": curr + 1, "expires_at": expires_at},
+                where=prev * weight + curr < max_requests,
+            )
+            .returning(table.c.curr_count)
+        )
+        async with engine.begin() as conn:
+            result = await conn.execute(stmt)
+            return result.first() is not None
+
+    async def acquire_lease(self, group: str, lease_id: str, max_leases: int, ttl_seconds: int) -> bool:
+        table = RateLimit.__table__
+        expires_at = datetime.fromtimestamp(time.time() + ttl_seconds, tz=timezone.utc)
+        pattern = group.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + ":%"
+        live = (
+            select(func.count())
+            .select_from(table)
+            .where(table.c.key.like(pattern), table.c.expires_at > func.now())
+            .scalar_subquery()
+        )
+        stmt = insert(table).from_select(
+            ["key", "window_index", "prev_count", "curr_count", "expires_at"],
+            select(literal(f"{group}:{lease_id}"), literal(0), literal(0), literal(1), literal(expires_at))
+            .where(live < max_leases),
+        )
+        async with engine.begin() as conn:
+            # Serializes acquires for the group, so two can't both see a free slot
+            await conn.execute(_LOCK_LEASE_GROUP, {"namespace": _LEASE_LOCK, "group": group})
+            result = await conn.execute(stmt)
+            return result.rowcount > 0
+
+    async def renew_lease(self, group: str, lease_id: str, ttl_seconds: int):
+        table = RateLimit.__table__
+        expires_at = datetime.fromtimestamp(time.time() + ttl_seconds, tz=timezone.utc)
+        stmt = (
+            insert(table)
+            .values(key=f"{group}:{lease_id}", window_index=0, prev_count=0, curr_count=1, expires_at=expires_at)
+            .on_conflict_do_update(index_elements=[table.c.key], set_={"expires_at": expires_at})
+        )
+        async with engine.begin() as conn:
+            await conn.execute(stmt)
+
+    async def release_lease(self, group: str, lease_id: str):
+        async with engine.begin() as conn:
+            await conn.execute(delete(RateLimit).where(RateLimit.key == f"{group}:{lease_id}"))
+
+    async def evict_expired(self) -> int:
+        async with engine.begin() as conn:
+            result = await conn.execute(delete(RateLimit).where(RateLimit.expires_at <= func.now()))
+            return result.rowcount
+
+
+class RateLimiter:
+    """Sliding-window counter: O(1) state and work per key."""
+
+    def __init__(self, name: str, max_requests: int, window_seconds: int):
+        self.name = name
+        self.max_requests = max_requests
+        self.window_seconds = window_seconds
+
+    async def is_allowed(self, key: str) -> bool:
+        return await backend.hit(f"{self.name}:{key}", self.max_requests, self.window_seconds)
+
+
+class ConcurrencyLimiter:
+    """Caps how many leases a key may hold at once.
+
+    Each lease is tracked on its own; holders must refresh theirs periodically,
+    and a lease left behind by a worker that died expires after lease_seconds
+    whatever the key's other leases do.
+    """
+
+    def __init__(self, name: str, max_concurrent: int, lease_seconds: int):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.lease_seconds = lease_seconds
+
+    async def acquire(self, key: str) -> str | None:
+        """Take a lease, returning its id, or None if the key holds too many."""
+        lease_id = uuid.uuid4().hex
+        if not await backend.acquire_lease(f"{self.name}:{key}", lease_id, self.max_concurrent, self.lease_seconds):
+            return None
+        return lease_id
+
+    async def refresh(self, key: str, lease_id: str):
+        await backend.renew_lease(f"{self.name}:{key}", lease_id, self.lease_seconds)
+
+    async def release(self, key: str, lease_id: str):
+        await backend.release_lease(f"{self.name}:{key}", lease_id)
+
+
+def _create_backend() -> MemoryBackend | PostgresBackend:
+    if settings.rate_limit_backend == "postgres":
+        return PostgresBackend()
+    return MemoryBackend()
+
+
+backend = _create_backend()
+_task: asyncio.Task | None = None
+
+otp_send_limiter = RateLimiter("otp_send", max_requests=3, window_seconds=1200)
+otp_verify_limiter = RateLimiter("otp_verify", max_requests=5, window_seconds=1200)
+stream_limiter = ConcurrencyLimiter("stream", max_concurrent=3, lease_seconds=60)
+
+
+async def _evict_loop():
+    while True:
+        await asyncio.sleep(EVICTION_INTERVAL)
+        try:
+            evicted = await backend.evict_expired()
+            if evicted:
+                logger.debug(f"Evicted {evicted} idle rate limit keys")
+        except Exception as e:
+            logger.warning(f"Rate limit eviction failed: {e}")
+
+
+async def start():
+    global _task
+    _task = asyncio.create_task(_evict_loop())
+
 
-otp_send_limiter = RateLimiter(max_requests=3, window_seconds=1200)
-otp_verify_limiter = RateLimiter(max_requests=5, window_seconds=1200)
+async def stop():
+    global _task
+    if _task:
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+        _task = None
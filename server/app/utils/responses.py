@@ -0,0 +1,24 @@
+from typing import Any
+
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from app.utils.timing import measure
+
+_any = TypeAdapter(Any)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON rendered by pydantic-core in a single pass.
+
+    The app's default response class. Routes that build their response model
+    themselves can also return one directly, e.g.
+    FastJSONResponse(TradeHistoryResponse(...)), which skips FastAPI's
+    response_model round trip: dumping the model, validating the dump against
+    the model again and running it through jsonable_encoder before json.dumps.
+    Keep response_model on the route for the OpenAPI schema.
+    """
+
+    def render(self, content: Any) -> bytes:
+        with measure("serialize"):
+            return _any.dump_json(content)
@@ -0,0 +1,75 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+
+class RequestTiming:
+    """Where one request's time went, filled in as it runs."""
+
+    __slots__ = ("started", "db", "db_queries", "db_wait", "http", "http_calls", "serialize")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db = 0.0
+        self.db_queries = 0
+        self.db_wait = 0.0
+        self.http = 0.0
+        self.http_calls = 0
+        self.serialize = 0.0
+
+    def server_timing(self) -> str:
+        """The Server-Timing header value, durations in milliseconds."""
+        total = time.perf_counter() - self.started
+        return (
+            f'db;dur={self.db * 1000:.1f};desc="{self.db_queries} queries", '
+            f'db-wait;dur={self.db_wait * 1000:.1f};desc="pool checkout", '
+            f'http;dur={self.http * 1000:.1f};desc="{self.http_calls} calls", '
+            f"serialize;dur={self.serialize * 1000:.1f}, "
+            f"total;dur={total * 1000:.1f}"
+        )
+
+
+# Set by TimingMiddleware for the duration of each request. Contexts are
+# copied into the tasks and greenlets a request's work runs in, so the
+# hooks below attribute time to the right request under concurrency.
+_current: ContextVar[RequestTiming | None] = ContextVar("request_timing", default=None)
+
+
+def begin() -> RequestTiming:
+    timing = RequestTiming()
+    _current.set(timing)
+    return timing
+
+
+@contextmanager
+def measure(kind: str):
+    """Add the block's duration to the current request's "http" or "serialize" time."""
+    timing = _current.get()
+    if timing is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        if kind == "http":
+            timing.http += elapsed
+            timing.http_calls += 1
+        else:
+            timing.serialize += elapsed
+
+
+def add_db_query(elapsed: float):
+    """Count one statement's time toward the current request, if any."""
+    timing = _current.get()
+    if timing is not None:
+        timing.db += elapsed
+        timing.db_queries += 1
+
+
+def add_db_wait(elapsed: float):
+    """Count time spent waiting on the connection pool toward the current request, if any."""
+    timing = _current.get()
+    if timing is not None:
+        timing.db_wait += elapsed
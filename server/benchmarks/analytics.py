@@ -0,0 +1,62 @@
+"""Ledger replay cost for performance analytics on a synthetic account.
+
+Needs no database: a random but valid trade ledger (no sell exceeds the
+holding) is generated and passed straight to compute_analytics.
+
+    python benchmarks/analytics.py --trades 100000 --symbols 50
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.services.analytics_service import compute_analytics  # noqa: E402
+
+
+def _ledger(trades: int, symbols: int):
+    rng = np.random.default_rng(0)
+    codes = rng.integers(0, symbols, trades)
+    names = np.array([f"S{i:03d}" for i in range(symbols)], dtype=object)[codes]
+    price = rng.uniform(50, 150, trades).round(2)
+    executed_at = 1.7e9 + np.cumsum(rng.uniform(1, 600, trades))
+
+    # Sell part of the holding about 40% of the time it's nonzero
+    is_buy = np.ones(trades, dtype=bool)
+    quantity = np.zeros(trades)
+    held = np.zeros(symbols)
+    sell = rng.random(trades) < 0.4
+    fraction = rng.uniform(0.1, 1.0, trades)
+    buy_quantity = rng.integers(1, 50, trades)
+    for i, code in enumerate(codes):
+        if sell[i] and held[code] > 0:
+            is_buy[i] = False
+            quantity[i] = max(1, int(held[code] * fraction[i]))
+            held[code] -= quantity[i]
+        else:
+            quantity[i] = buy_quantity[i]
+            held[code] += quantity[i]
+    return names, is_buy, quantity, price, executed_at
+
+
+def main(trades: int, symbols: int, repeat: int):
+    ledger = _ledger(trades, symbols)
+    compute_analytics(100_000.0, *ledger)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        analytics = compute_analytics(100_000.0, *ledger)
+    elapsed = (time.perf_counter() - start) / repeat
+    print(f"{trades:,} trades over {symbols} symbols: {elapsed * 1000:.1f} ms per replay")
+    print({key: value for key, value in analytics.items() if key != "symbols"})
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--trades", type=int, default=100_000)
+    parser.add_argument("--symbols", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+    main(args.trades, args.symbols, args.repeat)
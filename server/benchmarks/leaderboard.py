@@ -0,0 +1,86 @@
+"""In-memory leaderboard build, tick and ranking costs on synthetic accounts.
+
+Needs no database: accounts and positions are generated, valued and ranked
+directly through the Leaderboard class.
+
+    python benchmarks/leaderboard.py --accounts 1000000 --positions-per-account 5
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.services.leaderboard_service import Leaderboard  # noqa: E402
+
+
+def _timed(label: str, fn, repeat: int = 1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    elapsed = (time.perf_counter() - start) / repeat
+    print(f"{label:<40} {elapsed * 1000:9.2f} ms")
+    return result
+
+
+def main(accounts: int, positions_per_account: int, symbols: int):
+    rng = np.random.default_rng(0)
+    n_positions = accounts * positions_per_account
+    symbol_names = [f"S{i:04d}" for i in range(symbols)]
+    prices = {symbol: float(rng.uniform(10, 500)) for symbol in symbol_names}
+
+    pos_account = np.repeat(np.arange(accounts, dtype=np.int32), positions_per_account)
+    # Distinct symbols per account: offset a random start by the position index
+    pos_symbol = ((rng.integers(0, symbols, accounts).repeat(positions_per_account)
+                   + np.tile(np.arange(positions_per_account), accounts)) % symbols).astype(np.int32)
+    pos_quantity = rng.integers(1, 100, n_positions).astype(np.float64)
+    pos_cost = np.array([prices[s] for s in symbol_names])[pos_symbol] * rng.uniform(0.8, 1.2, n_positions)
+
+    board = _timed(f"build + value {accounts:,} accounts", lambda: Leaderboard(
+        [f"u{i}" for i in range(accounts)],
+        [f"Trader {i}" for i in range(accounts)],
+        np.full(accounts, 50_000.0),
+        np.full(accounts, 100_000.0),
+        symbol_names,
+        pos_account,
+        pos_symbol,
+        pos_quantity,
+        pos_cost,
+        prices,
+    ))
+
+    def tick():
+        symbol = symbol_names[int(rng.integers(symbols))]
+        board.tick(symbol, prices[symbol] * float(rng.uniform(0.99, 1.01)))
+
+    _timed(f"tick (~{n_positions // symbols:,} holders)", tick, repeat=200)
+    _timed("trade (set_account)", lambda: board.set_account(
+        f"u{int(rng.integers(accounts))}", "Trader", 40_000.0, 100_000.0, [("S0001", 10.0, 100.0)]
+    ), repeat=1000)
+
+    def rank():
+        board._ranked_at = 0.0
+        board.version += 1
+        board._rank()
+
+    _timed("re-rank all accounts", rank, repeat=10)
+    _timed("top 100 (ranked)", lambda: board.top(100), repeat=100)
+    _timed("rank of one account", lambda: board.rank_of(f"u{int(rng.integers(accounts))}"), repeat=100)
+
+    # Cross-check the incrementally maintained values against a full revaluation
+    incremental = board.values[:accounts].copy()
+    _timed("full revaluation (matrix-vector product)", board.revalue, repeat=10)
+    drift = float(np.max(np.abs(board.values[:accounts] - incremental)))
+    print(f"max drift vs full revaluation: {drift:.6f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--accounts", type=int, default=1_000_000)
+    parser.add_argument("--positions-per-account", type=int, default=5)
+    parser.add_argument("--symbols", type=int, default=500)
+    args = parser.parse_args()
+    main(args.accounts, args.positions_per_account, args.symbols)
@@ -0,0 +1,67 @@
+"""JSON /quotes/latest rendering versus the packed binary quote snapshot.
+
+Needs no database or network: a synthetic quote universe is loaded into
+QuoteColumns and rendered both ways.
+
+    python benchmarks/quote_snapshot.py --symbols 5000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from pydantic import TypeAdapter  # noqa: E402
+
+from app.schemas.market import QuoteSnapshot  # noqa: E402
+from app.utils.quote_columns import QuoteColumns, decode_snapshot  # noqa: E402
+
+
+def _timed(label: str, fn, repeat: int):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    elapsed = (time.perf_counter() - start) / repeat
+    size = f"{len(result):>10,} bytes" if isinstance(result, bytes) else ""
+    print(f"{label:<40} {elapsed * 1000:9.3f} ms {size}")
+    return result
+
+
+def main(symbols: int, changed: int, repeat: int):
+    rng = np.random.default_rng(0)
+    names = [f"S{i:05d}" for i in range(symbols)]
+    quotes = {
+        name: {"price": float(rng.uniform(10, 500)), "volume": int(rng.integers(0, 10**7)), "timestamp": 1_700_000_000_000}
+        for name in names
+    }
+    columns = QuoteColumns()
+    for name, quote in quotes.items():
+        columns.update(name, quote["price"], quote["volume"], quote["timestamp"])
+    since = columns.version
+    for name in rng.choice(names, changed, replace=False):
+        columns.update(name, quotes[name]["price"] + 0.01, quotes[name]["volume"] + 100, 1_700_000_001_000)
+
+    quote_list = TypeAdapter(list[QuoteSnapshot])
+    _timed(
+        "JSON, all symbols",
+        lambda: quote_list.dump_json([QuoteSnapshot(symbol=name, **quote) for name, quote in quotes.items()]),
+        repeat,
+    )
+    full = _timed("binary, all symbols", lambda: columns.snapshot(), repeat)
+    delta = _timed(f"binary, since_version ({changed} changed)", lambda: columns.snapshot(since_version=since), repeat)
+    _timed("decode all symbols", lambda: decode_snapshot(full), repeat)
+
+    decoded = decode_snapshot(delta)
+    assert len(decoded["symbols"]) == changed and (decoded["version"] > since)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--symbols", type=int, default=5000)
+    parser.add_argument("--changed", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    main(args.symbols, args.changed, args.repeat)
@@ -0,0 +1,84 @@
+"""Signup burst against a running server.
+
+Fires concurrent POST /api/auth/register requests (unique emails, so the
+per-email rate limit doesn't interfere) while a probe polls /api/health.
+Health latency during the burst shows how long the event loop was stalled.
+
+    python benchmarks/register_burst.py --url http://localhost:8000 --signups 200 --concurrency 20
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+import httpx
+
+
+def _summary(label: str, samples: list[float]):
+    if not samples:
+        print(f"{label}: no samples")
+        return
+    samples = sorted(samples)
+    p50 = samples[len(samples) // 2]
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    print(
+        f"{label}: n={len(samples)} mean={statistics.mean(samples):.1f}ms "
+        f"p50={p50:.1f}ms p99={p99:.1f}ms max={samples[-1]:.1f}ms"
+    )
+
+
+async def _signup(client: httpx.AsyncClient, sem: asyncio.Semaphore, latencies: list[float], errors: list[int]):
+    async with sem:
+        start = time.perf_counter()
+        resp = await client.post("/api/auth/register", json={"email": f"bench-{uuid.uuid4().hex[:12]}@example.com"})
+        latencies.append((time.perf_counter() - start) * 1000)
+        if resp.status_code != 200:
+            errors.append(resp.status_code)
+
+
+async def _probe(client: httpx.AsyncClient, stop: asyncio.Event, latencies: list[float]):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await client.get("/api/health")
+        latencies.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(0.01)
+
+
+async def main(url: str, signups: int, concurrency: int):
+    register_latencies: list[float] = []
+    health_latencies: list[float] = []
+    errors: list[int] = []
+
+    async with httpx.AsyncClient(base_url=url, timeout=30) as client, \
+            httpx.AsyncClient(base_url=url, timeout=30) as probe_client:
+        # Baseline loop responsiveness with no load
+        stop = asyncio.Event()
+        baseline: list[float] = []
+        probe = asyncio.create_task(_probe(probe_client, stop, baseline))
+        await asyncio.sleep(1)
+        stop.set()
+        await probe
+
+        stop = asyncio.Event()
+        probe = asyncio.create_task(_probe(probe_client, stop, health_latencies))
+        sem = asyncio.Semaphore(concurrency)
+        start = time.perf_counter()
+        await asyncio.gather(*[_signup(client, sem, register_latencies, errors) for _ in range(signups)])
+        elapsed = time.perf_counter() - start
+        stop.set()
+        await probe
+
+    print(f"{signups} signups in {elapsed:.2f}s ({signups / elapsed:.1f}/s), {len(errors)} errors")
+    _summary("POST /api/auth/register", register_latencies)
+    _summary("GET /api/health (idle)", baseline)
+    _summary("GET /api/health (during burst)", health_latencies)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--signups", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.url, args.signups, args.concurrency))
@@ -0,0 +1,129 @@
+"""Response rendering per endpoint: FastAPI's response_model path versus FastJSONResponse.
+
+Needs no database: each endpoint's response model is filled with synthetic
+data and rendered the way FastAPI does for a returned model (serialize via
+the route's response_model, then JSONResponse) and the way FastJSONResponse
+does when a route returns one.
+
+    python benchmarks/responses.py --rows 1000
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.routing import APIRoute, serialize_response  # noqa: E402
+
+from app.schemas.alert import AlertListResponse, AlertResponse  # noqa: E402
+from app.schemas.leaderboard import LeaderboardEntry, LeaderboardResponse  # noqa: E402
+from app.schemas.market import QuoteSnapshot  # noqa: E402
+from app.schemas.order import OrderListResponse, OrderResponse  # noqa: E402
+from app.schemas.portfolio import (  # noqa: E402
+    PortfolioHistoryPoint,
+    PortfolioHistoryResponse,
+    PortfolioResponse,
+    PortfolioSummary,
+    PositionResponse,
+)
+from app.schemas.trade import TradeHistoryResponse, TradeResponse  # noqa: E402
+from app.schemas.watchlist import WatchlistItem, WatchlistResponse  # noqa: E402
+from app.utils.responses import FastJSONResponse  # noqa: E402
+from main import app  # noqa: E402
+
+NOW = "2026-01-02 15:04:05.123456+00:00"
+
+
+def _payloads(rows: int) -> dict:
+    sparkline = [100.0 + i / 10 for i in range(20)]
+    return {
+        "/api/trades": TradeHistoryResponse(
+            trades=[
+                TradeResponse(id=str(uuid.uuid4()), symbol="AAPL", side="BUY", quantity=10, price=190.12,
+                              total=1901.2, executed_at=NOW)
+                for _ in range(rows)
+            ],
+            next_cursor="MjAyNi0wMS0wMnw=",
+            page_size=rows,
+        ),
+        "/api/quotes/latest": [
+            QuoteSnapshot(symbol=f"S{i:04d}", price=123.45, volume=1_000_000, timestamp=1_700_000_000_000,
+                          sparkline=sparkline)
+            for i in range(rows)
+        ],
+        "/api/portfolio": PortfolioResponse(
+            summary=PortfolioSummary(total_value=150_000.0, cash_balance=50_000.0, invested_value=100_000.0,
+                                     total_return=50_000.0, total_return_percent=50.0),
+            positions=[
+                PositionResponse(symbol=f"S{i:04d}", quantity=10, avg_cost_basis=100.0, total_cost=1000.0,
+                                 current_price=110.0, market_value=1100.0, unrealized_pnl=100.0,
+                                 unrealized_pnl_percent=10.0, realized_pnl=0.0)
+                for i in range(min(rows, 200))
+            ],
+        ),
+        "/api/portfolio/history": PortfolioHistoryResponse(
+            range="1y",
+            resolution_seconds=86400,
+            points=[PortfolioHistoryPoint(t=NOW, value=100_000.0 + i) for i in range(rows)],
+        ),
+        "/api/orders": OrderListResponse(orders=[
+            OrderResponse(id=str(uuid.uuid4()), symbol="AAPL", side="BUY", order_type="LIMIT", quantity=10,
+                          price=180.0, status="OPEN", created_at=NOW)
+            for _ in range(min(rows, 100))
+        ]),
+        "/api/alerts": AlertListResponse(alerts=[
+            AlertResponse(id=str(uuid.uuid4()), symbol="AAPL", condition="ABOVE", threshold=200.0,
+                          status="ACTIVE", created_at=NOW)
+            for _ in range(min(rows, 100))
+        ]),
+        "/api/watchlist": WatchlistResponse(items=[
+            WatchlistItem(symbol=f"S{i:04d}", added_at=NOW) for i in range(min(rows, 100))
+        ]),
+        "/api/leaderboard": LeaderboardResponse(
+            entries=[
+                LeaderboardEntry(rank=i + 1, name=f"trader{i}", total_value=150_000.0, total_return=50_000.0,
+                                 total_return_percent=50.0)
+                for i in range(100)
+            ],
+            total_accounts=1_000_000,
+        ),
+    }
+
+
+def _route(path: str) -> APIRoute:
+    return next(r for r in app.routes if isinstance(r, APIRoute) and r.path == path and "GET" in r.methods)
+
+
+async def _response_model_path(route: APIRoute, payload) -> bytes:
+    content = await serialize_response(field=route.response_field, response_content=payload)
+    return JSONResponse(content).body
+
+
+def _timed(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def main(rows: int, repeat: int):
+    loop = asyncio.new_event_loop()
+    print(f"{'endpoint':<26} {'response_model':>15} {'FastJSONResponse':>17} {'speedup':>8}")
+    for path, payload in _payloads(rows).items():
+        route = _route(path)
+        assert loop.run_until_complete(_response_model_path(route, payload)) == FastJSONResponse(payload).body
+        before = _timed(lambda: loop.run_until_complete(_response_model_path(route, payload)), repeat)
+        after = _timed(lambda: FastJSONResponse(payload).body, repeat)
+        print(f"{path:<26} {before * 1000:12.3f} ms {after * 1000:14.3f} ms {before / after:7.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    main(args.rows, args.repeat)
@@ -0,0 +1,119 @@
+"""Concurrent trade execution against the configured database.
+
+Creates a throwaway user, fires BUY/SELL orders for one symbol from several
+connections at once, then checks that the final cash balance and position
+match the trade ledger exactly.
+
+    DATABASE_URL=... python benchmarks/trade_concurrency.py --connections 8 --orders 2000
+
+With --batch-size N, orders go through execute_trade_batch (best-effort
+mode) N at a time instead of one execute_trade call each.
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from fastapi import HTTPException  # noqa: E402
+from sqlalchemy import delete, func, select  # noqa: E402
+
+from app.database import AsyncSessionLocal, engine  # noqa: E402
+from app.models.position import Position  # noqa: E402
+from app.models.trade import Trade  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.services import finnhub_service  # noqa: E402
+from app.services.trade_service import execute_trade, execute_trade_batch  # noqa: E402
+
+SYMBOL = "BENCH"
+STARTING_CASH = 1_000_000.0
+
+
+async def _batch_worker(user_id: uuid.UUID, orders: int, batch_size: int, rejected: list[int]):
+    async with AsyncSessionLocal() as db:
+        user = await db.get(User, user_id)
+        for _ in range(orders // batch_size):
+            finnhub_service.quote_cache[SYMBOL]["price"] = round(random.uniform(90, 110), 2)
+            batch = [
+                (SYMBOL, "BUY" if random.random() < 0.6 else "SELL", random.randint(1, 20))
+                for _ in range(batch_size)
+            ]
+            results, _ = await execute_trade_batch(db, user, batch, atomic=False)
+            rejected.extend(1 for status, _, _ in results if status != "filled")
+
+
+async def _worker(user_id: uuid.UUID, orders: int, rejected: list[int]):
+    async with AsyncSessionLocal() as db:
+        user = await db.get(User, user_id)
+        for _ in range(orders):
+            finnhub_service.quote_cache[SYMBOL]["price"] = round(random.uniform(90, 110), 2)
+            side = "BUY" if random.random() < 0.6 else "SELL"
+            try:
+                await execute_trade(db, user, SYMBOL, side, random.randint(1, 20))
+            except HTTPException:
+                rejected.append(1)
+
+
+async def main(connections: int, orders: int, batch_size: int):
+    finnhub_service.quote_cache[SYMBOL] = {"symbol": SYMBOL, "price": 100.0, "volume": 0, "timestamp": 0}
+
+    async with AsyncSessionLocal() as db:
+        user = User(email=f"bench-{uuid.uuid4().hex[:12]}@example.com", starting_balance=STARTING_CASH, cash_balance=STARTING_CASH)
+        db.add(user)
+        await db.commit()
+        user_id = user.id
+
+    rejected: list[int] = []
+    per_connection = orders // connections
+    if batch_size:
+        per_connection -= per_connection % batch_size
+        workers = [_batch_worker(user_id, per_connection, batch_size, rejected) for _ in range(connections)]
+    else:
+        workers = [_worker(user_id, per_connection, rejected) for _ in range(connections)]
+    start = time.perf_counter()
+    await asyncio.gather(*workers)
+    elapsed = time.perf_counter() - start
+
+    executed = per_connection * connections - len(rejected)
+    print(f"{executed} trades ({len(rejected)} rejected) over {connections} connections in {elapsed:.2f}s")
+    print(f"{executed / elapsed:.0f} trades/s total, {executed / elapsed / connections:.0f} trades/s per connection")
+
+    async with AsyncSessionLocal() as db:
+        cash = (await db.execute(select(User.cash_balance).where(User.id == user_id))).scalar_one()
+        bought = (await db.execute(
+            select(func.coalesce(func.sum(Trade.total), 0), func.coalesce(func.sum(Trade.quantity), 0))
+            .where(Trade.user_id == user_id, Trade.side == "BUY")
+        )).one()
+        sold = (await db.execute(
+            select(func.coalesce(func.sum(Trade.total), 0), func.coalesce(func.sum(Trade.quantity), 0))
+            .where(Trade.user_id == user_id, Trade.side == "SELL")
+        )).one()
+        held = (await db.execute(
+            select(Position.quantity).where(Position.user_id == user_id, Position.symbol == SYMBOL)
+        )).scalar_one_or_none() or 0
+
+        expected_cash = round(STARTING_CASH - bought[0] + sold[0], 2)
+        expected_held = bought[1] - sold[1]
+        cash_ok = abs(cash - expected_cash) < 0.01
+        print(f"cash {cash:.2f} vs ledger {expected_cash:.2f}: {'OK' if cash_ok else 'MISMATCH'}")
+        print(f"position {held} vs ledger {expected_held}: {'OK' if held == expected_held else 'MISMATCH'}")
+
+        await db.execute(delete(Trade).where(Trade.user_id == user_id))
+        await db.execute(delete(Position).where(Position.user_id == user_id))
+        await db.execute(delete(User).where(User.id == user_id))
+        await db.commit()
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--connections", type=int, default=8)
+    parser.add_argument("--orders", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=0)
+    args = parser.parse_args()
+    asyncio.run(main(args.connections, args.orders, args.batch_size))
@@ -1,13 +1,32 @@
+import hmac
 import logging
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Header, HTTPException, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 
 from app.config import settings
-from app.routers import auth, market, portfolio, trades, watchlist
-from app.services import finnhub_service
+from app.database import engine, replica_engine
+from app.middleware import timing
+from app.middleware.timing import TimingMiddleware
+from app.routers import alerts, auth, leaderboard, market, orders, portfolio, trades, watchlist
+from app.services import (
+    alert_service,
+    analytics_service,
+    email_service,
+    event_service,
+    finnhub_service,
+    latency_service,
+    leaderboard_service,
+    maintenance_service,
+    order_service,
+    portfolio_service,
+    trade_service,
+    warmup_service,
+)
+from app.utils import db_metrics, rate_limit
+from app.utils.responses import FastJSONResponse
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -15,12 +34,33 @@ logger = logging.getLogger(__name__)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    await timing.start()
     await finnhub_service.start()
+    await warmup_service.start()
+    await event_service.start()
+    await portfolio_service.start()
+    await analytics_service.start()
+    await trade_service.start()
+    await rate_limit.start()
+    await email_service.start()
+    await maintenance_service.start()
+    await order_service.start()
+    await alert_service.start()
+    await leaderboard_service.start()
     yield
+    await leaderboard_service.stop()
+    await alert_service.stop()
+    await order_service.stop()
+    await maintenance_service.stop()
+    await email_service.stop()
+    await rate_limit.stop()
+    await event_service.stop()
+    await warmup_service.stop()
     await finnhub_service.stop()
+    await timing.stop()
 
 
-app = FastAPI(title="Market Pulse", version="1.0.0", lifespan=lifespan)
+app = FastAPI(title="Market Pulse", version="1.0.0", lifespan=lifespan, default_response_class=FastJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -28,7 +68,10 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"] if settings.server_timing_header else [],
 )
+# Outermost, so its timings cover the whole request
+app.add_middleware(TimingMiddleware)
 
 
 @app.exception_handler(Exception)
@@ -41,9 +84,30 @@ app.include_router(auth.router, prefix="/api")
 app.include_router(market.router, prefix="/api")
 app.include_router(watchlist.router, prefix="/api")
 app.include_router(trades.router, prefix="/api")
+app.include_router(orders.router, prefix="/api")
+app.include_router(alerts.router, prefix="/api")
 app.include_router(portfolio.router, prefix="/api")
+app.include_router(leaderboard.router, prefix="/api")
 
 
 @app.get("/api/health")
 async def health():
     return {"status": "ok"}
+
+
+@app.get("/api/metrics", response_class=PlainTextResponse)
+async def metrics(authorization: str | None = Header(None)):
+    # Internal numbers: only for scrapers holding the token, and hidden without one
+    if not settings.metrics_token or not hmac.compare_digest(
+        authorization or "", f"Bearer {settings.metrics_token}"
+    ):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+    engines = {"primary": engine, "replica": replica_engine} if replica_engine is not None else {"primary": engine}
+    return timing.render_metrics() + latency_service.render_metrics() + db_metrics.render_metrics(engines)
+
+
+@app.get("/api/ready")
+async def ready():
+    """For load balancer readiness checks: 503 until the quote cache is warm."""
+    progress = warmup_service.progress()
+    return JSONResponse(status_code=200 if progress["ready"] else 503, content=progress)